@@ -0,0 +1,61 @@
+import asyncio
+from pathlib import PurePath
+from typing import Dict
+
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel, Field
+
+from app.core.config import settings
+from app.services.batch import Batch, plan
+
+router = APIRouter()
+
+# batches started by this process; reports stay available until restart
+_batches: Dict[str, Batch] = {}
+_tasks: Dict[str, asyncio.Task] = {}
+
+class BatchReq(BaseModel):
+    directory: str = Field(".", description="Folder of transcripts, relative to BATCH_ROOT")
+    pattern: str = "*.txt"
+    concurrency: int = Field(settings.batch_concurrency, ge=1, le=32)
+    mode: str = Field("auto", pattern="^(auto|full)$")
+
+async def cancel_batches() -> None:
+    # on shutdown; rerunning the same batch later skips the runs that were completed
+    tasks = list(_tasks.values())
+    for t in tasks:
+        t.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+@router.post("/batch", status_code=202)
+async def start_batch(req: BatchReq):
+    root = settings.batch_root.resolve()
+    folder = (root / req.directory).resolve()
+    if not folder.is_relative_to(root):
+        raise HTTPException(status_code=400, detail="directory must be inside BATCH_ROOT")
+    if not folder.is_dir():
+        raise HTTPException(status_code=404, detail=f"No folder {req.directory} under BATCH_ROOT")
+    pattern = PurePath(req.pattern)
+    if pattern.is_absolute() or ".." in pattern.parts:
+        raise HTTPException(status_code=400, detail="pattern must be relative and must not contain '..'")
+    # symlinks can still point outside: check where every match really is
+    items = plan(p for p in folder.glob(req.pattern) if p.is_file() and p.resolve().is_relative_to(root))
+    if not items:
+        raise HTTPException(status_code=400, detail=f"No files matching {req.pattern}")
+    batch = Batch(items, req.concurrency, req.mode)
+    _batches[batch.id] = batch
+    task = asyncio.create_task(batch.run())
+    _tasks[batch.id] = task
+    task.add_done_callback(lambda _: _tasks.pop(batch.id, None))
+    return batch.report(items=False)
+
+@router.get("/batch")
+async def list_batches():
+    return [b.report(items=False) for b in _batches.values()]
+
+@router.get("/batch/{batch_id}")
+async def batch_status(batch_id: str):
+    batch = _batches.get(batch_id)
+    if batch is None:
+        raise HTTPException(status_code=404, detail=f"No batch {batch_id}")
+    return batch.report()
@@ -1,10 +1,20 @@
-from fastapi import APIRouter, HTTPException, Query
-from pydantic import BaseModel
-from typing import List, Literal, Optional, Tuple
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from typing import AsyncIterator, Callable, List, Literal, Optional, Tuple
 from pathlib import Path
-import json
+import asyncio, json, logging, time, weakref
 
-from app.services.friendli_client import friendli_chat, FriendliHTTPError
+from app.core.bundle_cache import file_signature
+from app.core.metrics import CHAT_TTFT_SECONDS
+from app.core.storage import read_json, run_cache, runs_catalog, DATA_DIR
+from app.core.chat_sessions import ChatSession, SessionStore, compact
+from app.core.config import settings
+from app.services.retrieval import load_index, select_segments
+from app.services.friendli_client import friendli_chat, friendli_chat_stream, FriendliHTTPError, chat_configured
+from app.services.governor import CircuitOpenError
+
+log = logging.getLogger(__name__)
 
 router = APIRouter()
 
@@ -20,40 +30,33 @@ class AskRes(BaseModel):
 
 SYSTEM_PROMPT = "You are Friendli. Answer concisely using the meeting context provided."
 
-BACKEND_ROOT = Path(__file__).resolve().parents[2]   # .../backend
-DATA_DIR = BACKEND_ROOT / "data"
-
-def _runs() -> List[Path]:
-    if not DATA_DIR.exists():
-        return []
-    return [p for p in DATA_DIR.iterdir() if p.is_dir()]
+def _runs():
+    return runs_catalog()
 
 def _pick_run(prefer_both: bool = True) -> Optional[Path]:
-    dirs = _runs()
-    if not dirs:
-        return None
-    # sort by mtime desc
-    dirs.sort(key=lambda p: p.stat().st_mtime, reverse=True)
-    if prefer_both:
-        for d in dirs:
-            if (d / "transcript.txt").exists() and (d / "summary.json").exists():
-                return d
-    for d in dirs:
-        if (d / "transcript.txt").exists():
-            return d
+    # newest first by mtime
+    wanted = ("transcript.txt", "summary.json") if prefer_both else ("transcript.txt",)
+    for r in _runs().newest_first():
+        if r.complete and r.has(*wanted):
+            return r.path
     return None
 
 def _load_run(name: Optional[str]) -> Tuple[Optional[Path], List[str], str]:
     target = None
     if name:
-        cand = DATA_DIR / name
-        if cand.exists() and cand.is_dir():
-            target = cand
+        info = _runs().get(name)
+        if info is not None:
+            target = info.path
     if target is None:
         target = _pick_run(prefer_both=True) or _pick_run(prefer_both=False)
     if target is None:
         return None, [], ""
 
+    sig = file_signature(target, ("summary.json", "transcript.txt"))
+    bullets, transcript = run_cache.get_or_load(("chat", str(target)), sig, lambda: _read_chat_inputs(target))
+    return target, bullets, transcript
+
+def _read_chat_inputs(target: Path) -> Tuple[Tuple[List[str], str], int]:
     bullets: List[str] = []
     transcript = ""
     sfile = target / "summary.json"
@@ -61,7 +64,7 @@ def _load_run(name: Optional[str]) -> Tuple[Optional[Path], List[str], str]:
 
     if sfile.exists():
         try:
-            js = json.loads(sfile.read_text(encoding="utf-8", errors="ignore"))
+            js = read_json(sfile)
             bl = js.get("bullets")
             if isinstance(bl, list):
                 bullets = [str(x) for x in bl]
@@ -74,7 +77,8 @@ def _load_run(name: Optional[str]) -> Tuple[Optional[Path], List[str], str]:
         except Exception:
             transcript = ""
 
-    return target, bullets, transcript
+    size = len(transcript) + sum(len(b) for b in bullets)
+    return (bullets, transcript), size
 
 def _trim(s: str, n: int) -> str:
     s = (s or "").strip()
@@ -88,30 +92,271 @@ def friendli_context_preview(run: Optional[str] = Query(None)):
         "bullets_count": len(bullets),
         "transcript_chars": len(transcript),
         "data_dir": str(DATA_DIR),
-        "hint": "Use ?run=<folderName> to target a specific subfolder under /data",
+        "hint": "Use ?run=<folderName> to target a specific subfolder under /data, ?runs=a,b to chat across several, "
+                "or ?start=YYYY-MM-DD&end=YYYY-MM-DD for every run in a date range",
     }
 
-@router.post("/friendli_chat", response_model=AskRes)
-async def friendli_chat_post(req: AskReq, run: Optional[str] = Query(None)):
-    run_dir, bullets, transcript = _load_run(run)
-    if run_dir is None:
-        raise HTTPException(status_code=404, detail=f"No run folder with transcript.txt under {DATA_DIR}")
-    if not transcript and not bullets:
+Loaded = List[Tuple[Path, List[str], str]]
+
+def _runs_between(start: Optional[str], end: Optional[str]) -> List[str]:
+    # newest first, so the fallback below (head of loaded[0]) picks the latest meeting
+    cat = _runs()
+    names = []
+    for day in reversed(cat.days()):
+        if (start and day < start) or (end and day > end):
+            continue
+        for r in reversed(cat.runs_on(day)):
+            if r.complete and (r.has("transcript.txt") or r.has("summary.json")):
+                names.append(r.name)
+    return names[:settings.chat_max_runs]
+
+def _resolve_runs(run: Optional[str], runs: Optional[str], start: Optional[str] = None,
+                  end: Optional[str] = None) -> Loaded:
+    if start or end:
+        names = _runs_between(start, end)
+        if not names:
+            raise HTTPException(status_code=404, detail=f"No runs between {start or 'the start'} and {end or 'now'}")
+        return [_load_run(n) for n in names]
+    if not runs:
+        run_dir, bullets, transcript = _load_run(run)
+        if run_dir is None:
+            raise HTTPException(status_code=404, detail=f"No run folder with transcript.txt under {DATA_DIR}")
+        return [(run_dir, bullets, transcript)]
+    out = []
+    for name in dict.fromkeys(n.strip() for n in runs.split(",") if n.strip()):
+        if _runs().get(name) is None:
+            raise HTTPException(status_code=404, detail=f"No run folder {name} under {DATA_DIR}")
+        out.append(_load_run(name))
+    return out
+
+def _run_context(loaded: Loaded) -> Tuple[str, bool]:
+    """The part of the system prompt that only depends on the runs: (text, needs_retrieval).
+    Cached per run set, so follow-ups on the same runs don't rebuild it."""
+    sig = tuple((d.name,) + file_signature(d, ("summary.json", "transcript.txt")) for d, _, _ in loaded)
+
+    def build():
+        parts = [SYSTEM_PROMPT, "Run folder: " + ", ".join(d.name for d, _, _ in loaded)]
+        for d, bullets, _ in loaded:
+            if bullets:
+                head = "Meeting Summary" if len(loaded) == 1 else f"Meeting Summary ({d.name})"
+                parts.append(head + ":\n- " + "\n- ".join(bullets[:60]))
+        total = sum(len(t.strip()) for _, _, t in loaded)
+        fits = total <= settings.chat_context_chars
+        if fits and total:
+            parts.append("\n\n".join(f"Transcript ({d.name}):\n{t.strip()}" for d, _, t in loaded if t.strip()))
+        text = "\n\n".join(parts)
+        return (text, not fits), len(text)
+
+    return run_cache.get_or_load(("chat_context", tuple(str(d) for d, _, _ in loaded)), sig, build)
+
+def _retrieved_context(loaded: Loaded, question: str) -> str:
+    indexes = [(d.name, idx) for d, _, t in loaded if t and (idx := load_index(d))]
+    segs = select_segments(indexes, question, settings.chat_top_k, settings.chat_context_chars)
+    if not segs:
+        # nothing matched the question lexically; fall back to the head of the newest transcript
+        d, _, t = loaded[0]
+        return f"Transcript ({d.name}, trimmed):\n" + _trim(t, settings.chat_context_chars)
+    return "Relevant transcript excerpts:\n" + "\n\n".join(f"[{name}] {seg}" for name, seg in segs)
+
+def _system_prompt(loaded: Loaded, question: str, history_summary: str = "") -> str:
+    if not any(t or b for _, b, t in loaded):
         raise HTTPException(status_code=400, detail="Found run folder, but no transcript/summary inside")
+    text, needs_retrieval = _run_context(loaded)
+    parts = [text]
+    if needs_retrieval:
+        parts.append(_retrieved_context(loaded, question))
+    if history_summary:
+        parts.append("Earlier in this conversation (summarized):\n" + history_summary)
+    return "\n\n".join(parts)
+
+def _build_messages(req: AskReq, run: Optional[str], runs: Optional[str] = None,
+                    start: Optional[str] = None, end: Optional[str] = None) -> List[dict]:
+    loaded = _resolve_runs(run, runs, start, end)
+    question = " ".join([m.content for m in req.messages if m.role == "user"][-2:])
+    system_ctx = _system_prompt(loaded, question)
 
-    parts = [SYSTEM_PROMPT, f"Run folder: {run_dir.name}"]
-    if bullets:
-        parts.append("Meeting Summary:\n- " + "\n- ".join(bullets[:60]))
-    if transcript:
-        parts.append("Transcript (trimmed):\n" + _trim(transcript, 18000))
-    system_ctx = "\n\n".join(parts)
+    return [{"role": "system", "content": system_ctx}] + [m.model_dump() for m in req.messages]
 
-    msgs = [{"role": "system", "content": system_ctx}] + [m.model_dump() for m in req.messages]
+_DATE = r"^\d{4}-\d{2}-\d{2}$"
 
+def _require_chat() -> None:
+    # checked before any work (and before a stream starts) so a missing key is a plain 503
+    if not chat_configured():
+        raise HTTPException(status_code=503, detail="Chat is not configured: set FRIENDLI_API_KEY.")
+
+async def _ask(msgs: List[dict]) -> str:
     try:
-        answer = await friendli_chat(msgs)
-        return AskRes(answer=answer)
+        return await friendli_chat(msgs)
+    except CircuitOpenError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(int(e.retry_after) + 1)})
     except FriendliHTTPError as e:
         raise HTTPException(status_code=500, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Friendli unknown error: {e!r}")
+
+@router.post("/friendli_chat", response_model=AskRes)
+async def friendli_chat_post(req: AskReq, run: Optional[str] = Query(None), runs: Optional[str] = Query(None),
+                             start: Optional[str] = Query(None, pattern=_DATE),
+                             end: Optional[str] = Query(None, pattern=_DATE)):
+    _require_chat()
+    msgs = _build_messages(req, run, runs, start, end)
+    return AskRes(answer=await _ask(msgs))
+
+def _sse(data: dict, event: Optional[str] = None) -> str:
+    head = f"event: {event}\n" if event else ""
+    return f"{head}data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+async def _stream_events(msgs: List[dict], request: Request,
+                         on_complete: Optional[Callable[[str], None]] = None) -> AsyncIterator[str]:
+    t0 = time.perf_counter()
+    ttft = None
+    chunks = 0
+    received: List[str] = []
+    upstream = friendli_chat_stream(msgs)
+    try:
+        async for delta in upstream:
+            if await request.is_disconnected():
+                log.info("friendli stream: client went away after %d chunks", chunks)
+                return
+            if ttft is None:
+                ttft = (time.perf_counter() - t0) * 1000
+                CHAT_TTFT_SECONDS.observe(ttft / 1000)
+            chunks += 1
+            received.append(delta)
+            yield _sse({"delta": delta})
+        total = (time.perf_counter() - t0) * 1000
+        log.info("friendli stream: ttft_ms=%.0f total_ms=%.0f chunks=%d", ttft or total, total, chunks)
+        if on_complete is not None:
+            on_complete("".join(received))
+        yield _sse({"ttft_ms": round(ttft or total, 1), "total_ms": round(total, 1), "chunks": chunks}, event="done")
+    except FriendliHTTPError as e:
+        yield _sse({"detail": str(e)}, event="error")
+    except Exception as e:
+        yield _sse({"detail": f"Friendli unknown error: {e!r}"}, event="error")
+    finally:
+        await upstream.aclose()
+
+def _sse_response(events: AsyncIterator[str]) -> StreamingResponse:
+    return StreamingResponse(events, media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@router.post("/friendli_chat/stream")
+async def friendli_chat_stream_post(req: AskReq, request: Request, run: Optional[str] = Query(None),
+                                    runs: Optional[str] = Query(None),
+                                    start: Optional[str] = Query(None, pattern=_DATE),
+                                    end: Optional[str] = Query(None, pattern=_DATE)):
+    _require_chat()
+    msgs = _build_messages(req, run, runs, start, end)
+    return _sse_response(_stream_events(msgs, request))
+
+# ---------- sessions: the server keeps the history, clients send only the new message ----------
+sessions = SessionStore(settings.chat_db)
+_session_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+COMPACT_PROMPT = ("Summarize the conversation below about the meetings in at most 8 short bullet points. "
+                  "Keep names, decisions, numbers and open questions; drop pleasantries.")
+
+class SessionReq(BaseModel):
+    run: Optional[str] = None
+    runs: Optional[List[str]] = None
+    start: Optional[str] = Field(None, pattern=_DATE)
+    end: Optional[str] = Field(None, pattern=_DATE)
+
+class SessionMsg(BaseModel):
+    content: str = Field(..., min_length=1)
+
+class SessionAskRes(BaseModel):
+    answer: str
+    session_id: str
+    history_tokens: int
+    compacted: bool = False
+
+def _session_lock(session_id: str) -> asyncio.Lock:
+    # one turn at a time per session in this process, so concurrent messages can't drop each other
+    lock = _session_locks.get(session_id)
+    if lock is None:
+        lock = _session_locks[session_id] = asyncio.Lock()
+    return lock
+
+def _get_session(session_id: str) -> ChatSession:
+    s = sessions.get(session_id)
+    if s is None:
+        raise HTTPException(status_code=404, detail=f"No chat session {session_id}")
+    return s
+
+async def _summarize_history(summary: str, old: List[dict]) -> str:
+    lines = [f"Summary so far:\n{summary}"] if summary else []
+    lines += [f"{t['role']}: {t['content']}" for t in old]
+    return await friendli_chat([{"role": "system", "content": COMPACT_PROMPT},
+                                {"role": "user", "content": "\n\n".join(lines)}], temperature=0.1, max_tokens=300)
+
+async def _session_turn(session_id: str, content: str) -> Tuple[ChatSession, List[dict], bool]:
+    """Load the session, compact it if the history is over budget, and build this turn's messages."""
+    s = _get_session(session_id)
+    compacted = await compact(s, settings.chat_history_tokens, settings.chat_keep_messages, _summarize_history)
+    if compacted:
+        sessions.save(s)
+        log.info("chat %s: compacted to %d tokens (%d messages summarized so far)", s.id, s.history_tokens(), s.compacted)
+    loaded = [_load_run(n) for n in s.runs if _runs().get(n) is not None]
+    if not loaded:
+        raise HTTPException(status_code=404, detail="The runs this session was about are gone")
+    prior = [t["content"] for t in s.turns if t["role"] == "user"][-1:]
+    system_ctx = _system_prompt(loaded, " ".join(prior + [content]), s.summary)
+    msgs = [{"role": "system", "content": system_ctx}] + s.turns + [{"role": "user", "content": content}]
+    return s, msgs, compacted
+
+def _finish_turn(s: ChatSession, content: str, answer: str) -> None:
+    s.add_exchange(content, answer)
+    sessions.save(s)
+
+@router.post("/friendli_chat/sessions", status_code=201)
+async def create_session(req: SessionReq):
+    runs = ",".join(req.runs) if req.runs else None
+    loaded = _resolve_runs(req.run, runs, req.start, req.end)
+    if not any(t or b for _, b, t in loaded):
+        raise HTTPException(status_code=400, detail="Found run folder, but no transcript/summary inside")
+    sessions.purge(settings.chat_session_ttl)
+    return sessions.create([d.name for d, _, _ in loaded]).as_dict()
+
+@router.get("/friendli_chat/sessions/{session_id}")
+async def get_session(session_id: str):
+    s = _get_session(session_id)
+    return {**s.as_dict(), "turns": s.turns}
+
+@router.delete("/friendli_chat/sessions/{session_id}", status_code=204)
+async def delete_session(session_id: str):
+    if not sessions.delete(session_id):
+        raise HTTPException(status_code=404, detail=f"No chat session {session_id}")
+
+@router.post("/friendli_chat/sessions/{session_id}/messages", response_model=SessionAskRes)
+async def session_message(session_id: str, msg: SessionMsg):
+    _require_chat()
+    async with _session_lock(session_id):
+        s, msgs, compacted = await _session_turn(session_id, msg.content)
+        answer = await _ask(msgs)
+        _finish_turn(s, msg.content, answer)
+    return SessionAskRes(answer=answer, session_id=s.id, history_tokens=s.history_tokens(), compacted=compacted)
+
+@router.post("/friendli_chat/sessions/{session_id}/messages/stream")
+async def session_message_stream(session_id: str, msg: SessionMsg, request: Request):
+    _require_chat()
+    _get_session(session_id)   # 404 before the stream starts
+
+    async def events():
+        async with _session_lock(session_id):
+            try:
+                s, msgs, _ = await _session_turn(session_id, msg.content)
+            except HTTPException as e:
+                yield _sse({"detail": e.detail}, event="error")
+                return
+            except FriendliHTTPError as e:
+                yield _sse({"detail": str(e)}, event="error")
+                return
+            except Exception as e:
+                log.exception("chat %s: preparing the turn failed", session_id)
+                yield _sse({"detail": f"Friendli unknown error: {e!r}"}, event="error")
+                return
+            async for ev in _stream_events(msgs, request, lambda answer: _finish_turn(s, msg.content, answer)):
+                yield ev
+
+    return _sse_response(events())
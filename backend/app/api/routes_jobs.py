@@ -0,0 +1,67 @@
+import asyncio
+from fastapi import APIRouter, UploadFile, File, HTTPException, Body
+from fastapi.responses import JSONResponse
+from typing import Optional
+from pathlib import Path
+
+from app.core.config import settings
+from app.core.ingest import spool_request, discard_spool
+from app.core.jobs import JobQueue, JobWorkers
+from app.models.schemas import ProcessResponse
+from app.services.pipeline import process_file
+
+router = APIRouter()
+
+async def _handle(source: str) -> dict:
+    src = Path(source)
+    if not src.exists():
+        raise FileNotFoundError(f"spooled transcript {src.name} is gone")
+    keep = False
+    try:
+        return (await process_file(src)).model_dump()
+    except asyncio.CancelledError:
+        keep = True   # shutting down: the job is handed back and runs again from this spool
+        raise
+    finally:
+        if not keep:
+            # no-op once the run has adopted it; an "unchanged" append or a failed job (never
+            # retried) leaves it behind otherwise
+            discard_spool(src)
+
+job_queue = JobQueue(settings.jobs_db)
+job_workers = JobWorkers(job_queue, _handle, settings.jobs_concurrency, settings.jobs_poll_interval,
+                         settings.jobs_stale_after)
+
+def _status(job: dict) -> dict:
+    return {k: job[k] for k in ("id", "status", "error", "attempts", "created_at", "started_at", "finished_at")}
+
+# ---------- async processing: submit, poll, fetch ----------
+@router.post("/jobs", status_code=202)
+async def submit_job(file: Optional[UploadFile] = File(None), transcript: Optional[str] = Body(None)):
+    src = await spool_request(file, transcript)
+    job_id = job_queue.submit(str(src))
+    job_workers.notify()
+    return {"job_id": job_id, "status": "queued"}
+
+@router.get("/jobs/stats")
+async def job_stats():
+    return job_queue.counts()
+
+@router.get("/jobs/{job_id}")
+async def job_status(job_id: str):
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"No job {job_id}")
+    return _status(job)
+
+@router.get("/jobs/{job_id}/result", response_model=ProcessResponse)
+async def job_result(job_id: str):
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"No job {job_id}")
+    if job["status"] == "failed":
+        # the request worked; the job didn't. "error" says why
+        return JSONResponse(_status(job), status_code=200)
+    if job["status"] != "done":
+        return JSONResponse(_status(job), status_code=202)
+    return ProcessResponse(**job["result"])
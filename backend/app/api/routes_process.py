@@ -1,75 +1,124 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, Body
-from typing import Optional, List
+from fastapi import APIRouter, UploadFile, File, HTTPException, Body, Query, Request
+from fastapi.responses import Response
+import hashlib
+from typing import Optional, List, Tuple
 from pathlib import Path
 
+from app.core.bundle_cache import etag_matches, file_signature
+from app.core.ingest import spool_request, discard_spool
+from app.core.run_store import run_store
 from app.core.storage import (
-    ensure_day_dir, write_json, write_text, read_json,
-    latest_day_dir, list_day_dirs
+    read_json, read_star, latest_run_dir, list_days, day_run_dirs, get_run_dir, runs_catalog, run_cache,
+    MANIFEST, MATRIX_BIN,
 )
 from app.models.schemas import ProcessResponse, StarConnect, SummaryBlock, TaskList
-from app.services.gemini_client import run_all_processors
+from app.services.graph import star_metrics
+from app.services.pipeline import process_file, result_cache
 
 router = APIRouter()
 
 # ---------- main processing ----------
 @router.post("/process", response_model=ProcessResponse)
-async def process_transcript(file: Optional[UploadFile] = File(None), transcript: Optional[str] = Body(None)):
-    if not file and not transcript:
-        raise HTTPException(status_code=400, detail="Provide a .txt file or 'transcript' text.")
-    text = transcript
-    if file:
-        if not file.filename.lower().endswith(".txt"):
-            raise HTTPException(status_code=400, detail="Only .txt files are accepted.")
-        text = (await file.read()).decode("utf-8", errors="ignore")
-
-    day_dir = ensure_day_dir()
-    star, summary, tasks = await run_all_processors(text)
-    write_text(day_dir / "transcript.txt", text or "")
-    write_json(day_dir / "star_connect.json", star.dict())
-    write_json(day_dir / "summary.json", summary.dict())
-    write_json(day_dir / "tasks.json", tasks.dict())
-
-    return ProcessResponse(date_dir=day_dir.name, star_connect=star, summary=summary, tasks=tasks)
+async def process_transcript(file: Optional[UploadFile] = File(None), transcript: Optional[str] = Body(None),
+                             mode: str = Query("auto", pattern="^(auto|full)$")):
+    # auto: a re-upload that only appends to today's transcript reprocesses just the new turns
+    src = await spool_request(file, transcript)
+    try:
+        return await process_file(src, mode=mode)
+    finally:
+        discard_spool(src)   # no-op once the run has adopted it
 
 # alias used by frontend
 @router.post("/upload", response_model=ProcessResponse)
-async def upload_alias(file: Optional[UploadFile] = File(None), transcript: Optional[str] = Body(None)):
-    return await process_transcript(file=file, transcript=transcript)
+async def upload_alias(file: Optional[UploadFile] = File(None), transcript: Optional[str] = Body(None),
+                       mode: str = Query("auto", pattern="^(auto|full)$")):
+    return await process_transcript(file=file, transcript=transcript, mode=mode)
+
+@router.get("/cache/stats")
+async def cache_stats():
+    return {**result_cache.stats(), "bundles": run_cache.stats()}
 
 # ---------- read latest for Orion ----------
 @router.get("/latest", response_model=ProcessResponse)
-async def get_latest():
-    day = latest_day_dir()
-    if not day:
+async def get_latest(request: Request):
+    run_dir = latest_run_dir()
+    if not run_dir:
         raise HTTPException(status_code=404, detail="No saved runs yet.")
 
-    return _read_bundle_from(day)
+    return _bundle_response(run_dir, request)
 
 # ---------- timeline: list days ----------
 @router.get("/runs", response_model=List[str])
-async def list_runs():
-    # returns ['2025-09-12','2025-09-13', ...] ascending
-    return [p.name for p in list_day_dirs()]
+async def list_runs(offset: int = Query(0, ge=0), limit: Optional[int] = Query(None, ge=1),
+                    after: Optional[str] = Query(None, description="cursor: the last day of the previous page")):
+    # returns ['2025-09-12','2025-09-13', ...] ascending: days with at least one processed run
+    return list_days(offset, limit, after)
+
+# ---------- timeline: runs on one day ----------
+@router.get("/runs/by_date/{date}", response_model=List[str])
+async def list_runs_on(date: str):
+    # returns ['2025-09-12_09-30-02-a1b2', ...] ascending
+    return [p.name for p in day_run_dirs(date)]
+
+# ---------- one run by id ----------
+@router.get("/run/{run_id}", response_model=ProcessResponse)
+async def get_run(run_id: str, request: Request):
+    run_dir = get_run_dir(run_id)
+    if run_dir is None:
+        raise HTTPException(status_code=404, detail=f"No run {run_id}")
+    return _bundle_response(run_dir, request)
 
-# ---------- timeline: load by date (YYYY-MM-DD) ----------
+# ---------- timeline: run index with artifact sizes ----------
+@router.get("/runs/index")
+async def run_index(offset: int = Query(0, ge=0), limit: int = Query(50, ge=1, le=500),
+                    after: Optional[str] = Query(None, description="cursor: the last run name of the previous page")):
+    cat = runs_catalog()
+    return {"total": len(cat), "offset": offset, "runs": [r.as_dict() for r in cat.page(offset, limit, after=after)]}
+
+# ---------- timeline: load by date (YYYY-MM-DD): that day's latest run ----------
 @router.get("/by_date/{date}", response_model=ProcessResponse)
-async def get_by_date(date: str):
-    candidates = [p for p in list_day_dirs() if p.name == date]
-    if not candidates:
+async def get_by_date(date: str, request: Request):
+    run_dir = latest_run_dir(date)
+    if run_dir is None:
         raise HTTPException(status_code=404, detail=f"No run for {date}")
-    return _read_bundle_from(candidates[0])
+    return _bundle_response(run_dir, request)
 
 # ---------- helpers ----------
-def _read_bundle_from(day_dir: Path) -> ProcessResponse:
-    star_p = day_dir / "star_connect.json"
-    sum_p  = day_dir / "summary.json"
-    tasks_p = day_dir / "tasks.json"
+def _read_bundle_from(run_dir: Path) -> ProcessResponse:
+    star_p = run_dir / "star_connect.json"
+    sum_p  = run_dir / "summary.json"
+    tasks_p = run_dir / "tasks.json"
 
     if not star_p.exists():
-        raise HTTPException(status_code=404, detail=f"{star_p.name} not found in {day_dir.name}")
+        raise HTTPException(status_code=404, detail=f"{star_p.name} not found in {run_dir.name}")
+
+    stored = run_store.get_bundle(run_dir.name)
+    if stored is not None:
+        star, summary, tasks = StarConnect(**stored[0]), SummaryBlock(**stored[1]), TaskList(**stored[2])
+    else:   # runs the store hasn't seen yet (e.g. before a migration) come straight from the folder
+        star = StarConnect(**read_star(run_dir))
+        summary = SummaryBlock(**read_json(sum_p) if sum_p.exists() else {"bullets": []})
+        tasks = TaskList(**read_json(tasks_p) if tasks_p.exists() else {"items": []})
+
+    return ProcessResponse(date_dir=run_dir.name, star_connect=star, summary=summary, tasks=tasks,
+                           graph_metrics=star_metrics(star))
+
+_BUNDLE_FILES = (MANIFEST, "star_connect.json", MATRIX_BIN, "summary.json", "tasks.json")
+
+def cached_bundle(run_dir: Path) -> Tuple[str, bytes]:
+    """(ETag, JSON body) for a run bundle, from the in-memory cache when the files haven't changed."""
+    sig = file_signature(run_dir, _BUNDLE_FILES)
+
+    def load():
+        body = _read_bundle_from(run_dir).model_dump_json().encode("utf-8")
+        etag = '"' + hashlib.sha1(repr((run_dir.name, sig)).encode("utf-8")).hexdigest()[:20] + '"'
+        return (etag, body), len(body)
 
-    star = StarConnect(**read_json(star_p))
-    summary = SummaryBlock(**read_json(sum_p) if sum_p.exists() else {"bullets": []})
-    tasks = TaskList(**read_json(tasks_p) if tasks_p.exists() else {"items": []})
+    return run_cache.get_or_load(("bundle", str(run_dir)), sig, load)
 
-    return ProcessResponse(date_dir=day_dir.name, star_connect=star, summary=summary, tasks=tasks)
+def _bundle_response(run_dir: Path, request: Request) -> Response:
+    """Serve a run bundle from the in-memory cache, or 304 when the client's ETag still matches."""
+    etag, body = cached_bundle(run_dir)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
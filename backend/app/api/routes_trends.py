@@ -0,0 +1,44 @@
+from fastapi import APIRouter, HTTPException, Query
+from datetime import date as Date
+from typing import Literal, Optional
+
+from app.core.run_store import run_store
+from app.services.pipeline import trend_store
+
+router = APIRouter()
+
+def _check_date(d: Optional[str], name: str) -> Optional[str]:
+    if d is None:
+        return None
+    try:
+        Date.fromisoformat(d)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"{name} must be YYYY-MM-DD")
+    return d
+
+# ---------- collaboration trends across runs ----------
+@router.get("/trends")
+async def get_trends(start: Optional[str] = Query(None), end: Optional[str] = Query(None),
+                     bucket: Literal["day", "week", "month"] = Query("day"),
+                     top: int = Query(10, ge=1, le=100)):
+    return trend_store.query(_check_date(start, "start"), _check_date(end, "end"), bucket, top)
+
+# ---------- cross-run queries (answered by the configured run store) ----------
+@router.get("/tasks")
+async def query_tasks(owner: Optional[str] = Query(None), start: Optional[str] = Query(None),
+                      end: Optional[str] = Query(None), status: Literal["open", "all"] = Query("all"),
+                      limit: int = Query(200, ge=1, le=1000)):
+    # e.g. /api/tasks?owner=Ashu&start=2025-09-01&end=2025-09-30&status=open
+    items = run_store.query_tasks(owner, _check_date(start, "start"), _check_date(end, "end"),
+                                  open_only=status == "open", limit=limit)
+    return {"backend": run_store.backend, "count": len(items), "items": items}
+
+@router.get("/interactions")
+async def query_interactions(person: Optional[str] = Query(None), start: Optional[str] = Query(None),
+                             end: Optional[str] = Query(None), limit: int = Query(50, ge=1, le=500)):
+    pairs = run_store.query_pairs(person, _check_date(start, "start"), _check_date(end, "end"), limit)
+    return {"backend": run_store.backend, "pairs": pairs}
+
+@router.get("/store/stats")
+async def store_stats():
+    return run_store.stats()
@@ -0,0 +1,77 @@
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Hashable, Optional, Sequence, Tuple
+
+Signature = Tuple[Tuple[str, int, int], ...]
+
+def file_signature(run_dir: Path, names: Sequence[str]) -> Signature:
+    """(name, mtime_ns, size) for each file that exists; changes whenever any of them is rewritten."""
+    sig = []
+    for n in names:
+        try:
+            st = (run_dir / n).stat()
+        except OSError:
+            continue
+        sig.append((n, st.st_mtime_ns, st.st_size))
+    return tuple(sig)
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of `etag` against an If-None-Match header ("*" or a comma-separated tag list)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    want = etag[2:] if etag.startswith("W/") else etag
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if (tag[2:] if tag.startswith("W/") else tag) == want:
+            return True
+    return False
+
+class BundleCache:
+    """Byte-bounded LRU of parsed run data. Entries are validated against a file signature
+    on every lookup, and dropped explicitly by `invalidate()` when a run is rewritten."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = self.misses = 0
+        self._items: "OrderedDict[Hashable, Tuple[Signature, Any, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_load(self, key: Hashable, sig: Signature, load: Callable[[], Tuple[Any, int]]) -> Any:
+        with self._lock:
+            hit = self._items.get(key)
+            if hit is not None and hit[0] == sig:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return hit[1]
+        value, size = load()
+        with self._lock:
+            self.misses += 1
+            self._pop(key)
+            if size <= self.max_bytes:
+                self._items[key] = (sig, value, size)
+                self.bytes += size
+                while self.bytes > self.max_bytes:
+                    _, (_, _, old) = self._items.popitem(last=False)
+                    self.bytes -= old
+        return value
+
+    def _pop(self, key: Hashable) -> None:
+        old = self._items.pop(key, None)
+        if old is not None:
+            self.bytes -= old[2]
+
+    def invalidate(self, run_dir: Optional[Path] = None) -> None:
+        with self._lock:
+            if run_dir is None:
+                self._items.clear()
+                self.bytes = 0
+                return
+            for key in [k for k in self._items if isinstance(k, tuple) and k[-1] == str(run_dir)]:
+                self._pop(key)
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._items), "bytes": self.bytes}
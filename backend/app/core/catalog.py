@@ -0,0 +1,262 @@
+import bisect, os, re, threading
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from app.core.locks import file_lock
+
+ARTIFACTS = ("transcript.txt", "star_connect.json", "summary.json", "tasks.json", "star_matrix.f32", "manifest.json")
+WRITING_MARKER = ".writing"   # present while a run is being (re)written; removed when its manifest lands
+COMMIT_STAMP = Path(".meta", "last_commit")   # under the root; replaced on every commit so other processes notice
+CATALOG_LOCK = Path(".meta", "catalog.lock")   # held across writing() by every process sharing the root
+
+# run folders: YYYY-MM-DD (legacy, one per day), YYYY-MM-DD_HH-MM-SS, YYYY-MM-DD_HH-MM-SS-xxxx,
+# or YYYY-MM-DD_HH-MM-SS-NNNNNN-xxxx (NNNNNN counts runs created in that second, or on that
+# backfilled day, so names sort in creation order)
+_RUN_NAME = re.compile(r"^(\d{4}-\d{2}-\d{2})(?:_\d{2}-\d{2}-\d{2}(?:-\d{6})?(?:-[0-9a-f]{4})?)?$")
+
+def run_day(name: str) -> Optional[str]:
+    """The YYYY-MM-DD a run folder belongs to, or None for folders that aren't runs."""
+    m = _RUN_NAME.match(name)
+    return m.group(1) if m else None
+
+@dataclass
+class RunInfo:
+    name: str
+    path: Path
+    mtime: float
+    artifacts: Dict[str, int] = field(default_factory=dict)   # file name -> size in bytes
+    complete: bool = True
+
+    def has(self, *names: str) -> bool:
+        return all(n in self.artifacts for n in names)
+
+    @property
+    def processed(self) -> bool:
+        # runs the pipeline finished; bare transcript folders (older uploads) are only chat context
+        return self.complete and run_day(self.name) is not None and self.has("star_connect.json")
+
+    def as_dict(self) -> dict:
+        return {"name": self.name, "mtime": self.mtime, "complete": self.complete, "artifacts": dict(self.artifacts)}
+
+def _scan_run(p: Path) -> Optional[RunInfo]:
+    try:
+        mtime = p.stat().st_mtime
+    except OSError:
+        return None
+    arts: Dict[str, int] = {}
+    for a in ARTIFACTS:
+        try:
+            st = (p / a).stat()
+        except OSError:
+            continue
+        arts[a] = st.st_size
+        mtime = max(mtime, st.st_mtime)
+    complete = not (p / WRITING_MARKER).exists()
+    return RunInfo(name=p.name, path=p, mtime=mtime, artifacts=arts, complete=complete)
+
+class RunCatalog:
+    """In-memory index of the run folders under one data root.
+    Built by one directory scan, kept current by `update()` on write, and rescanned only when
+    another process changed the root: its mtime moved (a folder was added/removed) or the
+    commit stamp was replaced (a run was committed). Every process's own changes go through
+    `writing()`, which records the new stamps instead of rescanning.
+    Thread-safe: a rebuild replaces the indexes step by step, so lookups, updates and rebuilds
+    all run under one lock (startup preloads read it from several threads at once)."""
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self._runs: Dict[str, RunInfo] = {}
+        self._names: List[str] = []                  # sorted by name (dates sort chronologically)
+        self._by_mtime: List[Tuple[float, str]] = [] # sorted by mtime
+        self._days: Dict[str, List[str]] = {}        # YYYY-MM-DD -> run names that day, sorted
+        self._processed: List[str] = []              # names of processed runs, sorted
+        self._processed_days: List[str] = []         # days with at least one processed run, sorted
+        self._day_processed: Dict[str, int] = {}     # day -> processed runs that day
+        self._root_mtime: Optional[Tuple[int, Optional[int]]] = None
+        self._lock = threading.RLock()
+
+    def _root_stamp(self) -> Optional[Tuple[int, Optional[int]]]:
+        try:
+            root = self.root.stat().st_mtime_ns
+        except OSError:
+            return None
+        try:
+            commit = (self.root / COMMIT_STAMP).stat().st_mtime_ns
+        except OSError:
+            commit = None
+        return root, commit
+
+    def rebuild(self) -> None:
+        with self._lock:
+            self._rebuild()
+
+    def _rebuild(self) -> None:
+        runs: Dict[str, RunInfo] = {}
+        stamp = self._root_stamp()
+        if stamp is not None:
+            with os.scandir(self.root) as it:
+                for entry in it:
+                    if entry.is_dir() and not entry.name.startswith("."):
+                        info = _scan_run(Path(entry.path))
+                        if info is not None:
+                            runs[info.name] = info
+        self._runs = runs
+        self._names = sorted(runs)
+        self._by_mtime = sorted((r.mtime, r.name) for r in runs.values())
+        self._days = {}
+        self._processed = []
+        self._day_processed = {}
+        for name in self._names:
+            day = run_day(name)
+            if day is not None:
+                self._days.setdefault(day, []).append(name)
+            if runs[name].processed:
+                self._processed.append(name)
+                self._day_processed[day] = self._day_processed.get(day, 0) + 1
+        self._processed_days = sorted(self._day_processed)
+        self._root_mtime = stamp
+
+    def refresh_if_changed(self) -> None:
+        with self._lock:
+            if self._root_mtime is None or self._root_stamp() != self._root_mtime:
+                self._rebuild()
+
+    @contextmanager
+    def writing(self) -> Iterator[None]:
+        """Wrap a change this process makes under the root (creating, committing or removing a
+        run folder; call `update()` for it inside). Changes made elsewhere are picked up first,
+        and CATALOG_LOCK keeps other processes from writing until we're done, so afterwards the
+        only difference from the index is ours and the new stamps are simply recorded. Without
+        this, every write would be followed by a full rescan."""
+        with self._lock, file_lock(self.root / CATALOG_LOCK):
+            self.refresh_if_changed()
+            try:
+                yield
+            finally:
+                self._root_mtime = self._root_stamp()
+
+    def _remove(self, name: str) -> None:
+        old = self._runs.pop(name, None)
+        if old is None:
+            return
+        i = bisect.bisect_left(self._names, name)
+        if i < len(self._names) and self._names[i] == name:
+            del self._names[i]
+        j = bisect.bisect_left(self._by_mtime, (old.mtime, name))
+        if j < len(self._by_mtime) and self._by_mtime[j] == (old.mtime, name):
+            del self._by_mtime[j]
+        day = run_day(name)
+        if day in self._days:
+            self._days[day].remove(name)
+            if not self._days[day]:
+                del self._days[day]
+        if old.processed:
+            del self._processed[bisect.bisect_left(self._processed, name)]
+            self._day_processed[day] -= 1
+            if not self._day_processed[day]:
+                del self._day_processed[day]
+                del self._processed_days[bisect.bisect_left(self._processed_days, day)]
+
+    def _add(self, info: RunInfo) -> None:
+        self._runs[info.name] = info
+        bisect.insort(self._names, info.name)
+        bisect.insort(self._by_mtime, (info.mtime, info.name))
+        day = run_day(info.name)
+        if day is not None:
+            bisect.insort(self._days.setdefault(day, []), info.name)
+        if info.processed:
+            bisect.insort(self._processed, info.name)
+            if day not in self._day_processed:
+                bisect.insort(self._processed_days, day)
+            self._day_processed[day] = self._day_processed.get(day, 0) + 1
+
+    def update(self, run_dir: Path) -> Optional[RunInfo]:
+        """Re-index a single run folder after it was written (or removed). No rescan: use it
+        inside `writing()`."""
+        with self._lock:
+            if self._root_mtime is None:
+                self._rebuild()
+            self._remove(run_dir.name)
+            info = _scan_run(run_dir)
+            if info is None:
+                return None
+            self._add(info)
+            return info
+
+    # ---- lookups ----
+    def get(self, name: str) -> Optional[RunInfo]:
+        with self._lock:
+            self.refresh_if_changed()
+            return self._runs.get(name)
+
+    @staticmethod
+    def _prefixed(names: List[str], prefix: str) -> Tuple[int, int]:
+        if not prefix:
+            return 0, len(names)
+        return bisect.bisect_left(names, prefix), bisect.bisect_left(names, prefix + "\uffff")
+
+    def names(self, prefix: str = "", processed: bool = False) -> List[str]:
+        with self._lock:
+            self.refresh_if_changed()
+            names = self._processed if processed else self._names
+            lo, hi = self._prefixed(names, prefix)
+            return names[lo:hi]
+
+    def days(self, processed: bool = False) -> List[str]:
+        with self._lock:
+            self.refresh_if_changed()
+            return list(self._processed_days) if processed else sorted(self._days)
+
+    def runs_on(self, day: str) -> List[RunInfo]:
+        with self._lock:
+            self.refresh_if_changed()
+            return [self._runs[n] for n in self._days.get(day, ())]
+
+    @staticmethod
+    def _window(keys: List[str], offset: int, limit: Optional[int], after: Optional[str]) -> List[str]:
+        # `after` is a cursor: start just past that key (it needn't exist any more)
+        start = offset + (bisect.bisect_right(keys, after) if after else 0)
+        return keys[start:None if limit is None else start + limit]
+
+    def page(self, offset: int = 0, limit: Optional[int] = None, processed: bool = False,
+             after: Optional[str] = None) -> List[RunInfo]:
+        """Runs in name order, optionally only processed ones, from `offset` past the `after` cursor."""
+        with self._lock:
+            self.refresh_if_changed()
+            names = self._processed if processed else self._names
+            return [self._runs[n] for n in self._window(names, offset, limit, after)]
+
+    def day_page(self, offset: int = 0, limit: Optional[int] = None, after: Optional[str] = None) -> List[str]:
+        """Days with at least one processed run, ascending, paged like `page`."""
+        with self._lock:
+            self.refresh_if_changed()
+            return self._window(self._processed_days, offset, limit, after)
+
+    def last_processed(self, prefix: str = "") -> Optional[RunInfo]:
+        """Newest processed run, optionally under a name prefix (a day). Two bisects, no copy."""
+        with self._lock:
+            self.refresh_if_changed()
+            lo, hi = self._prefixed(self._processed, prefix)
+            return self._runs[self._processed[hi - 1]] if hi > lo else None
+
+    def newest_first(self) -> Iterator[RunInfo]:
+        with self._lock:
+            self.refresh_if_changed()
+            runs = [self._runs[name] for _, name in reversed(self._by_mtime)]
+        yield from runs
+
+    def __len__(self) -> int:
+        with self._lock:
+            self.refresh_if_changed()
+            return len(self._runs)
+
+_catalogs: Dict[Path, RunCatalog] = {}
+
+def catalog_for(root: Path) -> RunCatalog:
+    key = Path(root).resolve()
+    cat = _catalogs.get(key)
+    if cat is None:
+        cat = _catalogs[key] = RunCatalog(key)
+    return cat
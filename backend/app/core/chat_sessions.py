@@ -0,0 +1,107 @@
+import json, logging, time, uuid
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from app.core.metrics import estimate_tokens
+from app.core.sqlite_db import SqliteDb
+
+log = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id TEXT PRIMARY KEY,
+    runs TEXT NOT NULL,              -- JSON list of run folder names the chat is about
+    summary TEXT NOT NULL DEFAULT '',-- rolling summary of compacted turns
+    turns TEXT NOT NULL,             -- JSON list of {role, content} still sent verbatim
+    compacted INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sessions_updated ON sessions(updated_at);
+"""
+
+Summarize = Callable[[str, List[Dict[str, str]]], Awaitable[str]]
+
+@dataclass
+class ChatSession:
+    id: str
+    runs: List[str]
+    summary: str = ""
+    turns: List[Dict[str, str]] = field(default_factory=list)
+    compacted: int = 0              # messages folded into `summary` so far
+    created_at: float = 0.0
+    updated_at: float = 0.0
+
+    def history_tokens(self) -> int:
+        return estimate_tokens(self.summary) + sum(estimate_tokens(t["content"]) for t in self.turns)
+
+    def add_exchange(self, question: str, answer: str) -> None:
+        self.turns.append({"role": "user", "content": question})
+        self.turns.append({"role": "assistant", "content": answer})
+
+    def as_dict(self) -> dict:
+        return {"id": self.id, "runs": self.runs, "summary": self.summary, "messages": len(self.turns),
+                "compacted": self.compacted, "history_tokens": self.history_tokens(),
+                "created_at": self.created_at, "updated_at": self.updated_at}
+
+class SessionStore(SqliteDb):
+    """SQLite-backed chat sessions, shared by every worker process like the job queue."""
+
+    schema = _SCHEMA
+
+    def create(self, runs: List[str]) -> ChatSession:
+        now = time.time()
+        s = ChatSession(id=uuid.uuid4().hex, runs=list(runs), created_at=now, updated_at=now)
+        with self._conn() as c:
+            c.execute("INSERT INTO sessions (id, runs, turns, created_at, updated_at) VALUES (?, ?, '[]', ?, ?)",
+                      (s.id, json.dumps(s.runs), now, now))
+        return s
+
+    def get(self, session_id: str) -> Optional[ChatSession]:
+        with self._conn() as c:
+            row = c.execute("SELECT * FROM sessions WHERE id = ?", (session_id,)).fetchone()
+        if row is None:
+            return None
+        return ChatSession(id=row["id"], runs=json.loads(row["runs"]), summary=row["summary"],
+                           turns=json.loads(row["turns"]), compacted=row["compacted"],
+                           created_at=row["created_at"], updated_at=row["updated_at"])
+
+    def save(self, s: ChatSession) -> None:
+        s.updated_at = time.time()
+        with self._conn() as c:
+            c.execute("UPDATE sessions SET summary = ?, turns = ?, compacted = ?, updated_at = ? WHERE id = ?",
+                      (s.summary, json.dumps(s.turns, ensure_ascii=False), s.compacted, s.updated_at, s.id))
+
+    def delete(self, session_id: str) -> bool:
+        with self._conn() as c:
+            return c.execute("DELETE FROM sessions WHERE id = ?", (session_id,)).rowcount > 0
+
+    def purge(self, older_than: float) -> int:
+        with self._conn() as c:
+            return c.execute("DELETE FROM sessions WHERE updated_at < ?", (time.time() - older_than,)).rowcount
+
+def _clip(summary: str, old: List[Dict[str, str]], max_chars: int) -> str:
+    # used when the model can't summarize: keep the gist of each message, newest last
+    lines = [summary] if summary else []
+    lines += [f"{t['role']}: {' '.join(t['content'].split())[:240]}" for t in old]
+    text = "\n".join(lines)
+    return text if len(text) <= max_chars else "..." + text[-max_chars:]
+
+async def compact(s: ChatSession, budget_tokens: int, keep: int, summarize: Summarize) -> bool:
+    """Fold all but the last `keep` messages into the session summary once the history is over
+    budget. The kept window always starts at a user message. Returns True when it compacted."""
+    if s.history_tokens() <= budget_tokens:
+        return False
+    cut = max(0, len(s.turns) - keep)
+    while cut < len(s.turns) and s.turns[cut]["role"] != "user":
+        cut += 1
+    if cut == 0:
+        return False
+    old, s.turns = s.turns[:cut], s.turns[cut:]
+    try:
+        s.summary = (await summarize(s.summary, old)).strip() or _clip(s.summary, old, budget_tokens * 2)
+    except Exception as e:
+        log.warning("chat %s: summarizing %d messages failed (%r); clipping instead", s.id, len(old), e)
+        s.summary = _clip(s.summary, old, budget_tokens * 2)
+    s.compacted += len(old)
+    return True
@@ -1,5 +1,178 @@
 import os
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Dict, Mapping
+
+try:
+    from dotenv import dotenv_values  # optional: .env files are skipped without python-dotenv
+except ImportError:
+    dotenv_values = None
 
 ROOT = Path(__file__).resolve().parents[3]
-DATA_DIR = Path(os.getenv("DATA_DIR", ROOT / "data"))
+BACKEND_ROOT = ROOT / "backend"
+
+# Read in this order, later files overriding earlier ones; variables already set in the
+# process environment win over all of them.
+ENV_FILES = (BACKEND_ROOT / "model.env", BACKEND_ROOT / ".env", BACKEND_ROOT / "app" / "services" / ".env")
+
+def load_env_files() -> Dict[str, str]:
+    """Apply ENV_FILES to os.environ (without overriding it) and return what they contributed."""
+    merged: Dict[str, str] = {}
+    if dotenv_values is not None:
+        for p in ENV_FILES:
+            if p.is_file():
+                merged.update({k: v for k, v in dotenv_values(p).items() if v is not None})
+    added = {k: v for k, v in merged.items() if k not in os.environ}
+    os.environ.update(added)
+    return added
+
+def _flag(e: Mapping[str, str], name: str, default: str, truthy: bool) -> bool:
+    # truthy=True: on only for 1/true/yes; truthy=False: on unless 0/false/no
+    v = e.get(name, default)
+    return v in ("1", "true", "yes") if truthy else v not in ("0", "false", "no")
+
+def _governor_settings(e: Mapping[str, str], prefix: str, rate: str, concurrency: str) -> dict:
+    return {
+        "rate": float(e.get(f"{prefix}_RATE", rate)),                       # requests/second, 0 = unlimited
+        "burst": int(e.get(f"{prefix}_BURST", "15")),
+        "max_concurrency": int(e.get(f"{prefix}_MAX_CONCURRENCY", concurrency)),
+        "retries": int(e.get(f"{prefix}_RETRIES", "3")),
+        "backoff_base": float(e.get(f"{prefix}_BACKOFF_BASE", "0.5")),     # seconds
+        "backoff_max": float(e.get(f"{prefix}_BACKOFF_MAX", "20")),
+        "breaker_threshold": int(e.get(f"{prefix}_BREAKER_THRESHOLD", "5")),  # consecutive failures
+        "breaker_cooldown": float(e.get(f"{prefix}_BREAKER_COOLDOWN", "30")),
+    }
+
+@dataclass(frozen=True)
+class Settings:
+    """Every tunable, read from the environment once at import. Modules read fields from `settings`."""
+
+    data_dir: Path
+    # Run artifact encoding: "pretty" (indented JSON), "compact" (minified JSON),
+    # "packed" (compact + star matrix as raw little-endian float32 in star_matrix.f32).
+    artifact_format: str
+    bundle_cache_max_bytes: int   # memory cap for parsed run bundles / transcripts kept for the read endpoints
+
+    # ---- uploads ----
+    upload_max_bytes: int
+    upload_chunk_bytes: int
+
+    # ---- LLM providers ----
+    gemini_api_key: str           # empty: processors return mocks
+    gemini_api_base: str
+    gemini_model: str
+    friendli_api_key: str         # empty: chat endpoints answer 503
+    friendli_api_base: str
+    friendli_model: str
+
+    # ---- outbound LLM calls ----
+    gemini_fanout: str            # "concurrent" fans the prompts out at once; "sequential" is one-by-one
+    gemini_processor_mode: str    # "split" sends three prompts; "combined" asks for all sections at once
+    gemini_call_timeout: float
+    chunk_max_chars: int          # longer transcripts are split on speaker turns and processed chunk by chunk
+    chunk_concurrency: int
+    http_pool_max_connections: int
+    http_pool_keepalive: int
+
+    # ---- /api/process result cache ----
+    result_cache_enabled: bool
+    result_cache_dir: Path
+    result_cache_max_entries: int
+    result_cache_max_bytes: int
+    result_cache_max_age: float   # seconds
+
+    # ---- background jobs ----
+    jobs_db: Path
+    jobs_concurrency: int
+    jobs_poll_interval: float
+    jobs_stale_after: float       # seconds before a "running" job is retried
+
+    # ---- Friendli chat context ----
+    chat_context_chars: int       # transcript budget per turn (~4 chars/token)
+    chat_top_k: int
+
+    # ---- metrics ----
+    metrics_enabled: bool
+    timing_header_always: bool    # Server-Timing on every response, not just on "X-Timing: 1"
+
+    # ---- outbound LLM governor (per provider; env prefix GEMINI_ / FRIENDLI_) ----
+    gemini_governor: dict
+    friendli_governor: dict
+
+    # ---- batch backfills ----
+    batch_root: Path              # the HTTP endpoint only reads below this
+    batch_concurrency: int
+
+    # ---- structured run store (tasks / people / edges; run folders stay the source of truth) ----
+    storage_backend: str          # "files" answers from the run folders; "sqlite" keeps an indexed copy
+    store_db: Path
+    store_pool_size: int
+
+    # ---- Friendli chat sessions ----
+    chat_db: Path
+    chat_history_tokens: int      # older turns are summarized past this
+    chat_keep_messages: int       # most recent messages always sent verbatim
+    chat_session_ttl: float       # seconds since last use
+    chat_max_runs: int            # cap for date-range sessions
+
+    # ---- startup ----
+    preload_on_startup: bool      # scan runs, load trends and warm caches before serving
+    warm_connections: bool        # open provider connections at startup when a key is configured
+
+    @classmethod
+    def from_env(cls, e: Mapping[str, str] = os.environ) -> "Settings":
+        data_dir = Path(e.get("DATA_DIR", ROOT / "data"))
+        return cls(
+            data_dir=data_dir,
+            artifact_format=e.get("ARTIFACT_FORMAT", "compact"),
+            bundle_cache_max_bytes=int(e.get("BUNDLE_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+            upload_max_bytes=int(e.get("UPLOAD_MAX_BYTES", str(20 * 1024 * 1024))),
+            upload_chunk_bytes=int(e.get("UPLOAD_CHUNK_BYTES", str(64 * 1024))),
+            gemini_api_key=e.get("GEMINI_API_KEY", ""),
+            gemini_api_base=e.get("GEMINI_API_BASE", "https://generativelanguage.googleapis.com/v1beta"),
+            gemini_model=e.get("GEMINI_MODEL", "gemini-1.5-flash"),
+            friendli_api_key=e.get("FRIENDLI_API_KEY", ""),
+            friendli_api_base=e.get("FRIENDLI_API_BASE", "https://api.friendli.ai/serverless/v1"),
+            friendli_model=e.get("FRIENDLI_MODEL", "meta-llama-3.1-8b-instruct"),
+            gemini_fanout=e.get("GEMINI_FANOUT", "concurrent"),
+            gemini_processor_mode=e.get("GEMINI_PROCESSOR_MODE", "split"),
+            gemini_call_timeout=float(e.get("GEMINI_CALL_TIMEOUT", "60")),
+            chunk_max_chars=int(e.get("CHUNK_MAX_CHARS", "12000")),
+            chunk_concurrency=int(e.get("CHUNK_CONCURRENCY", "4")),
+            http_pool_max_connections=int(e.get("HTTP_POOL_MAX_CONNECTIONS", "20")),
+            http_pool_keepalive=int(e.get("HTTP_POOL_KEEPALIVE", "10")),
+            result_cache_enabled=_flag(e, "RESULT_CACHE_ENABLED", "1", truthy=False),
+            result_cache_dir=Path(e.get("RESULT_CACHE_DIR", BACKEND_ROOT / ".cache" / "process")),
+            result_cache_max_entries=int(e.get("RESULT_CACHE_MAX_ENTRIES", "500")),
+            result_cache_max_bytes=int(e.get("RESULT_CACHE_MAX_BYTES", str(200 * 1024 * 1024))),
+            result_cache_max_age=float(e.get("RESULT_CACHE_MAX_AGE", str(7 * 24 * 3600))),
+            jobs_db=Path(e.get("JOBS_DB", BACKEND_ROOT / "var" / "jobs.sqlite3")),
+            jobs_concurrency=int(e.get("JOBS_CONCURRENCY", "2")),
+            jobs_poll_interval=float(e.get("JOBS_POLL_INTERVAL", "2")),
+            jobs_stale_after=float(e.get("JOBS_STALE_AFTER", "900")),
+            chat_context_chars=int(e.get("CHAT_CONTEXT_CHARS", "6000")),
+            chat_top_k=int(e.get("CHAT_TOP_K", "8")),
+            metrics_enabled=_flag(e, "METRICS_ENABLED", "1", truthy=False),
+            timing_header_always=_flag(e, "TIMING_HEADER_ALWAYS", "0", truthy=True),
+            gemini_governor=_governor_settings(e, "GEMINI", "10", "12"),
+            friendli_governor=_governor_settings(e, "FRIENDLI", "10", "8"),
+            batch_root=Path(e.get("BATCH_ROOT", ROOT / "backfill")),
+            batch_concurrency=int(e.get("BATCH_CONCURRENCY", "2")),
+            storage_backend=e.get("STORAGE_BACKEND", "files"),
+            store_db=Path(e.get("STORE_DB", data_dir / ".store.sqlite3")),
+            store_pool_size=int(e.get("STORE_POOL_SIZE", "4")),
+            chat_db=Path(e.get("CHAT_DB", BACKEND_ROOT / "var" / "chat.sqlite3")),
+            chat_history_tokens=int(e.get("CHAT_HISTORY_TOKENS", "1500")),
+            chat_keep_messages=int(e.get("CHAT_KEEP_MESSAGES", "6")),
+            chat_session_ttl=float(e.get("CHAT_SESSION_TTL", str(7 * 24 * 3600))),
+            chat_max_runs=int(e.get("CHAT_MAX_RUNS", "12")),
+            preload_on_startup=_flag(e, "PRELOAD_ON_STARTUP", "1", truthy=False),
+            warm_connections=_flag(e, "WARM_CONNECTIONS", "1", truthy=False),
+        )
+
+ENV_FROM_FILES = sorted(load_env_files())   # names only; the values may be secrets
+settings = Settings.from_env()
+
+# the one upper-case alias kept: it predates Settings, and storage re-exports it to the run
+# modules and outside scripts. Everything else reads `settings`.
+DATA_DIR = settings.data_dir
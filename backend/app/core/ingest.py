@@ -0,0 +1,73 @@
+import codecs, os, shutil, uuid
+from pathlib import Path
+from typing import Optional
+
+from fastapi import HTTPException, UploadFile
+
+from app.core.config import settings
+from app.core.storage import DATA_DIR
+
+# Same filesystem as the runs, so a spooled transcript can be renamed into its run folder.
+INCOMING_DIR = DATA_DIR / ".incoming"
+
+def _new_spool() -> Path:
+    INCOMING_DIR.mkdir(parents=True, exist_ok=True)
+    return INCOMING_DIR / f"{uuid.uuid4().hex}.txt"
+
+def _too_large() -> HTTPException:
+    return HTTPException(status_code=413, detail=f"Transcript exceeds {settings.upload_max_bytes} bytes.")
+
+async def spool_upload(file: UploadFile) -> Path:
+    """Decode the upload chunk by chunk into a spool file, stopping as soon as the size cap is hit."""
+    if file.size is not None and file.size > settings.upload_max_bytes:
+        raise _too_large()
+    dest = _new_spool()
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+    seen = 0
+    try:
+        with open(dest, "w", encoding="utf-8", newline="") as out:
+            while True:
+                chunk = await file.read(settings.upload_chunk_bytes)
+                if not chunk:
+                    break
+                seen += len(chunk)
+                if seen > settings.upload_max_bytes:
+                    raise _too_large()
+                out.write(decoder.decode(chunk))
+            out.write(decoder.decode(b"", final=True))
+    except BaseException:
+        dest.unlink(missing_ok=True)
+        raise
+    return dest
+
+def spool_text(text: str) -> Path:
+    data = (text or "").encode("utf-8")
+    if len(data) > settings.upload_max_bytes:
+        raise _too_large()
+    dest = _new_spool()
+    with open(dest, "wb") as out:
+        out.write(data)
+    return dest
+
+def spool_copy(path: Path) -> Path:
+    """Copy a transcript already on disk (e.g. a backfill source) so the run can adopt the copy."""
+    if path.stat().st_size > settings.upload_max_bytes:
+        raise _too_large()
+    dest = _new_spool()
+    shutil.copyfile(path, dest)
+    return dest
+
+async def spool_request(file: Optional[UploadFile], transcript: Optional[str]) -> Path:
+    if not file and not transcript:
+        raise HTTPException(status_code=400, detail="Provide a .txt file or 'transcript' text.")
+    if file:
+        if not file.filename.lower().endswith(".txt"):
+            raise HTTPException(status_code=400, detail="Only .txt files are accepted.")
+        return await spool_upload(file)
+    return spool_text(transcript)
+
+def discard_spool(path: Path) -> None:
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
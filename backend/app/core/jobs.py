@@ -0,0 +1,131 @@
+import asyncio, json, logging, time, uuid
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+from app.core.sqlite_db import SqliteDb
+
+log = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,            -- queued | running | done | failed
+    source TEXT NOT NULL,            -- path of the spooled transcript
+    result TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs(status, created_at);
+"""
+
+class JobQueue(SqliteDb):
+    """SQLite-backed FIFO of /process jobs; survives restarts and is safe across worker processes."""
+
+    schema = _SCHEMA
+
+    def submit(self, source: str) -> str:
+        job_id = uuid.uuid4().hex
+        with self._conn() as c:
+            c.execute("INSERT INTO jobs (id, status, source, created_at) VALUES (?, 'queued', ?, ?)",
+                      (job_id, source, time.time()))
+        return job_id
+
+    def claim(self) -> Optional[Tuple[str, str]]:
+        with self._conn() as c:
+            c.execute("BEGIN IMMEDIATE")
+            row = c.execute("SELECT id, source FROM jobs WHERE status = 'queued' "
+                            "ORDER BY created_at LIMIT 1").fetchone()
+            if row is None:
+                c.execute("COMMIT")
+                return None
+            c.execute("UPDATE jobs SET status = 'running', started_at = ?, attempts = attempts + 1 WHERE id = ?",
+                      (time.time(), row["id"]))
+            c.execute("COMMIT")
+            return row["id"], row["source"]
+
+    def finish(self, job_id: str, result: dict) -> None:
+        with self._conn() as c:
+            c.execute("UPDATE jobs SET status = 'done', result = ?, finished_at = ? WHERE id = ?",
+                      (json.dumps(result, ensure_ascii=False), time.time(), job_id))
+
+    def fail(self, job_id: str, error: str) -> None:
+        with self._conn() as c:
+            c.execute("UPDATE jobs SET status = 'failed', error = ?, finished_at = ? WHERE id = ?",
+                      (error[:2000], time.time(), job_id))
+
+    def release(self, job_id: str) -> None:
+        with self._conn() as c:
+            c.execute("UPDATE jobs SET status = 'queued', started_at = NULL WHERE id = ? AND status = 'running'",
+                      (job_id,))
+
+    def requeue_stale(self, older_than: float) -> int:
+        # jobs left "running" by a crashed or restarted worker
+        with self._conn() as c:
+            cur = c.execute("UPDATE jobs SET status = 'queued', started_at = NULL "
+                            "WHERE status = 'running' AND started_at < ?", (time.time() - older_than,))
+            return cur.rowcount
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self._conn() as c:
+            row = c.execute("SELECT id, status, result, error, attempts, created_at, started_at, finished_at "
+                            "FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        js = dict(row)
+        js["result"] = json.loads(js["result"]) if js["result"] else None
+        return js
+
+    def counts(self) -> dict:
+        with self._conn() as c:
+            rows = c.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+        return {r["status"]: r["n"] for r in rows}
+
+class JobWorkers:
+    """A fixed pool of asyncio workers draining a JobQueue through `handler`."""
+
+    def __init__(self, queue: JobQueue, handler: Callable[[str], Awaitable[dict]],
+                 concurrency: int, poll_interval: float, stale_after: float):
+        self.queue = queue
+        self.handler = handler
+        self.concurrency = max(1, concurrency)
+        self.poll_interval = poll_interval
+        self.stale_after = stale_after
+        self._tasks: List[asyncio.Task] = []
+        self._wake = asyncio.Event()
+
+    def notify(self) -> None:
+        self._wake.set()
+
+    async def start(self) -> None:
+        n = self.queue.requeue_stale(self.stale_after)
+        if n:
+            log.info("jobs: requeued %d stale job(s)", n)
+        self._tasks = [asyncio.create_task(self._run()) for _ in range(self.concurrency)]
+
+    async def stop(self) -> None:
+        for t in self._tasks:
+            t.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _run(self) -> None:
+        while True:
+            job = self.queue.claim()
+            if job is None:
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    self.queue.requeue_stale(self.stale_after)
+                continue
+            job_id, source = job
+            try:
+                self.queue.finish(job_id, await self.handler(source))
+            except asyncio.CancelledError:
+                self.queue.release(job_id)  # shutting down: hand it back for the next start
+                raise
+            except Exception as e:
+                log.exception("jobs: %s failed", job_id)
+                self.queue.fail(job_id, repr(e))
@@ -0,0 +1,44 @@
+# Advisory file locks shared by every worker process writing under DATA_DIR.
+import asyncio, os
+from contextlib import asynccontextmanager, contextmanager
+from pathlib import Path
+from typing import AsyncIterator, Iterator
+
+try:
+    import fcntl  # POSIX only; without it locks are process-local no-ops
+except ImportError:
+    fcntl = None
+
+def _open(path: Path) -> int:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    return os.open(path, os.O_CREAT | os.O_RDWR, 0o644)
+
+@contextmanager
+def file_lock(path: Path) -> Iterator[None]:
+    """Exclusive lock for short critical sections (blocks the calling thread)."""
+    fd = _open(path)
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        os.close(fd)   # closing the descriptor releases the lock
+
+@asynccontextmanager
+async def async_file_lock(path: Path) -> AsyncIterator[None]:
+    """Exclusive lock for long sections inside the event loop. Polls without blocking, so other
+    coroutines (including ones waiting on the same lock) keep running, and cancellation is clean."""
+    fd = _open(path)
+    try:
+        if fcntl is not None:
+            delay = 0.005
+            while True:
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    break
+                except BlockingIOError:
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, 0.2)
+        yield
+    finally:
+        os.close(fd)
@@ -0,0 +1,152 @@
+# Minimal in-process Prometheus registry: counters, histograms, stage timers.
+import math, threading, time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+_lock = threading.Lock()
+_registry: List["_Metric"] = []
+
+def _key(labels: Dict[str, str]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+def _fmt_labels(key: LabelKey, extra: Sequence[Tuple[str, str]] = ()) -> str:
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    body = ",".join('%s="%s"' % (k, v.replace("\\", "\\\\").replace('"', '\\"')) for k, v in pairs)
+    return "{" + body + "}"
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, doc: str):
+        self.name = name
+        self.doc = doc
+        with _lock:
+            _registry.append(self)
+
+    def _lines(self) -> List[str]:
+        raise NotImplementedError
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, doc: str):
+        super().__init__(name, doc)
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        k = _key(labels)
+        with _lock:
+            self._values[k] = self._values.get(k, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(_key(labels), 0.0)
+
+    def _lines(self) -> List[str]:
+        return [f"{self.name}{_fmt_labels(k)} {v:g}" for k, v in sorted(self._values.items())]
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels: str) -> None:
+        k = _key(labels)
+        with _lock:
+            self._values[k] = float(value)
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, doc: str, buckets: Sequence[float]):
+        super().__init__(name, doc)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[LabelKey, List[float]] = {}   # bucket counts..., +Inf count, sum
+
+    def observe(self, value: float, **labels: str) -> None:
+        k = _key(labels)
+        with _lock:
+            s = self._series.get(k)
+            if s is None:
+                s = self._series[k] = [0.0] * (len(self.buckets) + 2)
+            for i, b in enumerate(self.buckets):
+                if value <= b:
+                    s[i] += 1
+            s[-2] += 1
+            s[-1] += value
+
+    def _lines(self) -> List[str]:
+        out = []
+        for k, s in sorted(self._series.items()):
+            for i, b in enumerate(self.buckets):
+                out.append(f"{self.name}_bucket{_fmt_labels(k, [('le', f'{b:g}')])} {s[i]:g}")
+            out.append(f"{self.name}_bucket{_fmt_labels(k, [('le', '+Inf')])} {s[-2]:g}")
+            out.append(f"{self.name}_count{_fmt_labels(k)} {s[-2]:g}")
+            out.append(f"{self.name}_sum{_fmt_labels(k)} {s[-1]:g}")
+        return out
+
+def render() -> str:
+    with _lock:
+        metrics = list(_registry)
+    lines = []
+    for m in metrics:
+        lines.append(f"# HELP {m.name} {m.doc}")
+        lines.append(f"# TYPE {m.name} {m.kind}")
+        with _lock:
+            lines.extend(m._lines())
+    return "\n".join(lines) + "\n"
+
+# ---- the app's metrics ----
+_SECONDS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+_BYTES = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+STAGE_SECONDS = Histogram("hrcopilot_stage_seconds", "Time spent per pipeline stage.", _SECONDS)
+PAYLOAD_BYTES = Histogram("hrcopilot_llm_payload_bytes", "Size of LLM prompts and responses.", _BYTES)
+LLM_TOKENS = Counter("hrcopilot_llm_tokens_estimated_total", "Estimated LLM tokens (chars/4).")
+LLM_RETRIES = Counter("hrcopilot_llm_retries_total", "Outbound LLM call retries.")
+LLM_CONCURRENCY_LIMIT = Gauge("hrcopilot_llm_concurrency_limit", "Current adaptive concurrency limit per provider.")
+LLM_CIRCUIT_OPEN = Gauge("hrcopilot_llm_circuit_open", "1 while a provider's circuit breaker is open.")
+JSON_REPAIRS = Counter("hrcopilot_json_repairs_total", "Repairs applied while extracting JSON from model replies.")
+MOCK_FALLBACKS = Counter("hrcopilot_mock_fallbacks_total", "Processor sections answered with mock data.")
+CHAT_TTFT_SECONDS = Histogram("hrcopilot_chat_ttft_seconds", "Time to the first streamed Friendli chat token.", _SECONDS)
+STARTUP_SECONDS = Gauge("hrcopilot_startup_seconds", "Time spent in each startup step.")
+FIRST_REQUEST_SECONDS = Gauge("hrcopilot_first_request_seconds", "Latency of the first request served after startup.")
+HTTP_SECONDS = Histogram("hrcopilot_http_request_seconds", "HTTP request latency by route.", _SECONDS)
+
+def estimate_tokens(text: Optional[str]) -> int:
+    return math.ceil(len(text or "") / 4)
+
+def record_llm_io(provider: str, prompt: str, response: str) -> None:
+    PAYLOAD_BYTES.observe(len(prompt.encode("utf-8")), provider=provider, kind="prompt")
+    PAYLOAD_BYTES.observe(len((response or "").encode("utf-8")), provider=provider, kind="response")
+    LLM_TOKENS.inc(estimate_tokens(prompt), provider=provider, kind="prompt")
+    LLM_TOKENS.inc(estimate_tokens(response), provider=provider, kind="response")
+
+# ---- per-request stage timings (Server-Timing header) ----
+_request_timings: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("request_timings", default=None)
+
+def start_request_timing() -> List[Tuple[str, float]]:
+    timings: List[Tuple[str, float]] = []
+    _request_timings.set(timings)
+    return timings
+
+def server_timing_header(timings: List[Tuple[str, float]]) -> str:
+    totals: Dict[str, Tuple[float, int]] = {}
+    for name, ms in timings:
+        t, n = totals.get(name, (0.0, 0))
+        totals[name] = (t + ms, n + 1)
+    return ", ".join(f'{name};dur={t:.1f};desc="x{n}"' for name, (t, n) in totals.items())
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        dt = time.perf_counter() - t0
+        STAGE_SECONDS.observe(dt, stage=name)
+        timings = _request_timings.get()
+        if timings is not None:
+            timings.append((name, dt * 1000))
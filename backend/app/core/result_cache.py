@@ -0,0 +1,183 @@
+import asyncio, hashlib, json, os, time
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+from app.core.locks import file_lock
+from app.models.schemas import StarConnect, SummaryBlock, TaskList
+
+Bundle = Tuple[StarConnect, SummaryBlock, TaskList]   # a section may be None for partial results
+
+def _dump(model) -> Optional[dict]:
+    return model.model_dump() if model is not None else None
+
+def _load(cls, raw: Optional[dict]):
+    return cls(**raw) if raw is not None else None
+
+def normalize_transcript(text: str) -> str:
+    # whitespace/line-ending differences shouldn't defeat the cache
+    lines = (" ".join(line.split()) for line in (text or "").splitlines())
+    return "\n".join(line for line in lines if line)
+
+def hash_transcript_lines(lines: Iterable[str], fingerprint: str) -> str:
+    """sha256 of normalize_transcript(text) + fingerprint, computed line by line."""
+    h = hashlib.sha256()
+    first = True
+    for line in lines:
+        norm = " ".join(line.split())
+        if not norm:
+            continue
+        if not first:
+            h.update(b"\n")
+        h.update(norm.encode("utf-8"))
+        first = False
+    h.update(b"\0" + fingerprint.encode("utf-8"))
+    return h.hexdigest()
+
+class _LeaderCancelled(Exception):
+    """Set on a shared computation whose leader was cancelled; the waiters retry."""
+
+class ResultCache:
+    """Disk-backed processor results keyed by transcript hash + processor fingerprint.
+    Entries are evicted oldest-first past max_entries/max_bytes, and dropped after max_age seconds.
+    Concurrent misses for the same key share one computation. The directory is shared by every
+    worker process, so eviction works from a fresh listing taken under a file lock."""
+
+    def __init__(self, root: Path, max_entries: int, max_bytes: int, max_age: float):
+        self.root = Path(root)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.hits = self.misses = self.coalesced = self.evictions = 0
+        self._index: Dict[str, Tuple[float, int]] = {}   # key -> (last used, size), as of the last scan
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    def key_for(self, text: str, fingerprint: str) -> str:
+        return hash_transcript_lines((text or "").splitlines(), fingerprint)
+
+    def key_for_file(self, path: Path, fingerprint: str) -> str:
+        with open(path, encoding="utf-8", errors="ignore") as f:
+            return hash_transcript_lines(f, fingerprint)
+
+    def _path(self, key: str) -> Path:
+        return self.root / f"{key}.json"
+
+    def _scan(self) -> None:
+        # other workers add, touch and evict entries too; the files are the truth
+        index: Dict[str, Tuple[float, int]] = {}
+        if self.root.exists():
+            for p in self.root.glob("*.json"):
+                try:
+                    st = p.stat()
+                except OSError:
+                    continue
+                index[p.stem] = (st.st_mtime, st.st_size)
+        self._index = index
+
+    def _drop(self, key: str) -> None:
+        self._index.pop(key, None)
+        try:
+            self._path(key).unlink()
+        except OSError:
+            pass
+
+    def get(self, key: str):
+        p = self._path(key)
+        try:
+            raw = p.read_bytes()
+            js = json.loads(raw)
+        except FileNotFoundError:
+            self._index.pop(key, None)
+            return None
+        except Exception:
+            self._drop(key)
+            return None
+        if time.time() - js.get("created", 0) > self.max_age:
+            self._drop(key)
+            self.evictions += 1
+            return None
+        now = time.time()
+        self._index[key] = (now, len(raw))
+        try:
+            os.utime(p, (now, now))   # eviction is least-recently-used by mtime
+        except OSError:
+            pass
+        return _load(StarConnect, js["star_connect"]), _load(SummaryBlock, js["summary"]), _load(TaskList, js["tasks"])
+
+    def put(self, key: str, bundle: Bundle) -> None:
+        star, summary, tasks = bundle
+        body = json.dumps({
+            "created": time.time(),
+            "star_connect": _dump(star),
+            "summary": _dump(summary),
+            "tasks": _dump(tasks),
+        }, ensure_ascii=False)
+        self.root.mkdir(parents=True, exist_ok=True)
+        p = self._path(key)
+        tmp = p.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(body, encoding="utf-8")
+        os.replace(tmp, p)
+        with file_lock(self.root / ".lock"):
+            self._scan()
+            self._evict()
+
+    def _evict(self) -> None:
+        cutoff = time.time() - self.max_age
+        for key, (used, _) in list(self._index.items()):
+            if used < cutoff:
+                self._drop(key)
+                self.evictions += 1
+        total = sum(size for _, size in self._index.values())
+        for key, (_, size) in sorted(self._index.items(), key=lambda kv: kv[1][0]):
+            if len(self._index) <= self.max_entries and total <= self.max_bytes:
+                break
+            self._drop(key)
+            total -= size
+            self.evictions += 1
+
+    async def get_or_compute(self, text: str, fingerprint: str,
+                             compute: Callable[[str], Awaitable[Bundle]]) -> Bundle:
+        return await self.get_or_compute_key(self.key_for(text, fingerprint), lambda: compute(text))
+
+    async def get_or_compute_key(self, key: str, compute: Callable[[], Awaitable[Bundle]]) -> Bundle:
+        while True:
+            cached = self.get(key)
+            if cached is not None:
+                self.hits += 1
+                return cached
+            pending = self._inflight.get(key)
+            if pending is None:
+                break
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(pending)
+            except _LeaderCancelled:
+                continue   # the request computing it went away; the first waiter back takes over
+        self.misses += 1
+        fut = asyncio.get_running_loop().create_future()
+        self._inflight[key] = fut
+        try:
+            bundle = await compute()
+            self.put(key, bundle)
+            fut.set_result(bundle)
+            return bundle
+        except asyncio.CancelledError:
+            fut.set_exception(_LeaderCancelled())
+            fut.exception()
+            raise
+        except BaseException as e:
+            fut.set_exception(e)
+            fut.exception()  # mark retrieved when nobody else was waiting
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    def stats(self) -> dict:
+        self._scan()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "entries": len(self._index),
+            "bytes": sum(size for _, size in self._index.values()),
+        }
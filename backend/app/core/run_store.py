@@ -0,0 +1,422 @@
+# app/core/run_store.py
+# Structured run results (bundle, tasks, people, edges) behind one interface, so reads and
+# cross-run questions don't have to walk and parse every run folder. Run folders stay the source
+# of truth for transcripts, retrieval indexes and segments; backends only hold what the
+# pipeline produced from them.
+#   files  - answers from the run folders (no extra state)
+#   sqlite - indexed copy in STORE_DB; fill it from existing folders with
+#            cd backend && python -m app.core.run_store migrate
+import argparse, json, logging, queue, sqlite3, threading, time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.core.catalog import run_day
+from app.core.sqlite_db import SqliteDb, connect
+from app.core.config import settings, DATA_DIR
+from app.core.storage import read_json, read_star, list_run_dirs, get_run_dir, META
+from app.core.trends import task_key
+
+log = logging.getLogger(__name__)
+
+Bundle = Tuple[Dict[str, Any], Dict[str, Any], Dict[str, Any]]   # star, summary, tasks
+
+def _norm(s: Optional[str]) -> str:
+    return " ".join((s or "").split()).lower()
+
+def _in_range(day: str, start: Optional[str], end: Optional[str]) -> bool:
+    return (start is None or day >= start) and (end is None or day <= end)
+
+class RunStore:
+    """Interface both backends implement. Task queries return one row per distinct task
+    (owner + description) seen in the date range; a task is "open" while it is still listed in
+    its owner's newest run in that range, the same carry-over notion /api/trends uses."""
+
+    backend = "base"
+
+    def put_run(self, run_id: str, star: Dict[str, Any], summary: Dict[str, Any], tasks: Dict[str, Any],
+                meta: Optional[Dict[str, Any]] = None) -> None:
+        raise NotImplementedError
+
+    def get_bundle(self, run_id: str) -> Optional[Bundle]:
+        raise NotImplementedError
+
+    def query_tasks(self, owner: Optional[str] = None, start: Optional[str] = None, end: Optional[str] = None,
+                    open_only: bool = False, limit: int = 200) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def query_pairs(self, person: Optional[str] = None, start: Optional[str] = None, end: Optional[str] = None,
+                    limit: int = 50) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.backend}
+
+    def close(self) -> None:
+        pass
+
+# ---------- files ----------
+class FileRunStore(RunStore):
+    """Reads the run folders the pipeline already wrote; put_run has nothing left to do."""
+
+    backend = "files"
+
+    def put_run(self, run_id, star, summary, tasks, meta=None) -> None:
+        pass
+
+    def get_bundle(self, run_id: str) -> Optional[Bundle]:
+        d = get_run_dir(run_id)
+        if d is None:
+            return None
+        return read_star(d), read_json(d / "summary.json") or {"bullets": []}, read_json(d / "tasks.json") or {"items": []}
+
+    def _runs(self, start: Optional[str], end: Optional[str]) -> Iterator[Tuple[str, str, Path]]:
+        for d in list_run_dirs():
+            day = run_day(d.name)
+            if _in_range(day, start, end):
+                yield d.name, day, d
+
+    def query_tasks(self, owner=None, start=None, end=None, open_only=False, limit=200):
+        want = _norm(owner) if owner else None
+        groups: Dict[str, Dict[str, Any]] = {}
+        newest: Dict[str, str] = {}   # owner -> newest run id with tasks for them
+        for run_id, day, d in self._runs(start, end):
+            for t in read_json(d / "tasks.json").get("items") or []:
+                o = _norm(t.get("owner"))
+                if want is not None and o != want:
+                    continue
+                k = task_key(t.get("owner"), t.get("description") or "")
+                newest[o] = max(newest.get(o, ""), run_id)
+                g = groups.get(k)
+                if g is None:
+                    g = groups[k] = {"task_key": k, "first_seen": day, "runs": set()}
+                if run_id in g["runs"]:
+                    continue
+                g["runs"].add(run_id)
+                if run_id >= g.get("last_run", ""):
+                    g.update(_task_row(t), last_run=run_id, last_seen=day, owner_norm=o)
+        out = []
+        for g in groups.values():
+            g["runs"] = len(g["runs"])
+            g["open"] = g["last_run"] == newest[g.pop("owner_norm")]
+            if g["open"] or not open_only:
+                out.append(g)
+        out.sort(key=lambda g: g["description"])
+        out.sort(key=lambda g: g["last_run"], reverse=True)
+        return out[:limit]
+
+    def query_pairs(self, person=None, start=None, end=None, limit=50):
+        want = _norm(person) if person else None
+        acc: Dict[Tuple[str, str], List[float]] = {}
+        labels: Dict[str, str] = {}
+        for run_id, day, d in self._runs(start, end):
+            star = read_star(d)
+            names = {n.get("id"): n.get("label") or n.get("id") for n in star.get("nodes") or []}
+            labels.update(names)
+            mine = {i for i, lab in names.items() if want in (_norm(i), _norm(lab))} if want else None
+            seen = set()
+            for e in star.get("edges") or []:
+                a, b = sorted((e.get("source"), e.get("target")))
+                if mine is not None and a not in mine and b not in mine:
+                    continue
+                s = acc.setdefault((a, b), [0.0, 0])
+                s[0] += float(e.get("weight") or 0.0)
+                if (a, b) not in seen:
+                    seen.add((a, b))
+                    s[1] += 1
+        rows = [_pair_row(a, b, w, n, labels) for (a, b), (w, n) in acc.items()]
+        rows.sort(key=lambda r: -r["weight"])
+        return rows[:limit]
+
+    def stats(self):
+        return {"backend": self.backend, "runs": len(list_run_dirs())}
+
+def _task_row(t: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "owner": t.get("owner"),
+        "description": t.get("description") or "",
+        "due": t.get("due"),
+        "priority": t.get("priority"),
+        "assignees": list(t.get("assignees") or []),
+    }
+
+def _pair_row(a: str, b: str, weight: float, runs: int, labels: Dict[str, str]) -> Dict[str, Any]:
+    return {"source": a, "target": b, "source_label": labels.get(a, a), "target_label": labels.get(b, b),
+            "weight": round(weight, 3), "runs": runs}
+
+# ---------- sqlite ----------
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id TEXT PRIMARY KEY,             -- run folder name
+    day TEXT NOT NULL,               -- YYYY-MM-DD
+    created_at TEXT,
+    source TEXT,
+    star TEXT NOT NULL,
+    summary TEXT NOT NULL,
+    tasks TEXT NOT NULL,
+    stored_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_day ON runs(day);
+CREATE TABLE IF NOT EXISTS tasks (
+    run_id TEXT NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    day TEXT NOT NULL,
+    task_key TEXT NOT NULL,          -- owner + normalized description, see app.core.trends.task_key
+    owner TEXT,
+    owner_norm TEXT NOT NULL,
+    description TEXT NOT NULL,
+    due TEXT,
+    priority TEXT,
+    assignees TEXT NOT NULL,         -- JSON list
+    PRIMARY KEY (run_id, task_key)
+);
+CREATE INDEX IF NOT EXISTS tasks_owner_day ON tasks(owner_norm, day);
+CREATE INDEX IF NOT EXISTS tasks_day ON tasks(day);
+CREATE INDEX IF NOT EXISTS tasks_key ON tasks(task_key, run_id);
+CREATE TABLE IF NOT EXISTS nodes (
+    run_id TEXT NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    day TEXT NOT NULL,
+    node_id TEXT NOT NULL,
+    label TEXT NOT NULL,
+    label_norm TEXT NOT NULL,
+    size REAL,
+    grp TEXT,
+    PRIMARY KEY (run_id, node_id)
+);
+CREATE INDEX IF NOT EXISTS nodes_label ON nodes(label_norm, day);
+CREATE INDEX IF NOT EXISTS nodes_id ON nodes(node_id, day);
+CREATE TABLE IF NOT EXISTS edges (
+    run_id TEXT NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    day TEXT NOT NULL,
+    source TEXT NOT NULL,            -- stored as the sorted (source, target) pair
+    target TEXT NOT NULL,
+    weight REAL NOT NULL,
+    tasks TEXT NOT NULL              -- JSON list of EdgeTask
+);
+CREATE INDEX IF NOT EXISTS edges_source_day ON edges(source, day);
+CREATE INDEX IF NOT EXISTS edges_target_day ON edges(target, day);
+CREATE INDEX IF NOT EXISTS edges_day ON edges(day);
+"""
+
+class _ConnectionPool:
+    """A few long-lived connections shared by the threads and coroutines of one process.
+    Each worker process has its own pool; WAL lets their readers run alongside one writer."""
+
+    def __init__(self, path: Path, size: int):
+        self.path = Path(path)
+        self.size = max(1, size)
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _open(self) -> sqlite3.Connection:
+        conn = connect(self.path, check_same_thread=False)
+        conn.execute("PRAGMA synchronous=NORMAL")   # durable at checkpoints; the run folders hold the originals
+        conn.execute("PRAGMA foreign_keys=ON")
+        return conn
+
+    def _take(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                try:
+                    return self._open()
+                except Exception:
+                    self._created -= 1
+                    raise
+        return self._idle.get(timeout=30)
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        conn = self._take()
+        try:
+            yield conn
+        finally:
+            self._idle.put(conn)
+
+    def close(self) -> None:
+        with self._lock:
+            while True:
+                try:
+                    self._idle.get_nowait().close()
+                except queue.Empty:
+                    break
+            self._created = 0
+
+class SqliteRunStore(SqliteDb, RunStore):
+    backend = "sqlite"
+    schema = _SCHEMA
+
+    def __init__(self, db_path: Path, pool_size: int = 4):
+        super().__init__(db_path)
+        self._pool = _ConnectionPool(self.db_path, pool_size)
+
+    def _connection(self):
+        return self._pool.connection()
+
+    @contextmanager
+    def _tx(self) -> Iterator[sqlite3.Connection]:
+        with self._conn() as c:
+            c.execute("BEGIN IMMEDIATE")
+            try:
+                yield c
+            except BaseException:
+                c.execute("ROLLBACK")
+                raise
+            c.execute("COMMIT")
+
+    def put_run(self, run_id, star, summary, tasks, meta=None) -> None:
+        """Replace everything stored for `run_id` in one transaction."""
+        day = run_day(run_id)
+        if day is None:
+            raise ValueError(f"not a run folder name: {run_id}")
+        meta = meta or {}
+        task_rows, seen = [], set()
+        for t in tasks.get("items") or []:
+            k = task_key(t.get("owner"), t.get("description") or "")
+            if k in seen:
+                continue
+            seen.add(k)
+            r = _task_row(t)
+            task_rows.append((run_id, day, k, r["owner"], _norm(r["owner"]), r["description"], r["due"],
+                              r["priority"], json.dumps(r["assignees"], ensure_ascii=False)))
+        node_rows = {}
+        for n in star.get("nodes") or []:
+            label = n.get("label") or n.get("id")
+            node_rows[n.get("id")] = (run_id, day, n.get("id"), label, _norm(label), n.get("size"), n.get("group"))
+        edge_rows = []
+        for e in star.get("edges") or []:
+            a, b = sorted((e.get("source"), e.get("target")))
+            edge_rows.append((run_id, day, a, b, float(e.get("weight") or 0.0),
+                              json.dumps(e.get("tasks") or [], ensure_ascii=False)))
+        with self._tx() as c:
+            c.execute("DELETE FROM runs WHERE id = ?", (run_id,))
+            c.execute("INSERT INTO runs (id, day, created_at, source, star, summary, tasks, stored_at) "
+                      "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                      (run_id, day, meta.get("created_at"), meta.get("source"),
+                       json.dumps(star, ensure_ascii=False), json.dumps(summary, ensure_ascii=False),
+                       json.dumps(tasks, ensure_ascii=False), time.time()))
+            c.executemany("INSERT INTO tasks VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", task_rows)
+            c.executemany("INSERT INTO nodes VALUES (?, ?, ?, ?, ?, ?, ?)", list(node_rows.values()))
+            c.executemany("INSERT INTO edges VALUES (?, ?, ?, ?, ?, ?)", edge_rows)
+
+    def get_bundle(self, run_id: str) -> Optional[Bundle]:
+        with self._conn() as c:
+            row = c.execute("SELECT star, summary, tasks FROM runs WHERE id = ?", (run_id,)).fetchone()
+        if row is None:
+            return None
+        return json.loads(row["star"]), json.loads(row["summary"]), json.loads(row["tasks"])
+
+    def has_run(self, run_id: str) -> bool:
+        with self._conn() as c:
+            return c.execute("SELECT 1 FROM runs WHERE id = ?", (run_id,)).fetchone() is not None
+
+    def query_tasks(self, owner=None, start=None, end=None, open_only=False, limit=200):
+        where, args = ["day >= ?", "day <= ?"], [start or "", end or "9999-99-99"]
+        if owner:
+            where.append("owner_norm = ?")
+            args.append(_norm(owner))
+        sql = f"""
+            WITH t AS (SELECT * FROM tasks WHERE {' AND '.join(where)}),
+            newest AS (SELECT owner_norm, MAX(run_id) AS run_id FROM t GROUP BY owner_norm),
+            g AS (SELECT task_key, owner_norm, MIN(day) AS first_seen, MAX(day) AS last_seen,
+                         COUNT(*) AS runs, MAX(run_id) AS last_run
+                  FROM t GROUP BY task_key)
+            SELECT g.task_key, g.first_seen, g.last_seen, g.runs, g.last_run,
+                   x.owner, x.description, x.due, x.priority, x.assignees,
+                   g.last_run = n.run_id AS open
+            FROM g
+            JOIN newest n ON n.owner_norm = g.owner_norm
+            JOIN tasks x ON x.run_id = g.last_run AND x.task_key = g.task_key
+            {"WHERE g.last_run = n.run_id" if open_only else ""}
+            ORDER BY g.last_run DESC, x.description
+            LIMIT ?"""
+        with self._conn() as c:
+            rows = c.execute(sql, (*args, limit)).fetchall()
+        out = []
+        for r in rows:
+            js = dict(r)
+            js["assignees"] = json.loads(js["assignees"])
+            js["open"] = bool(js["open"])
+            out.append(js)
+        return out
+
+    def query_pairs(self, person=None, start=None, end=None, limit=50):
+        rng = (start or "", end or "9999-99-99")
+        with self._conn() as c:
+            if person:
+                want = _norm(person)
+                sql = """
+                    WITH me AS (SELECT DISTINCT node_id FROM nodes
+                                WHERE (label_norm = ? OR lower(node_id) = ?) AND day >= ? AND day <= ?)
+                    SELECT source, target, SUM(weight) AS weight, COUNT(DISTINCT run_id) AS runs FROM edges
+                    WHERE day >= ? AND day <= ?
+                      AND (source IN (SELECT node_id FROM me) OR target IN (SELECT node_id FROM me))
+                    GROUP BY source, target ORDER BY weight DESC LIMIT ?"""
+                rows = c.execute(sql, (want, want, *rng, *rng, limit)).fetchall()
+            else:
+                rows = c.execute("SELECT source, target, SUM(weight) AS weight, COUNT(DISTINCT run_id) AS runs "
+                                 "FROM edges WHERE day >= ? AND day <= ? GROUP BY source, target "
+                                 "ORDER BY weight DESC LIMIT ?", (*rng, limit)).fetchall()
+            ids = sorted({r["source"] for r in rows} | {r["target"] for r in rows})
+            labels = {}
+            if ids:
+                marks = ",".join("?" * len(ids))
+                for n in c.execute(f"SELECT node_id, label FROM nodes WHERE node_id IN ({marks}) "
+                                   f"AND day >= ? AND day <= ? ORDER BY run_id", (*ids, *rng)):
+                    labels[n["node_id"]] = n["label"]   # newest label wins
+        return [_pair_row(r["source"], r["target"], r["weight"], r["runs"], labels) for r in rows]
+
+    def stats(self):
+        with self._conn() as c:
+            counts = {t: c.execute(f"SELECT COUNT(*) FROM {t}").fetchone()[0] for t in ("runs", "tasks", "nodes", "edges")}
+        return {"backend": self.backend, "db": str(self.db_path), **counts}
+
+    def close(self) -> None:
+        self._pool.close()
+
+def make_store(backend: str = settings.storage_backend) -> RunStore:
+    if backend == "sqlite":
+        return SqliteRunStore(settings.store_db, settings.store_pool_size)
+    if backend == "files":
+        return FileRunStore()
+    raise ValueError(f"unknown STORAGE_BACKEND {backend!r} (expected files or sqlite)")
+
+run_store = make_store()
+
+# ---------- migration: run folders -> a store ----------
+def migrate(store: RunStore, run_dirs: Iterable[Path], skip_existing: bool = True) -> Dict[str, int]:
+    counts = {"copied": 0, "skipped": 0, "failed": 0}
+    for d in run_dirs:
+        if skip_existing and isinstance(store, SqliteRunStore) and store.has_run(d.name):
+            counts["skipped"] += 1
+            continue
+        try:
+            store.put_run(d.name, read_star(d), read_json(d / "summary.json") or {"bullets": []},
+                          read_json(d / "tasks.json") or {"items": []}, read_json(d / META))
+            counts["copied"] += 1
+        except Exception as e:
+            counts["failed"] += 1
+            log.warning("migrate: %s failed: %s", d.name, e)
+    return counts
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Copy processed run folders under DATA_DIR into the SQLite run store.")
+    ap.add_argument("command", choices=("migrate", "stats"))
+    ap.add_argument("--db", type=Path, default=settings.store_db)
+    ap.add_argument("--force", action="store_true", help="rewrite runs that are already in the store")
+    a = ap.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+    target = SqliteRunStore(a.db)
+    try:
+        if a.command == "migrate":
+            t0 = time.perf_counter()
+            c = migrate(target, list_run_dirs(), skip_existing=not a.force)
+            print(f"{DATA_DIR} -> {a.db}: {c['copied']} copied, {c['skipped']} already there, "
+                  f"{c['failed']} failed in {time.perf_counter() - t0:.1f}s")
+        print(json.dumps(target.stats()))
+    finally:
+        target.close()
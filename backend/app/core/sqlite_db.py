@@ -0,0 +1,41 @@
+# app/core/sqlite_db.py
+# SQLite plumbing shared by the job queue, chat sessions and the run store: every worker process
+# opens the same file, so they all use WAL and autocommit (transactions are explicit BEGINs).
+import sqlite3
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+def connect(path: Path, check_same_thread: bool = True) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=check_same_thread)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+class SqliteDb:
+    """A database file whose `schema` is applied on first use. `_conn()` hands out a
+    short-lived connection; subclasses that keep connections around override `_connection()`."""
+
+    schema = ""
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self._ready = False
+
+    @contextmanager
+    def _connection(self) -> Iterator[sqlite3.Connection]:
+        conn = connect(self.db_path)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @contextmanager
+    def _conn(self) -> Iterator[sqlite3.Connection]:
+        if not self._ready:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connection() as conn:
+            if not self._ready:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.executescript(self.schema)
+                self._ready = True
+            yield conn
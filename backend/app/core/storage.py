@@ -1,41 +1,220 @@
+from array import array
 from datetime import datetime
 from pathlib import Path
-import json, os
-from typing import Optional, List
+import json, os, secrets, shutil, sys
+from contextlib import contextmanager
+from typing import Iterator, Optional, List
 
-ROOT = Path(__file__).resolve().parents[2]
-DATA_DIR = Path(os.getenv("DATA_DIR", ROOT / "data"))
+from app.core.bundle_cache import BundleCache
+from app.core.catalog import RunInfo, catalog_for, WRITING_MARKER, COMMIT_STAMP
+from app.core.config import settings, DATA_DIR
+from app.core.locks import async_file_lock
+from app.core.metrics import stage
 
-def ensure_day_dir() -> Path:
-    d = datetime.now().strftime("%Y-%m-%d")
-    p = DATA_DIR / d
-    p.mkdir(parents=True, exist_ok=True)
-    return p
+try:
+    import orjson  # optional: faster encode/decode when installed
+except ImportError:
+    orjson = None
+
+MANIFEST = "manifest.json"
+META = "meta.json"
+LOCK = ".lock"
+STAGING = ".staging"   # inside a run folder: the next version of a committed run, while it's written
+MATRIX_BIN = "star_matrix.f32"
+# bookkeeping shared across runs (aggregates, stamps) lives below here, not directly in DATA_DIR:
+# every entry created or replaced in DATA_DIR moves its mtime, which sends the catalog into a rescan
+META_DIR = DATA_DIR / ".meta"
+
+# parsed bundles/transcripts for the read endpoints; dropped per run on commit_run
+run_cache = BundleCache(settings.bundle_cache_max_bytes)
+
+def today() -> str:
+    return datetime.now().strftime("%Y-%m-%d")
+
+def _next_seq(names: List[str], stamp: str) -> int:
+    # names sharing `stamp`, sorted; the last one carries the highest counter (older
+    # stamp-xxxx names have none and count as 0)
+    last = names[-1][len(stamp) + 1:].split("-")[0] if names else ""
+    return int(last) + 1 if len(last) == 6 and last.isdigit() else 1
+
+def new_run_dir(day: Optional[str] = None) -> Path:
+    """Create a fresh run folder, YYYY-MM-DD_HH-MM-SS-NNNNNN-xxxx. NNNNNN counts up within the
+    second (within the day for backfills), so run names sort in creation order; it is picked
+    inside cat.writing(), which every process takes. mkdir is the claim, so concurrent writers
+    (threads or processes) can never end up sharing one.
+    `day` lets backfills file a run under the meeting's date instead of today's."""
+    now = datetime.now()
+    stamp = f"{day}_00-00-00" if day else now.strftime("%Y-%m-%d_%H-%M-%S")
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
+    cat = runs_catalog()
+    with cat.writing():
+        seq = _next_seq(cat.names(stamp + "-"), stamp)
+        while True:
+            p = DATA_DIR / f"{stamp}-{seq:06d}-{secrets.token_hex(2)}"
+            try:
+                p.mkdir()
+            except FileExistsError:
+                continue
+            cat.update(p)
+            return p
+
+def discard_run(run_dir: Path) -> None:
+    # a run that never committed; drop the folder and its catalog entry
+    cat = runs_catalog()
+    with cat.writing():
+        shutil.rmtree(run_dir, ignore_errors=True)
+        cat.update(run_dir)
+
+def run_lock(run_dir: Path):
+    # held while a run is written or read-modify-written; see app.core.locks
+    return async_file_lock(run_dir / LOCK)
+
+# ---- atomic writes ----
+def write_bytes(path: Path, data: bytes) -> None:
+    # write next to the target, then rename over it: readers see the old file or the new one, never half
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with stage("storage_write"):
+        with open(tmp, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+def _dumps(data, pretty: bool) -> bytes:
+    if pretty:
+        return json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8")
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
 
 def write_json(path: Path, data: dict) -> None:
-    path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+    write_bytes(path, _dumps(data, pretty=settings.artifact_format == "pretty"))
 
 def write_text(path: Path, text: str) -> None:
-    path.write_text(text, encoding="utf-8")
+    write_bytes(path, text.encode("utf-8"))
+
+def adopt_file(src: Path, path: Path) -> None:
+    # move an already-written file (e.g. a spooled upload) into place without copying it
+    os.replace(src, path)
 
 def read_json(path: Path) -> dict:
     if not path.exists():
         return {}
-    return json.loads(path.read_text(encoding="utf-8"))
+    raw = path.read_bytes()
+    return orjson.loads(raw) if orjson is not None else json.loads(raw)
+
+# ---- star graph with optional packed matrix ----
+def write_star(run_dir: Path, star: dict) -> None:
+    bin_p = run_dir / MATRIX_BIN
+    if settings.artifact_format != "packed":
+        write_json(run_dir / "star_connect.json", star)
+        if bin_p.exists():
+            bin_p.unlink()
+        return
+    matrix = star.get("matrix") or []
+    n = len(matrix)
+    flat = array("f", (float(x) for row in matrix for x in row))
+    if sys.byteorder != "little":
+        flat.byteswap()
+    write_bytes(bin_p, flat.tobytes())
+    write_json(run_dir / "star_connect.json", {**star, "matrix": {"packed": MATRIX_BIN, "n": n}})
+
+def read_star(run_dir: Path) -> dict:
+    js = read_json(run_dir / "star_connect.json")
+    m = js.get("matrix")
+    if isinstance(m, dict) and m.get("packed"):
+        n = int(m.get("n") or 0)
+        flat = array("f")
+        try:
+            flat.frombytes((run_dir / m["packed"]).read_bytes())
+        except OSError:
+            flat = array("f")
+        if sys.byteorder != "little":
+            flat.byteswap()
+        if len(flat) != n * n:
+            js["matrix"] = []
+        else:
+            js["matrix"] = [flat[i * n:(i + 1) * n].tolist() for i in range(n)]
+    return js
+
+# ---- run lifecycle: marker first, manifest last ----
+def begin_run(run_dir: Path) -> None:
+    (run_dir / WRITING_MARKER).touch()
+    (run_dir / MANIFEST).unlink(missing_ok=True)
+
+def commit_run(run_dir: Path) -> None:
+    arts = {}
+    for p in sorted(run_dir.iterdir()):
+        if p.is_file() and not p.name.startswith(".") and p.name != MANIFEST:
+            arts[p.name] = p.stat().st_size
+    write_json(run_dir / MANIFEST, {
+        "version": 1,
+        "format": settings.artifact_format,
+        "written_at": datetime.now().isoformat(timespec="seconds"),
+        "artifacts": arts,
+    })
+    (run_dir / WRITING_MARKER).unlink(missing_ok=True)
+    run_cache.invalidate(run_dir)
+    cat = runs_catalog()
+    with cat.writing():
+        # replacing the stamp is how other processes' catalogs notice; it lives below .meta
+        # because replacing a file directly in DATA_DIR would move the root's mtime as well
+        stamp = DATA_DIR / COMMIT_STAMP
+        stamp.parent.mkdir(exist_ok=True)
+        write_bytes(stamp, run_dir.name.encode("utf-8"))
+        cat.update(run_dir)
+
+@contextmanager
+def rewrite_run(run_dir: Path) -> Iterator[Path]:
+    """Rewrite a committed run without taking it offline. The body writes the new artifacts
+    into the folder it is given; only when it returns are they moved over the live ones and
+    the run re-committed. If it raises, the run is left exactly as it was."""
+    staging = run_dir / STAGING
+    shutil.rmtree(staging, ignore_errors=True)   # left over from a crash mid-rewrite
+    staging.mkdir()
+    try:
+        yield staging
+        moved = set()
+        for p in staging.iterdir():
+            os.replace(p, run_dir / p.name)
+            moved.add(p.name)
+        if MATRIX_BIN not in moved:
+            (run_dir / MATRIX_BIN).unlink(missing_ok=True)   # the format is no longer packed
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+    commit_run(run_dir)
 
 # ---- timeline helpers ----
-def _is_ymd_dir(name: str) -> bool:
-    # Expect 'YYYY-MM-DD'
-    return (
-        len(name) == 10 and name[4] == "-" and name[7] == "-"
-        and name[:4].isdigit() and name[5:7].isdigit() and name[8:10].isdigit()
-    )
-
-def list_day_dirs() -> List[Path]:
-    if not DATA_DIR.exists():
-        return []
-    return sorted([p for p in DATA_DIR.iterdir() if p.is_dir() and _is_ymd_dir(p.name)])
-
-def latest_day_dir() -> Optional[Path]:
-    days = list_day_dirs()
-    return days[-1] if days else None
+def _is_processed(r: RunInfo) -> bool:
+    return r.processed
+
+def runs_catalog():
+    return catalog_for(DATA_DIR)
+
+def list_run_dirs(offset: int = 0, limit: Optional[int] = None, after: Optional[str] = None) -> List[Path]:
+    return [r.path for r in runs_catalog().page(offset, limit, processed=True, after=after)]
+
+def list_days(offset: int = 0, limit: Optional[int] = None, after: Optional[str] = None) -> List[str]:
+    return runs_catalog().day_page(offset, limit, after)
+
+def day_run_dirs(day: str) -> List[Path]:
+    # a day's runs share its YYYY-MM-DD prefix, and only that day's do
+    cat = runs_catalog()
+    return [cat.root / n for n in cat.names(day, processed=True)]
+
+def latest_run_dir(day: Optional[str] = None) -> Optional[Path]:
+    """Newest processed run overall, or on `day` (run names sort chronologically)."""
+    info = runs_catalog().last_processed(day or "")
+    return info.path if info is not None else None
+
+def get_run_dir(run_id: str) -> Optional[Path]:
+    info: Optional[RunInfo] = runs_catalog().get(run_id)
+    return info.path if info is not None and _is_processed(info) else None
+
+def find_run_by_source(day: str, source: str) -> Optional[Path]:
+    """A processed run on `day` whose meta.json records `source` (backfills use this to resume)."""
+    for d in day_run_dirs(day):
+        meta = read_json(d / META)
+        if source in (meta.get("sources") or [meta.get("source")]):
+            return d
+    return None
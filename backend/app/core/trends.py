@@ -0,0 +1,207 @@
+import bisect, hashlib, json, threading
+from datetime import date as Date
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from app.core.locks import file_lock
+from app.core.storage import write_bytes
+from app.services.graph import graph_metrics
+
+Rebuild = Callable[[], Iterable[Tuple[str, Dict[str, Any], Dict[str, Any]]]]
+
+AGG_VERSION = 1
+
+def task_key(owner: Optional[str], description: str) -> str:
+    norm = f"{(owner or '').strip().lower()}|{' '.join((description or '').lower().split())}"
+    return hashlib.sha1(norm.encode("utf-8")).hexdigest()[:12]
+
+def _run_date(name: str) -> Optional[str]:
+    d = name[:10]
+    try:
+        Date.fromisoformat(d)
+    except ValueError:
+        return None
+    return d
+
+def _bucket(d: str, bucket: str) -> str:
+    if bucket == "month":
+        return d[:7]
+    if bucket == "week":
+        y, w, _ = Date.fromisoformat(d).isocalendar()
+        return f"{y}-W{w:02d}"
+    return d
+
+class TrendStore:
+    """Per-run contributions (people, pairs, tasks) folded into range queries.
+    Each run is summarized once when it is written; queries only touch the in-memory summaries.
+    Several worker processes may share the file: updates happen under a file lock on a freshly
+    reloaded copy, and readers reload whenever the file changed underneath them."""
+
+    def __init__(self, path: Path, rebuild: Rebuild):
+        self.path = Path(path)
+        self._rebuild = rebuild
+        self._runs: Dict[str, Dict[str, Any]] = {}
+        self._order: List[Tuple[str, str]] = []   # (date, run name), sorted
+        self._loaded = False
+        self._stamp: Optional[int] = None   # mtime_ns of the file as last read or written
+        self._lock = threading.Lock()
+        self._file_lock = self.path.with_suffix(".lock")
+
+    # ---- persistence ----
+    def load(self) -> None:
+        """Load the aggregate file, or rebuild it from (run name, star, tasks) triples when absent."""
+        with self._lock, file_lock(self._file_lock):
+            if self._read():
+                return
+            self._runs = {}
+            for name, star, tasks in self._rebuild():
+                s = self._summarize(name, star, tasks)
+                if s is not None:
+                    self._runs[name] = s
+            self._reorder()
+            for d, name in self._order:
+                self._runs[name]["carryover"] = self._carryover(name)
+            self._save()
+
+    def _file_stamp(self) -> Optional[int]:
+        try:
+            return self.path.stat().st_mtime_ns
+        except OSError:
+            return None
+
+    def _read(self) -> bool:
+        self._loaded = True
+        stamp = self._file_stamp()
+        try:
+            js = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return False
+        if js.get("version") != AGG_VERSION:
+            return False
+        self._runs = js.get("runs", {})
+        self._reorder()
+        self._stamp = stamp
+        return True
+
+    def _ensure_loaded(self) -> None:
+        if not self._loaded:
+            self.load()
+        elif self._file_stamp() != self._stamp:
+            with self._lock:
+                self._read()   # another process wrote it
+
+    def _save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        body = json.dumps({"version": AGG_VERSION, "runs": self._runs}, ensure_ascii=False, separators=(",", ":"))
+        write_bytes(self.path, body.encode("utf-8"))
+        self._stamp = self._file_stamp()
+
+    def _reorder(self) -> None:
+        self._order = sorted((r["date"], name) for name, r in self._runs.items())
+
+    # ---- updates ----
+    def _summarize(self, name: str, star: Dict[str, Any], tasks: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        d = _run_date(name)
+        if d is None:
+            return None
+        nodes = star.get("nodes") or []
+        gm = graph_metrics(nodes, star.get("matrix") or [], top=len(nodes) ** 2)
+        owners: Dict[str, int] = {}
+        keys = []
+        for t in tasks.get("items") or []:
+            owner = (t.get("owner") or "").strip()
+            if owner:
+                owners[owner] = owners.get(owner, 0) + 1
+            keys.append(task_key(t.get("owner"), t.get("description") or ""))
+        return {
+            "date": d,
+            "people": {n["id"]: n["strength"] for n in gm["nodes"]},
+            "labels": {n["id"]: n["label"] for n in gm["nodes"]},
+            "pairs": {"|".join(sorted((p["source"], p["target"]))): p["weight"] for p in gm["top_pairs"]},
+            "tasks": len(keys),
+            "owners": owners,
+            "task_keys": keys,
+            "carryover": 0,
+        }
+
+    def _previous(self, name: str) -> Optional[str]:
+        r = self._runs[name]
+        i = bisect.bisect_left(self._order, (r["date"], name))
+        return self._order[i - 1][1] if i > 0 else None
+
+    def _next(self, name: str) -> Optional[str]:
+        r = self._runs[name]
+        i = bisect.bisect_right(self._order, (r["date"], name))
+        return self._order[i][1] if i < len(self._order) else None
+
+    def _carryover(self, name: str) -> int:
+        prev = self._previous(name)
+        if prev is None:
+            return 0
+        before = set(self._runs[prev]["task_keys"])
+        return sum(1 for k in self._runs[name]["task_keys"] if k in before)
+
+    def record_run(self, name: str, star: Dict[str, Any], tasks: Dict[str, Any]) -> None:
+        self._ensure_loaded()
+        s = self._summarize(name, star, tasks)
+        if s is None:
+            return
+        with self._lock, file_lock(self._file_lock):
+            if self._file_stamp() != self._stamp:
+                self._read()
+            old = self._runs.pop(name, None)
+            if old is not None:
+                self._order.remove((old["date"], name))
+            self._runs[name] = s
+            bisect.insort(self._order, (s["date"], name))
+            s["carryover"] = self._carryover(name)
+            nxt = self._next(name)
+            if nxt is not None:
+                self._runs[nxt]["carryover"] = self._carryover(nxt)
+            self._save()
+
+    # ---- queries ----
+    def query(self, start: Optional[str], end: Optional[str], bucket: str = "day", top: int = 10) -> Dict[str, Any]:
+        self._ensure_loaded()
+        with self._lock:
+            lo = bisect.bisect_left(self._order, (start or "",))
+            hi = bisect.bisect_right(self._order, ((end or "9999-99-99") + "\uffff",))
+            picked = [self._runs[name] for _, name in self._order[lo:hi]]
+
+        buckets: Dict[str, Dict[str, Any]] = {}
+        total = {"runs": 0, "tasks": 0, "open_carryover": 0, "people": {}, "pairs": {}, "owners": {}}
+        labels: Dict[str, str] = {}
+        for r in picked:
+            labels.update(r["labels"])
+            b = buckets.setdefault(_bucket(r["date"], bucket), {
+                "runs": 0, "tasks": 0, "open_carryover": 0, "people": {}, "pairs": {}, "owners": {},
+            })
+            for acc in (b, total):
+                acc["runs"] += 1
+                acc["tasks"] += r["tasks"]
+                acc["open_carryover"] += r["carryover"]
+                for field in ("people", "pairs", "owners"):
+                    dst = acc[field]
+                    for k, v in r[field].items():
+                        dst[k] = dst.get(k, 0) + v
+
+        def _shape(acc: Dict[str, Any]) -> Dict[str, Any]:
+            pairs = sorted(acc["pairs"].items(), key=lambda kv: -kv[1])[:top]
+            return {
+                "runs": acc["runs"],
+                "tasks": acc["tasks"],
+                "open_carryover": acc["open_carryover"],
+                "people": [{"id": k, "label": labels.get(k, k), "interaction": round(v, 3)}
+                           for k, v in sorted(acc["people"].items(), key=lambda kv: -kv[1])],
+                "top_pairs": [{"source": k.split("|", 1)[0], "target": k.split("|", 1)[1], "weight": round(v, 3)}
+                              for k, v in pairs],
+                "tasks_by_owner": dict(sorted(acc["owners"].items(), key=lambda kv: -kv[1])),
+            }
+
+        return {
+            "start": start,
+            "end": end,
+            "bucket": bucket,
+            "total": _shape(total),
+            "series": [{"period": k, **_shape(v)} for k, v in sorted(buckets.items())],
+        }
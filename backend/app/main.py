@@ -1,30 +1,150 @@
-from pathlib import Path
-from dotenv import load_dotenv
-
-_here = Path(__file__).resolve()     # .../app/main.py
-_root = _here.parent.parent          # backend/
-_app  = _here.parent                 # backend/app
-
-# Load in this order; later overrides earlier.
-load_dotenv(_root / "model.env")
-load_dotenv(_root / ".env")
-load_dotenv(_app / "services" / ".env")
-
-from fastapi import FastAPI
+import asyncio, logging, time
+from contextlib import asynccontextmanager
+from typing import Callable, Dict
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 from app.api.routes_process import router as process_router
 from app.api.routes_friendli import router as friendli_router
+from app.api.routes_jobs import router as jobs_router
+from app.api.routes_trends import router as trends_router
+from app.api.routes_batch import router as batch_router
+from app.core.config import settings
+from app.core import metrics
+from app.services.governor import CircuitOpenError
+
+log = logging.getLogger(__name__)
+
+def _timed(steps: Dict[str, float], name: str, fn: Callable[[], object]) -> None:
+    t0 = time.perf_counter()
+    try:
+        fn()
+    except Exception:
+        # preloading only warms caches; the first request that needs it loads it again
+        log.exception("startup: %s failed", name)
+    steps[name] = time.perf_counter() - t0
+
+# Only the routers are imported at module level; the services the lifespan drives are imported
+# where they are used. Nothing below opens a file, database or connection before startup.
+
+def _preload_latest() -> None:
+    from app.api.routes_process import cached_bundle
+    from app.core.storage import latest_run_dir
+    run_dir = latest_run_dir()
+    if run_dir is not None:
+        cached_bundle(run_dir)
 
-app = FastAPI(title="Meeting Summarizer API")
+async def _preload(app: FastAPI, steps: Dict[str, float]) -> None:
+    from app.api.routes_friendli import sessions
+    from app.core.run_store import run_store
+    from app.services.graph import load_numpy
+    from app.services.pipeline import trend_store
+    # independent loads; most are file/SQLite I/O, so they overlap in threads.
+    # app.openapi() walks every route: FastAPI builds route handlers and their pydantic
+    # adapters lazily, and without this the first hit on each route pays for it (~20-40 ms).
+    await asyncio.gather(*(asyncio.to_thread(_timed, steps, name, fn) for name, fn in (
+        ("routes", app.openapi),
+        ("numpy", load_numpy),
+        ("trends", trend_store.load),
+        ("run_store", run_store.stats),
+        ("chat_sessions", lambda: sessions.purge(settings.chat_session_ttl)),
+        ("latest_bundle", _preload_latest),
+    )))
+
+async def _warm(base: str) -> None:
+    from app.services.http_pool import get_client
+    client = get_client()
+    if client is None:
+        return
+    try:
+        await client.head(base, timeout=5)   # any answer leaves a TLS connection in the pool
+    except Exception as e:
+        log.info("startup: could not reach %s (%r)", base, e)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    from app.api.routes_batch import cancel_batches
+    from app.api.routes_jobs import job_workers
+    from app.core.run_store import run_store
+    from app.core.storage import runs_catalog
+    from app.services.friendli_client import chat_configured
+    from app.services.gemini_client import processors_live
+    from app.services.http_pool import start_pool, close_pool
+    t0 = time.perf_counter()
+    steps: Dict[str, float] = {}
+    await start_pool()
+    t_catalog = time.perf_counter()
+    runs_catalog().rebuild()
+    steps["catalog"] = time.perf_counter() - t_catalog
+    if settings.preload_on_startup:
+        await _preload(app, steps)
+    warming = []
+    if settings.warm_connections:
+        bases = ([settings.gemini_api_base] if processors_live() else []) + \
+                ([settings.friendli_api_base] if chat_configured() else [])
+        warming = [asyncio.create_task(_warm(b)) for b in bases]   # not awaited: serving doesn't wait on the network
+    await job_workers.start()
+    steps["total"] = time.perf_counter() - t0
+    for name, dt in steps.items():
+        metrics.STARTUP_SECONDS.set(round(dt, 6), step=name)
+    if not chat_configured():
+        log.warning("startup: FRIENDLI_API_KEY is not set; the chat endpoints will answer 503")
+    log.info("startup: ready in %.0f ms (%s)", steps["total"] * 1000,
+             ", ".join(f"{k} {v * 1000:.0f} ms" for k, v in steps.items() if k != "total"))
+    yield
+    for t in warming:
+        t.cancel()
+    await cancel_batches()
+    await job_workers.stop()
+    await close_pool()
+    run_store.close()
+
+app = FastAPI(title="Meeting Summarizer API", lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:5173","http://127.0.0.1:5173"],
     allow_credentials=True, allow_methods=["*"], allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
 
+_first_request = True
+
+@app.middleware("http")
+async def _timing(request: Request, call_next):
+    global _first_request
+    timings = metrics.start_request_timing()
+    t0 = time.perf_counter()
+    response = await call_next(request)
+    dt = time.perf_counter() - t0
+    # route template (relative to its router), not the raw path, to keep label cardinality bounded
+    route = getattr(request.scope.get("route"), "path", "unmatched")
+    metrics.HTTP_SECONDS.observe(dt, method=request.method, route=route, status=str(response.status_code))
+    if _first_request:
+        _first_request = False
+        metrics.FIRST_REQUEST_SECONDS.set(round(dt, 6), route=route)
+        log.info("first request: %s %s in %.1f ms", request.method, route, dt * 1000)
+    if settings.timing_header_always or request.headers.get("x-timing") == "1":
+        timings.append(("total", dt * 1000))
+        response.headers["Server-Timing"] = metrics.server_timing_header(timings)
+    return response
+
+@app.exception_handler(CircuitOpenError)
+async def _circuit_open(request: Request, exc: CircuitOpenError):
+    return JSONResponse({"detail": str(exc)}, status_code=503,
+                        headers={"Retry-After": str(int(exc.retry_after) + 1)})
+
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    if not settings.metrics_enabled:
+        return PlainTextResponse("metrics disabled\n", status_code=404)
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/health")
 def health(): 
     return {"ok": True}
 
 app.include_router(process_router, prefix="/api")
 app.include_router(friendli_router, prefix="/api")
+app.include_router(jobs_router, prefix="/api")
+app.include_router(trends_router, prefix="/api")
+app.include_router(batch_router, prefix="/api")
@@ -37,8 +37,27 @@ class TaskItem(BaseModel):
 class TaskList(BaseModel):
     items: List[TaskItem] = []
 
+class NodeMetrics(BaseModel):
+    id: str
+    label: str
+    degree: int = 0
+    strength: float = 0.0
+    centrality: float = 0.0
+
+class PairMetric(BaseModel):
+    source: str
+    target: str
+    weight: float
+
+class GraphMetrics(BaseModel):
+    nodes: List[NodeMetrics] = []
+    top_pairs: List[PairMetric] = []
+    most_central: Optional[str] = None
+
 class ProcessResponse(BaseModel):
     date_dir: str
     star_connect: StarConnect
     summary: SummaryBlock
     tasks: TaskList
+    graph_metrics: Optional[GraphMetrics] = None
+    processing: Optional[str] = None   # "full" | "appended" | "unchanged"
@@ -0,0 +1,136 @@
+# app/services/batch.py
+# Backfill: push a directory of transcripts through the pipeline into dated run folders.
+#   cd backend && python -m app.services.batch /path/to/transcripts --concurrency 4
+import argparse, asyncio, logging, re, time, uuid
+from dataclasses import dataclass, asdict
+from datetime import date as Date, datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from app.core.config import settings
+from app.core.ingest import spool_copy, discard_spool
+from app.core.storage import find_run_by_source
+from app.services.pipeline import process_file
+
+log = logging.getLogger(__name__)
+
+_DATE_IN_NAME = re.compile(r"(\d{4}-\d{2}-\d{2})")
+
+def day_for(path: Path) -> str:
+    """Meeting date for a transcript: a YYYY-MM-DD in its file name, else the file's mtime."""
+    m = _DATE_IN_NAME.search(path.name)
+    if m:
+        try:
+            return Date.fromisoformat(m.group(1)).isoformat()
+        except ValueError:
+            pass
+    return datetime.fromtimestamp(path.stat().st_mtime).strftime("%Y-%m-%d")
+
+@dataclass
+class BatchItem:
+    path: str
+    day: str
+    status: str = "pending"   # pending | running | done | skipped | failed
+    detail: Optional[str] = None
+    seconds: float = 0.0
+
+def plan(paths: Iterable[Path]) -> List[BatchItem]:
+    """One item per transcript, oldest date first."""
+    items = [BatchItem(path=str(p.resolve()), day=day_for(p)) for p in paths]
+    items.sort(key=lambda it: (it.day, it.path))
+    return items
+
+class Batch:
+    def __init__(self, items: List[BatchItem], concurrency: int = settings.batch_concurrency, mode: str = "auto"):
+        self.id = uuid.uuid4().hex[:12]
+        self.items = items
+        self.concurrency = max(1, concurrency)
+        self.mode = mode
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    async def _one(self, it: BatchItem) -> None:
+        # resume: a committed run on that day already records this file as its source
+        done = find_run_by_source(it.day, it.path)
+        if done is not None:
+            it.status, it.detail = "skipped", f"already in {done.name}"
+            return
+        it.status = "running"
+        t0 = time.perf_counter()
+        src = None
+        try:
+            src = spool_copy(Path(it.path))
+            await process_file(src, mode=self.mode, day=it.day, source=it.path)
+            it.status = "done"
+        except Exception as e:
+            it.status, it.detail = "failed", f"{type(e).__name__}: {e}"
+            log.warning("batch %s: %s failed: %s", self.id, it.path, it.detail)
+        finally:
+            if src is not None:
+                discard_spool(src)   # no-op once the run has adopted it
+            it.seconds = round(time.perf_counter() - t0, 3)
+
+    async def run(self) -> dict:
+        self.started_at = time.time()
+        queue = iter([it for it in self.items if it.status == "pending"])
+
+        async def worker() -> None:
+            for it in queue:   # shared iterator: each item goes to exactly one worker
+                await self._one(it)
+
+        try:
+            await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+        finally:
+            self.finished_at = time.time()
+        return self.report()
+
+    def report(self, items: bool = True) -> dict:
+        counts: Dict[str, int] = {}
+        for it in self.items:
+            counts[it.status] = counts.get(it.status, 0) + 1
+        end = self.finished_at or time.time()
+        elapsed = end - self.started_at if self.started_at else 0.0
+        done = counts.get("done", 0)
+        out = {
+            "id": self.id,
+            "mode": self.mode,
+            "concurrency": self.concurrency,
+            "total": len(self.items),
+            "counts": counts,
+            "running": self.started_at is not None and self.finished_at is None,
+            "elapsed_s": round(elapsed, 2),
+            "transcripts_per_minute": round(done / elapsed * 60, 2) if elapsed > 0 else 0.0,
+        }
+        if items:
+            out["items"] = [asdict(it) for it in self.items]
+        return out
+
+def _print_report(rep: dict) -> None:
+    for it in rep["items"]:
+        if it["status"] in ("failed", "skipped"):
+            print(f"  {it['status']:8s} {it['day']}  {Path(it['path']).name}  {it['detail'] or ''}")
+    c = rep["counts"]
+    print(f"{rep['total']} transcripts: {c.get('done', 0)} done, {c.get('skipped', 0)} skipped, "
+          f"{c.get('failed', 0)} failed in {rep['elapsed_s']:.1f}s "
+          f"({rep['transcripts_per_minute']:.1f} transcripts/min, concurrency {rep['concurrency']})")
+
+async def _main(directory: Path, pattern: str, concurrency: int, mode: str) -> int:
+    from app.services.http_pool import start_pool, close_pool
+    batch = Batch(plan(directory.glob(pattern)), concurrency, mode)
+    await start_pool()
+    try:
+        rep = await batch.run()
+    finally:
+        await close_pool()
+    _print_report(rep)
+    return 1 if rep["counts"].get("failed") else 0
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Process a directory of transcripts into dated run folders.")
+    ap.add_argument("directory", type=Path)
+    ap.add_argument("--pattern", default="*.txt")
+    ap.add_argument("--concurrency", type=int, default=settings.batch_concurrency)
+    ap.add_argument("--mode", choices=("auto", "full"), default="auto")
+    a = ap.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+    raise SystemExit(asyncio.run(_main(a.directory, a.pattern, a.concurrency, a.mode)))
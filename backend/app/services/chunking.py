@@ -0,0 +1,51 @@
+# app/services/chunking.py
+import hashlib, re
+from typing import Iterable, Iterator, List
+
+# "Dave: ..." / "Priya Shah - ..." style speaker prefixes; blank lines also end a turn.
+_SPEAKER = re.compile(r"^\s*[A-Z][\w .'\-]{0,40}\s*[:\-–]\s")
+
+def iter_turns(lines: Iterable[str]) -> Iterator[str]:
+    buf: List[str] = []
+    for line in lines:
+        line = line.rstrip("\r\n")
+        if not line.strip():
+            if buf:
+                yield "\n".join(buf)
+                buf = []
+            continue
+        if buf and _SPEAKER.match(line):
+            yield "\n".join(buf)
+            buf = []
+        buf.append(line)
+    if buf:
+        yield "\n".join(buf)
+
+def _split_long(turn: str, max_chars: int) -> Iterator[str]:
+    # a single monologue longer than a chunk: cut on whitespace
+    while len(turn) > max_chars:
+        cut = turn.rfind(" ", 0, max_chars)
+        if cut <= 0:
+            cut = max_chars
+        yield turn[:cut]
+        turn = turn[cut:].lstrip()
+    if turn:
+        yield turn
+
+def iter_chunks(lines: Iterable[str], max_chars: int) -> Iterator[str]:
+    """Pack whole speaker turns into chunks of at most max_chars, reading lazily from `lines`."""
+    buf: List[str] = []
+    size = 0
+    for turn in iter_turns(lines):
+        for piece in _split_long(turn, max_chars):
+            if buf and size + len(piece) + 2 > max_chars:
+                yield "\n\n".join(buf)
+                buf, size = [], 0
+            buf.append(piece)
+            size += len(piece) + 2
+    if buf:
+        yield "\n\n".join(buf)
+
+def turn_hash(turn: str) -> str:
+    # whitespace-insensitive, so re-wrapped or re-saved lines still match the stored run
+    return hashlib.sha1(" ".join(turn.split()).encode("utf-8")).hexdigest()[:16]
@@ -1,17 +1,43 @@
-FRIENDLI_API_KEY = "flp_34HHakPbvzO3QCqkGIhQkkKlQBGQcwFzpig9fCOzxLw49"
-FRIENDLI_API_BASE = "https://api.friendli.ai/serverless/v1"
-FRIENDLI_MODEL = "meta-llama-3.1-8b-instruct"
-# -----------------------------------
-
-
 # app/services/friendli_client.py
 import httpx
 import json
+import time
+from dataclasses import dataclass
+from typing import AsyncIterator, Optional
+
+from app.core.config import settings
+from app.services.http_pool import get_client
+from app.core.metrics import stage, record_llm_io, STAGE_SECONDS
+from app.services.governor import friendli_governor
 
 
 class FriendliHTTPError(RuntimeError):
     pass
 
+@dataclass(frozen=True)
+class FriendliProvider:
+    api_key: str
+    api_base: str
+    model: str
+
+_provider: Optional[FriendliProvider] = None
+
+def configure(api_key: Optional[str] = None, api_base: Optional[str] = None,
+              model: Optional[str] = None) -> FriendliProvider:
+    """Point chat at a provider; anything not given comes from settings (FRIENDLI_API_KEY etc.)."""
+    global _provider
+    _provider = FriendliProvider(api_key=settings.friendli_api_key if api_key is None else api_key,
+                                 api_base=api_base or settings.friendli_api_base,
+                                 model=model or settings.friendli_model)
+    return _provider
+
+def provider() -> FriendliProvider:
+    # built on first use rather than at import
+    return _provider or configure()
+
+def chat_configured() -> bool:
+    return bool(provider().api_key)
+
 def _extract_text(js: dict) -> str:
     try:
         return js["choices"][0]["message"]["content"]
@@ -26,23 +52,46 @@ def _extract_text(js: dict) -> str:
         return val
     raise FriendliHTTPError(f"Unexpected response shape: {json.dumps(js)[:800]}")
 
-async def friendli_chat(messages, temperature: float = 0.3,
-                        model: str | None = None, max_tokens: int = 512) -> str:
-    url = f"{FRIENDLI_API_BASE}/chat/completions"
+def _extract_delta(js: dict) -> str:
+    try:
+        choice = js["choices"][0]
+    except Exception:
+        return ""
+    delta = choice.get("delta") or {}
+    return delta.get("content") or choice.get("text") or ""
+
+def _request(messages, temperature: float, model: str | None, max_tokens: int, stream: bool):
+    p = provider()
+    if not p.api_key:
+        raise FriendliHTTPError("FRIENDLI_API_KEY is not set; chat is unavailable")
+    url = f"{p.api_base}/chat/completions"
     payload = {
-        "model": model or FRIENDLI_MODEL,
+        "model": model or p.model,
         "messages": messages,
         "temperature": temperature,
         "max_tokens": max_tokens,
-        "stream": False,
+        "stream": stream,
     }
     headers = {
-        "Authorization": f"Bearer {FRIENDLI_API_KEY}",
+        "Authorization": f"Bearer {p.api_key}",
         "Content-Type": "application/json",
     }
+    return url, payload, headers
+
+def _prompt_text(messages) -> str:
+    return "\n".join(str(m.get("content") or "") for m in messages if isinstance(m, dict))
+
+async def friendli_chat(messages, temperature: float = 0.3,
+                        model: str | None = None, max_tokens: int = 512) -> str:
+    url, payload, headers = _request(messages, temperature, model, max_tokens, stream=False)
 
-    async with httpx.AsyncClient(timeout=40) as client:
-        r = await client.post(url, json=payload, headers=headers)
+    with stage("friendli_chat"):
+        client = get_client()
+        if client is not None:
+            r = await friendli_governor.call(lambda: client.post(url, json=payload, headers=headers, timeout=40))
+        else:
+            async with httpx.AsyncClient(timeout=40) as client:
+                r = await friendli_governor.call(lambda: client.post(url, json=payload, headers=headers))
 
     if r.status_code >= 300:
         raise FriendliHTTPError(f"HTTP {r.status_code} from Friendli: {r.text[:1000]}")
@@ -52,4 +101,44 @@ async def friendli_chat(messages, temperature: float = 0.3,
     except Exception:
         raise FriendliHTTPError(f"Non-JSON response: {r.text[:800]}")
 
-    return _extract_text(js)
+    text = _extract_text(js)
+    record_llm_io("friendli", _prompt_text(messages), text)
+    return text
+
+async def friendli_chat_stream(messages, temperature: float = 0.3,
+                               model: str | None = None, max_tokens: int = 512) -> AsyncIterator[str]:
+    """Yield content deltas from the OpenAI-compatible SSE stream as they arrive.
+    Closing the generator early closes the upstream response."""
+    url, payload, headers = _request(messages, temperature, model, max_tokens, stream=True)
+
+    client = get_client()
+    owned = client is None
+    if owned:
+        client = httpx.AsyncClient(timeout=40)
+    received = []
+    t0 = time.perf_counter()
+    try:
+        async with friendli_governor.stream(client, "POST", url, json=payload, headers=headers, timeout=40) as r:
+            if r.status_code >= 300:
+                body = (await r.aread()).decode("utf-8", errors="ignore")
+                raise FriendliHTTPError(f"HTTP {r.status_code} from Friendli: {body[:1000]}")
+            async for line in r.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    break
+                try:
+                    js = json.loads(data)
+                except Exception:
+                    continue
+                delta = _extract_delta(js)
+                if delta:
+                    received.append(delta)
+                    yield delta
+    finally:
+        # headers are long gone by the time a stream ends, so this only feeds /metrics
+        STAGE_SECONDS.observe(time.perf_counter() - t0, stage="friendli_stream")
+        record_llm_io("friendli", _prompt_text(messages), "".join(received))
+        if owned:
+            await client.aclose()
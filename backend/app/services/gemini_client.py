@@ -1,12 +1,44 @@
-import os, json, httpx, re, unicodedata, logging
-from typing import Tuple, Any, Dict, List
-from app.models.schemas import StarConnect, SummaryBlock, TaskList, Node, Edge, EdgeTask
+import os, httpx, unicodedata, logging, asyncio, time
+from dataclasses import dataclass
+from typing import Tuple, Any, Callable, Dict, List, Iterable, Optional
+from app.models.schemas import StarConnect, SummaryBlock, TaskList, TaskItem, Node, Edge, EdgeTask
+from app.core.config import settings
+from app.services.http_pool import get_client
+from app.services.chunking import iter_chunks
+from app.services.graph import NodeIndex, reconcile_matrix, matrix_to_lists
+from app.core.metrics import stage, record_llm_io, MOCK_FALLBACKS, JSON_REPAIRS
+from app.services.json_extract import extract_json
+from app.services.governor import gemini_governor
 
 log = logging.getLogger(__name__)
 
-GEMINI_API_KEY = ""
-MODEL = os.getenv("GEMINI_MODEL", "gemini-1.5-flash")
-URL = f"https://generativelanguage.googleapis.com/v1beta/models/{MODEL}:generateContent"
+# processor output where a section can be missing (None): a chunk or delta whose reply didn't parse
+Sections = Tuple[Optional[StarConnect], Optional[SummaryBlock], Optional[TaskList]]
+
+@dataclass(frozen=True)
+class GeminiProvider:
+    api_key: str   # empty: processors return mocks
+    model: str
+    url: str
+
+_provider: Optional[GeminiProvider] = None
+
+def configure(api_key: Optional[str] = None, api_base: Optional[str] = None,
+              model: Optional[str] = None) -> GeminiProvider:
+    """Point the processors at a provider; anything not given comes from settings.
+    Scripts and benchmarks call this to swap in a stub."""
+    global _provider
+    model = model or settings.gemini_model
+    _provider = GeminiProvider(api_key=settings.gemini_api_key if api_key is None else api_key, model=model,
+                               url=f"{api_base or settings.gemini_api_base}/models/{model}:generateContent")
+    return _provider
+
+def provider() -> GeminiProvider:
+    # built on first use rather than at import
+    return _provider or configure()
+
+# Bump whenever a prompt or the parsing of its output changes; cached results are keyed on it.
+PROMPT_VERSION = "2"
 
 def _prompt_star(transcript: str) -> str:
     return f"""
@@ -49,22 +81,44 @@ Transcript:
 JSON:
 """
 
-def _extract_json(text: str, fallback: dict) -> dict:
-    if not text:
-        return fallback
-    start = text.find("{")
-    end = text.rfind("}")
-    if start == -1 or end == -1 or end <= start:
-        return fallback
-    s = text[start:end+1]
-    try:
-        return json.loads(s)
-    except Exception:
-        s2 = re.sub(r"^```json|```$", "", s.strip(), flags=re.MULTILINE)
-        try:
-            return json.loads(s2)
-        except Exception:
-            return fallback
+def _prompt_combined(transcript: str) -> str:
+    return f"""
+From the morning meeting transcript below, produce three sections in ONE JSON object.
+Return ONLY valid JSON with exactly these top-level keys:
+{{
+  "star_connect": {{
+    "nodes": [{{"id":"ashu","label":"Ashu","size":1,"group":null}}],
+    "edges": [{{"source":"ashu","target":"dave","weight":2,"tasks":[{{"title":"...","details":"...","snippets":["..."]}}]}}],
+    "matrix": [[0,2],[2,0]]
+  }},
+  "summary": {{ "bullets": ["..."] }},
+  "tasks": {{ "items": [{{"owner":"Ashu","description":"...","due":null,"priority":"normal","source_snippet":"...","assignees":["Ashu"]}}] }}
+}}
+Rules:
+- star_connect: people identified by how they self-introduce ("ashu here"); an edge when work is requested,
+  co-owned, or referenced; weight ~ interaction strength (1–5); matrix[i][j] is the weight between nodes[i] and nodes[j].
+- summary: at most 8 bullets on decisions, blockers, risks, and key dates.
+- tasks: normalize owners' names; owner null when unclear; due dates/times in natural text if mentioned.
+Transcript:
+\"\"\"{transcript}\"\"\"
+JSON:
+"""
+
+def _extract_json(text: str, fallback: Callable[[], dict], expected: Tuple[str, ...] = (),
+                  section: str = "json") -> dict:
+    """Best-effort parse of a model reply. `fallback` is only called when nothing usable
+    was recovered; partial replies keep whatever top-level fields survived."""
+    with stage("extract_json"):
+        ex = extract_json(text, expected)
+    for r in ex.repairs:
+        JSON_REPAIRS.inc(section=section, repair=r)
+    if ex.value is None:
+        return fallback()
+    if ex.repairs:
+        got, missing = ex.fields(expected)
+        log.info("%s: repaired reply (%s); recovered=%s missing=%s",
+                 section, ",".join(ex.repairs), got, missing)
+    return ex.value
 
 def _slugify(s: str) -> str:
     s = unicodedata.normalize("NFKD", s).encode("ascii", "ignore").decode("ascii")
@@ -132,27 +186,32 @@ def _build_id_map_from_nodes(nodes_in: List[Any]) -> Tuple[List[Dict[str, Any]],
         seen.add(n["id"])
     return nodes_out, id_map
 
-def _resolve_ref_to_id(ref: Any, id_map: Dict[Any, str], nodes_out: List[Dict[str, Any]]) -> str:
+def _resolve_ref_to_id(ref: Any, id_map: Dict[Any, str], index: NodeIndex) -> str:
     if ref in id_map:
         return id_map[ref]
+    hit = index.lookup(ref)
+    if hit is not None:
+        return hit
     ref_s = _to_str(ref).strip().lower()
-    for n in nodes_out:
-        if n["id"].lower() == ref_s or n["label"].lower() == ref_s:
-            return n["id"]
     return _slugify(ref_s or "node")
 
 def normalize_star_json(raw: Dict[str, Any]) -> Dict[str, Any]:
+    with stage("normalize_star"):
+        return _normalize_star_json(raw)
+
+def _normalize_star_json(raw: Dict[str, Any]) -> Dict[str, Any]:
     if not isinstance(raw, dict):
         raw = {}
     nodes_in = _ensure_list(raw.get("nodes", []))
     edges_in = _ensure_list(raw.get("edges", []))
     matrix_in = _ensure_list(raw.get("matrix", []))
     nodes_out, id_map = _build_id_map_from_nodes(nodes_in)
+    index = NodeIndex(nodes_out)
     edges_out: List[Dict[str, Any]] = []
     for e in edges_in:
         if isinstance(e, dict):
-            s = _resolve_ref_to_id(e.get("source"), id_map, nodes_out)
-            t = _resolve_ref_to_id(e.get("target"), id_map, nodes_out)
+            s = _resolve_ref_to_id(e.get("source"), id_map, index)
+            t = _resolve_ref_to_id(e.get("target"), id_map, index)
             w = e.get("weight", 1.0)
             try:
                 w_f = float(w)
@@ -161,28 +220,174 @@ def normalize_star_json(raw: Dict[str, Any]) -> Dict[str, Any]:
             tasks = _normalize_tasks_list(e.get("tasks", []))
             edges_out.append({"source": s, "target": t, "weight": w_f, "tasks": tasks})
         elif isinstance(e, (list, tuple)) and len(e) >= 2:
-            s = _resolve_ref_to_id(e[0], id_map, nodes_out)
-            t = _resolve_ref_to_id(e[1], id_map, nodes_out)
+            s = _resolve_ref_to_id(e[0], id_map, index)
+            t = _resolve_ref_to_id(e[1], id_map, index)
             edges_out.append({"source": s, "target": t, "weight": 1.0, "tasks": []})
-    M: List[List[float]] = []
-    if matrix_in and isinstance(matrix_in, list) and all(isinstance(row, list) for row in matrix_in):
-        try:
-            M = [[float(x) for x in row] for row in matrix_in]
-        except Exception:
-            M = []
-    if not M:
-        n = len(nodes_out)
-        M = [[0.0]*n for _ in range(n)]
-    return {"nodes": nodes_out, "edges": edges_out, "matrix": M}
+    # edge endpoints naming nobody in the node list become nodes, so the matrix can hold them
+    listed = len(nodes_out)
+    known = {n["id"] for n in nodes_out}
+    for e in edges_out:
+        for ref in (e["source"], e["target"]):
+            if ref not in known:
+                known.add(ref)
+                nodes_out.append({"id": ref, "label": ref, "size": 1.0, "group": None})
+    M = reconcile_matrix([n["id"] for n in nodes_out], edges_out, matrix_in, listed)
+    return {"nodes": nodes_out, "edges": edges_out, "matrix": matrix_to_lists(M)}
+
+class ResultMerger:
+    """Folds per-chunk processor results into one graph/summary/task list.
+    Nodes are matched on id or label, edge weights and matrix cells are summed,
+    bullets and tasks are de-duplicated in chunk order."""
+
+    def __init__(self):
+        self.nodes: List[Dict[str, Any]] = []
+        self.id_map: Dict[Any, str] = {}
+        self._index = NodeIndex()
+        self._ids: Dict[str, int] = {}
+        self._edges: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._cells: Dict[Tuple[str, str], float] = {}
+        self._bullets: Dict[int, List[str]] = {}
+        self._tasks: Dict[int, List[TaskItem]] = {}
+        self._seen: set = set()   # sections at least one add() supplied
+
+    def _match(self, ref: Any) -> Optional[str]:
+        if not self.nodes:
+            return None
+        rid = _resolve_ref_to_id(ref, self.id_map, self._index)
+        return rid if rid in self._ids else None
+
+    def _add_node(self, n: Dict[str, Any]) -> str:
+        mid = self._match(n["id"]) or self._match(n["label"])
+        if mid is not None:
+            cur = self.nodes[self._ids[mid]]
+            cur["size"] = max(cur["size"] or 1.0, n["size"] or 1.0)
+            return mid
+        mid = n["id"]
+        while mid in self._ids:
+            mid = f"{n['id']}-{len(self.nodes)}"
+        self._ids[mid] = len(self.nodes)
+        self.nodes.append({**n, "id": mid})
+        self._index.add(self.nodes[-1])
+        self.id_map[mid] = mid
+        self.id_map[n["label"]] = mid
+        return mid
+
+    def add(self, idx: int, star: Optional[StarConnect], summary: Optional[SummaryBlock],
+            tasks: Optional[TaskList]) -> None:
+        """A section given as None contributes nothing."""
+        if summary is not None:
+            self._seen.add("summary")
+            self._bullets[idx] = list(summary.bullets)
+        if tasks is not None:
+            self._seen.add("tasks")
+            self._tasks[idx] = list(tasks.items)
+        if star is not None:
+            self._seen.add("star")
+            self._add_star(star)
+
+    def _add_star(self, star: StarConnect) -> None:
+        chunk_nodes, chunk_map = _build_id_map_from_nodes([n.model_dump() for n in star.nodes])
+        local: Dict[Any, str] = {}
+        order: List[str] = []
+        for n in chunk_nodes:
+            mid = self._add_node(n)
+            local[n["id"]] = mid
+            order.append(mid)
+        for raw, nid in chunk_map.items():
+            local.setdefault(raw, local.get(nid, nid))
+
+        def _ref(r: Any) -> str:
+            if r in local:
+                return local[r]
+            return self._match(r) or _slugify(_to_str(r) or "node")
+
+        for e in star.edges:
+            key = (_ref(e.source), _ref(e.target))
+            cur = self._edges.get(key)
+            if cur is None:
+                self._edges[key] = {"source": key[0], "target": key[1], "weight": e.weight or 0.0,
+                                    "tasks": [t.model_dump() for t in e.tasks]}
+                continue
+            cur["weight"] += e.weight or 0.0
+            titles = {t["title"].lower() for t in cur["tasks"]}
+            cur["tasks"].extend(t.model_dump() for t in e.tasks if t.title.lower() not in titles)
+        for i, row in enumerate(star.matrix[:len(order)]):
+            for j, v in enumerate(row[:len(order)]):
+                if v:
+                    cell = (order[i], order[j])
+                    self._cells[cell] = self._cells.get(cell, 0.0) + float(v)
+
+    def result(self, partial: bool = False) -> Sections:
+        """The merged bundle. A section no add() supplied (every chunk failed) is the mock,
+        or None with `partial`."""
+        n = len(self.nodes)
+        M = [[0.0] * n for _ in range(n)]
+        for (a, b), v in self._cells.items():
+            M[self._ids[a]][self._ids[b]] = v
+        bullets, seen_b = [], set()
+        for idx in sorted(self._bullets):
+            for b in self._bullets[idx]:
+                k = " ".join(b.lower().split())
+                if k not in seen_b:
+                    seen_b.add(k)
+                    bullets.append(b)
+        items, seen_t = [], set()
+        for idx in sorted(self._tasks):
+            for t in self._tasks[idx]:
+                k = ((t.owner or "").lower(), " ".join(t.description.lower().split()))
+                if k not in seen_t:
+                    seen_t.add(k)
+                    items.append(t)
+        star = StarConnect(nodes=self.nodes, edges=list(self._edges.values()), matrix=M)
+        out = (star, SummaryBlock(bullets=bullets), TaskList(items=items))
+        mocks = {"star": _mock_star, "summary": _mock_summary, "tasks": _mock_tasks}
+        for i, section in enumerate(("star", "summary", "tasks")):
+            if section not in self._seen:
+                if not partial:
+                    MOCK_FALLBACKS.inc(section=section, reason="unparsable")
+                out = out[:i] + (None if partial else mocks[section](),) + out[i + 1:]
+        return out
+
+async def _gemini_post(client: httpx.AsyncClient, prompt: str) -> str:
+    body = {"contents":[{"parts":[{"text": prompt}]}]}
+    p = provider()
+    r = await gemini_governor.call(lambda: client.post(p.url, params={"key": p.api_key}, json=body),
+                                   timeout=settings.gemini_call_timeout)
+    r.raise_for_status()
+    data = r.json()
+    return data.get("candidates", [{}])[0].get("content", {}).get("parts", [{}])[0].get("text", "")
 
 async def _gemini_call(prompt: str) -> str:
-    if not GEMINI_API_KEY:
+    if not processors_live():
         return ""
-    async with httpx.AsyncClient(timeout=60) as client:
-        r = await client.post(URL + f"?key={GEMINI_API_KEY}", json={"contents":[{"parts":[{"text": prompt}]}]})
-        r.raise_for_status()
-        data = r.json()
-        return data.get("candidates", [{}])[0].get("content", {}).get("parts", [{}])[0].get("text", "")
+    with stage("gemini_call"):
+        client = get_client()
+        if client is not None:
+            text = await _gemini_post(client, prompt)
+        else:
+            async with httpx.AsyncClient(timeout=settings.gemini_call_timeout) as client:
+                text = await _gemini_post(client, prompt)
+    record_llm_io("gemini", prompt, text)
+    return text
+
+async def _gemini_fanout(prompts: List[str]) -> List[str]:
+    """Run the prompts concurrently, each under its own timeout (enforced by the governor).
+    The first failure cancels the remaining calls and is re-raised."""
+    tasks = [asyncio.create_task(_gemini_call(p)) for p in prompts]
+    try:
+        return list(await asyncio.gather(*tasks))
+    except BaseException:
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+def processors_live() -> bool:
+    return bool(provider().api_key)
+
+def processor_fingerprint() -> str:
+    # chunking changes what the model sees, so results computed at another chunk size don't carry over
+    return f"{provider().model}|{PROMPT_VERSION}|{settings.gemini_processor_mode}|{settings.chunk_max_chars}"
 
 def _mock_star() -> StarConnect:
     nodes = [Node(id="ashu", label="Ashu", size=3.0), Node(id="dave", label="Dave", size=2.0), Node(id="priya", label="Priya", size=2.0)]
@@ -202,14 +407,134 @@ def _mock_tasks() -> TaskList:
         {"owner":"Charlie","description":"run DB migrations on staging","due":"after 3pm","priority":"high","source_snippet":"Diana opens slot after 3 PM","assignees":["Charlie"]}
     ])
 
-async def run_all_processors(transcript: str) -> Tuple[StarConnect, SummaryBlock, TaskList]:
-    if not GEMINI_API_KEY:
-        return _mock_star(), _mock_summary(), _mock_tasks()
-    star_text = await _gemini_call(_prompt_star(transcript))
-    summary_text = await _gemini_call(_prompt_summary(transcript))
-    tasks_text = await _gemini_call(_prompt_tasks(transcript))
-    star_json_raw = _extract_json(star_text, _mock_star().dict())
-    summary_json = _extract_json(summary_text, _mock_summary().dict())
-    tasks_json = _extract_json(tasks_text, _mock_tasks().dict())
-    star_json = normalize_star_json(star_json_raw)
-    return StarConnect(**star_json), SummaryBlock(**summary_json), TaskList(**tasks_json)
+def _mock_all() -> Tuple[StarConnect, SummaryBlock, TaskList]:
+    MOCK_FALLBACKS.inc(section="all", reason="no_key")
+    return _mock_star(), _mock_summary(), _mock_tasks()
+
+# top-level keys each split-mode reply should carry; at least one must be recovered
+_SECTION_KEYS = {"star": ("nodes", "edges", "matrix"), "summary": ("bullets",), "tasks": ("items",)}
+
+def _extract_or_mock(text: str, mock, section: str, partial: bool = False) -> Optional[dict]:
+    """The parsed section, or the mock when it doesn't parse. With `partial` an unparsable section
+    is None instead: one chunk (or appended delta) must not add placeholder people and tasks
+    to results that are otherwise real."""
+    expected = _SECTION_KEYS[section]
+    out = _extract_json(text, dict, expected, section)
+    if any(k in out for k in expected):
+        return out
+    if partial:
+        log.warning("processors: %s section unparsable; skipped", section)
+        return None
+    MOCK_FALLBACKS.inc(section=section, reason="unparsable")
+    return mock().dict()
+
+def _unusable(section: str, err: Exception, mock, partial: bool):
+    if partial:
+        log.warning("combined: %s section unusable (%s); skipped", section, err)
+        return None
+    log.warning("combined: %s section unusable (%s); using mock", section, err)
+    MOCK_FALLBACKS.inc(section=section, reason="unparsable")
+    return mock()
+
+def _section(raw: Dict[str, Any], *keys: str) -> Any:
+    for k in keys:
+        if k in raw:
+            return raw[k]
+    return None
+
+def _parse_combined(text: str, partial: bool = False) -> Sections:
+    # Each section falls back on its own (see _extract_or_mock), so one malformed part doesn't
+    # sink the others.
+    raw = _extract_json(text, dict, ("star_connect", "summary", "tasks"), "combined")
+    star_raw = _section(raw, "star_connect", "star", "graph")
+    try:
+        if not isinstance(star_raw, dict) or not star_raw.get("nodes"):
+            raise ValueError("missing graph")
+        star = StarConnect(**normalize_star_json(star_raw))
+    except Exception as e:
+        star = _unusable("star", e, _mock_star, partial)
+    summary_raw = _section(raw, "summary")
+    if isinstance(summary_raw, list):
+        summary_raw = {"bullets": summary_raw}
+    try:
+        summary = SummaryBlock(**summary_raw)
+    except Exception as e:
+        summary = _unusable("summary", e, _mock_summary, partial)
+    tasks_raw = _section(raw, "tasks", "task_list")
+    if isinstance(tasks_raw, list):
+        tasks_raw = {"items": tasks_raw}
+    try:
+        tasks = TaskList(**tasks_raw)
+    except Exception as e:
+        tasks = _unusable("tasks", e, _mock_tasks, partial)
+    return star, summary, tasks
+
+async def run_combined_processor(transcript: str, partial: bool = False) -> Sections:
+    prompt = _prompt_combined(transcript)
+    t0 = time.perf_counter()
+    text = await _gemini_call(prompt)
+    log.info("processors mode=combined prompt_chars=%d response_chars=%d elapsed_ms=%.0f",
+             len(prompt), len(text or ""), (time.perf_counter() - t0) * 1000)
+    return _parse_combined(text, partial)
+
+async def run_chunked_processors(chunks: Iterable[str], partial: bool = False) -> Sections:
+    """Process chunks with at most CHUNK_CONCURRENCY in flight, folding results in as they finish,
+    so only the in-flight chunks are ever held in memory."""
+    merger = ResultMerger()
+    pending: Dict[asyncio.Task, int] = {}
+
+    def _collect(done) -> None:
+        for t in done:
+            merger.add(pending.pop(t), *t.result())
+
+    try:
+        for idx, chunk in enumerate(chunks):
+            if len(pending) >= settings.chunk_concurrency:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                _collect(done)
+            pending[asyncio.create_task(_process_one(chunk, partial=True))] = idx
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            _collect(done)
+    finally:
+        for t in pending:
+            t.cancel()
+    return merger.result(partial)
+
+async def run_file_processors(path) -> Tuple[StarConnect, SummaryBlock, TaskList]:
+    """Like run_all_processors, but long transcripts are chunked straight off the file."""
+    if not processors_live():
+        return _mock_all()
+    if os.path.getsize(path) <= settings.chunk_max_chars:
+        with open(path, encoding="utf-8", errors="ignore") as f:
+            return await _process_one(f.read())
+    with open(path, encoding="utf-8", errors="ignore") as f:
+        return await run_chunked_processors(iter_chunks(f, settings.chunk_max_chars))
+
+async def run_all_processors(transcript: str, partial: bool = False) -> Sections:
+    """Processor output for `transcript`; see _process_one for `partial`."""
+    if not processors_live():
+        return _mock_all()
+    if len(transcript or "") > settings.chunk_max_chars:
+        return await run_chunked_processors(iter_chunks(transcript.splitlines(), settings.chunk_max_chars), partial)
+    return await _process_one(transcript, partial)
+
+async def _process_one(transcript: str, partial: bool = False) -> Sections:
+    """One prompt round over `transcript`. Unparsable sections are mocks, or None with `partial`."""
+    if settings.gemini_processor_mode == "combined":
+        return await run_combined_processor(transcript, partial)
+    t0 = time.perf_counter()
+    prompts = [_prompt_star(transcript), _prompt_summary(transcript), _prompt_tasks(transcript)]
+    if settings.gemini_fanout == "sequential":
+        star_text, summary_text, tasks_text = [await _gemini_call(p) for p in prompts]
+    else:
+        star_text, summary_text, tasks_text = await _gemini_fanout(prompts)
+    log.info("processors mode=split prompt_chars=%d response_chars=%d elapsed_ms=%.0f",
+             sum(len(p) for p in prompts), len(star_text or "") + len(summary_text or "") + len(tasks_text or ""),
+             (time.perf_counter() - t0) * 1000)
+    star_json = _extract_or_mock(star_text, _mock_star, "star", partial)
+    summary_json = _extract_or_mock(summary_text, _mock_summary, "summary", partial)
+    tasks_json = _extract_or_mock(tasks_text, _mock_tasks, "tasks", partial)
+    return (StarConnect(**normalize_star_json(star_json)) if star_json is not None else None,
+            SummaryBlock(**summary_json) if summary_json is not None else None,
+            TaskList(**tasks_json) if tasks_json is not None else None)
@@ -0,0 +1,277 @@
+# app/services/governor.py
+# Shared admission control for outbound LLM calls: per-provider rate limit, adaptive concurrency,
+# retries with jittered backoff, and a circuit breaker.
+import asyncio, logging, random, time
+from contextlib import asynccontextmanager
+from email.utils import parsedate_to_datetime
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+from app.core.config import settings
+from app.core.metrics import LLM_RETRIES, LLM_CONCURRENCY_LIMIT, LLM_CIRCUIT_OPEN
+
+log = logging.getLogger(__name__)
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+OVERLOAD_STATUSES = {502, 503, 504}
+
+class CircuitOpenError(RuntimeError):
+    def __init__(self, provider: str, retry_after: float):
+        super().__init__(f"{provider} is failing; circuit open for another {retry_after:.1f}s")
+        self.provider = provider
+        self.retry_after = retry_after
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self._last = time.monotonic()
+
+    async def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self._last) * self.rate)
+            self._last = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+class AdaptiveLimit:
+    """AIMD concurrency limit: +1/limit per success, halved when throttled or overloaded."""
+
+    def __init__(self, max_limit: int, min_limit: int = 1):
+        self.min_limit = min_limit
+        self.max_limit = max(min_limit, max_limit)
+        self.limit = float(self.max_limit)
+        self.inflight = 0
+        self._waiters: List[asyncio.Future] = []
+
+    async def acquire(self) -> None:
+        while self.inflight >= int(self.limit):
+            fut = asyncio.get_running_loop().create_future()
+            self._waiters.append(fut)
+            try:
+                await fut
+            finally:
+                if fut in self._waiters:
+                    self._waiters.remove(fut)
+        self.inflight += 1
+
+    def release(self, outcome: str) -> None:
+        self.inflight -= 1
+        if outcome == "ok":
+            self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+        elif outcome in ("throttled", "overload"):
+            self.limit = max(self.min_limit, self.limit / 2)
+        waiters, self._waiters = self._waiters, []
+        for f in waiters:
+            if not f.done():
+                f.set_result(None)
+
+class CircuitBreaker:
+    """Opens after `threshold` consecutive failures; after `cooldown` lets one probe through."""
+
+    def __init__(self, threshold: int, cooldown: float):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.state = "closed"
+        self.failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+
+    def check(self, provider: str) -> None:
+        if self.state == "open":
+            left = self.cooldown - (time.monotonic() - self._opened_at)
+            if left > 0:
+                raise CircuitOpenError(provider, left)
+            self.state = "half_open"
+        if self.state == "half_open":
+            if self._probing:
+                raise CircuitOpenError(provider, self.cooldown)
+            self._probing = True
+
+    def record(self, outcome: str) -> None:
+        self._probing = False
+        if outcome in ("cancelled", "throttled"):
+            return
+        if outcome not in ("failure", "overload"):
+            self.state, self.failures = "closed", 0
+            return
+        self.failures += 1
+        if self.state == "half_open" or self.failures >= self.threshold:
+            self.state = "open"
+            self._opened_at = time.monotonic()
+
+def _retry_after(r: Optional[httpx.Response]) -> Optional[float]:
+    value = r.headers.get("retry-after") if r is not None else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+def _classify(r: Optional[httpx.Response], exc: Optional[BaseException]) -> str:
+    """'ok' | 'throttled' (429) | 'overload' (gateway errors, timeouts) | 'failure' (other server-side
+    trouble) | 'client' (our request was bad). Only overload/failure count towards the breaker."""
+    if exc is not None:
+        if isinstance(exc, (httpx.TimeoutException, asyncio.TimeoutError)):
+            return "overload"
+        return "failure"
+    if r.status_code == 429:
+        return "throttled"
+    if r.status_code in OVERLOAD_STATUSES:
+        return "overload"
+    if r.status_code >= 500:
+        return "failure"
+    return "ok" if r.status_code < 400 else "client"
+
+class Governor:
+    def __init__(self, provider: str, rate: float, burst: int, max_concurrency: int, retries: int,
+                 backoff_base: float, backoff_max: float, breaker_threshold: int, breaker_cooldown: float):
+        self.provider = provider
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.bucket = TokenBucket(rate, burst)
+        self.limit = AdaptiveLimit(max_concurrency)
+        self.breaker = CircuitBreaker(breaker_threshold, breaker_cooldown)
+        self._publish()
+
+    def _publish(self) -> None:
+        LLM_CONCURRENCY_LIMIT.set(int(self.limit.limit), provider=self.provider)
+        LLM_CIRCUIT_OPEN.set(1 if self.breaker.state == "open" else 0, provider=self.provider)
+
+    async def _admit(self) -> None:
+        self.breaker.check(self.provider)
+        try:
+            await self.bucket.acquire()
+            await self.limit.acquire()
+        except BaseException:
+            self.breaker.record("cancelled")
+            raise
+
+    def _release(self, outcome: str) -> None:
+        self.limit.release(outcome)
+        self.breaker.record(outcome)
+        self._publish()
+
+    def _delay(self, attempt: int, r: Optional[httpx.Response], exc: Optional[BaseException],
+               deadline: Optional[float] = None) -> Optional[float]:
+        """Seconds to wait before retrying, or None when the outcome is final."""
+        if attempt >= self.retries:
+            return None
+        if exc is not None:
+            if not isinstance(exc, httpx.TransportError):
+                return None
+        elif r.status_code not in RETRY_STATUSES:
+            return None
+        jitter = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        hint = _retry_after(r)
+        if hint is not None and hint > self.backoff_max:
+            # a server asking for a longer pause than we'd ever wait gets its answer now instead
+            return None
+        delay = jitter if hint is None else max(hint, jitter)
+        if deadline is not None and time.monotonic() + delay >= deadline:
+            return None
+        return delay
+
+    async def _retry(self, attempt: int, delay: float, why: str) -> None:
+        LLM_RETRIES.inc(provider=self.provider, reason=why)
+        log.info("%s: retry %d in %.2fs (%s)", self.provider, attempt + 1, delay, why)
+        await asyncio.sleep(delay)
+
+    async def call(self, send: Callable[[], Awaitable[httpx.Response]],
+                   timeout: Optional[float] = None) -> httpx.Response:
+        """Run `send` under admission control, retrying retryable statuses and transport errors.
+        Returns the last response; the caller still decides what a non-2xx status means.
+        `timeout` bounds all attempts together. Running out of it counts as overload (an outer
+        asyncio.wait_for would only cancel the call, which the breaker ignores) and raises
+        asyncio.TimeoutError."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        attempt = 0
+        while True:
+            await self._admit()
+            r = exc = None
+            outcome = "cancelled"
+            try:
+                if deadline is None:
+                    r = await send()
+                else:
+                    r = await asyncio.wait_for(send(), max(0.0, deadline - time.monotonic()))
+                outcome = _classify(r, None)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                exc = e
+                outcome = _classify(None, e)
+            finally:
+                self._release(outcome)
+            delay = self._delay(attempt, r, exc, deadline)
+            if delay is None:
+                if exc is not None:
+                    raise exc
+                return r
+            await self._retry(attempt, delay, str(r.status_code) if r is not None else type(exc).__name__)
+            attempt += 1
+
+    @asynccontextmanager
+    async def stream(self, client: httpx.AsyncClient, method: str, url: str, **kwargs) -> AsyncIterator[httpx.Response]:
+        """Like `call` for a streamed response: retries happen only before the body starts,
+        and the concurrency slot is held until the stream is closed."""
+        request = client.build_request(method, url, **kwargs)
+        attempt = 0
+        while True:
+            await self._admit()
+            outcome = "cancelled"
+            try:
+                r = await client.send(request, stream=True)
+            except asyncio.CancelledError:
+                self._release(outcome)
+                raise
+            except Exception as e:
+                self._release(_classify(None, e))
+                delay = self._delay(attempt, None, e)
+                if delay is None:
+                    raise
+                await self._retry(attempt, delay, type(e).__name__)
+                attempt += 1
+                continue
+            outcome = _classify(r, None)
+            delay = self._delay(attempt, r, None)
+            if delay is not None:
+                await r.aclose()
+                self._release(outcome)
+                await self._retry(attempt, delay, str(r.status_code))
+                attempt += 1
+                continue
+            try:
+                yield r
+            except (httpx.TimeoutException, httpx.TransportError):
+                outcome = "failure"
+                raise
+            finally:
+                await r.aclose()
+                self._release(outcome)
+            return
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "limit": round(self.limit.limit, 2),
+            "inflight": self.limit.inflight,
+            "tokens": round(self.bucket.tokens, 2),
+            "circuit": self.breaker.state,
+            "consecutive_failures": self.breaker.failures,
+        }
+
+gemini_governor = Governor("gemini", **settings.gemini_governor)
+friendli_governor = Governor("friendli", **settings.friendli_governor)
@@ -0,0 +1,132 @@
+# app/services/graph.py
+# Array-backed helpers for the collaboration graph: id/label lookup, matrix reconciliation, analytics.
+from typing import Any, Dict, List, Optional, Sequence
+
+from app.models.schemas import GraphMetrics, StarConnect
+
+# numpy is bound on first use: importing it is most of the app's own import time, and only
+# the graph math needs it. The startup preload calls load_numpy() off the request path.
+np: Any = None
+
+def load_numpy() -> None:
+    global np
+    if np is None:
+        import numpy
+        np = numpy
+
+class NodeIndex:
+    """Hash index from lowercased node id and label to node id."""
+
+    def __init__(self, nodes: Sequence[Dict[str, Any]] = ()):
+        self._by_key: Dict[str, str] = {}
+        for n in nodes:
+            self.add(n)
+
+    def add(self, node: Dict[str, Any]) -> None:
+        # ids win over labels; the first node to claim a key keeps it (matches the old linear scan)
+        self._by_key.setdefault(str(node["id"]).strip().lower(), node["id"])
+        if node.get("label"):
+            self._by_key.setdefault(str(node["label"]).strip().lower(), node["id"])
+
+    def lookup(self, ref: Any) -> Optional[str]:
+        if ref is None:
+            return None
+        return self._by_key.get(str(ref).strip().lower())
+
+def _as_square(matrix_in: Any, n: int) -> Optional["np.ndarray"]:
+    try:
+        M = np.asarray(matrix_in, dtype=float)
+    except (TypeError, ValueError):
+        return None
+    if M.shape != (n, n) or not np.isfinite(M).all():
+        return None
+    return M
+
+def edge_matrix(ids: Sequence[str], edges: Sequence[Dict[str, Any]]) -> "np.ndarray":
+    """Symmetric N×N weights summed from the edge list."""
+    load_numpy()
+    pos = {nid: i for i, nid in enumerate(ids)}
+    n = len(ids)
+    M = np.zeros((n, n))
+    if not edges:
+        return M
+    src = np.fromiter((pos[e["source"]] for e in edges), dtype=np.intp, count=len(edges))
+    dst = np.fromiter((pos[e["target"]] for e in edges), dtype=np.intp, count=len(edges))
+    w = np.fromiter((float(e.get("weight") or 0.0) for e in edges), dtype=float, count=len(edges))
+    np.add.at(M, (src, dst), w)
+    off = src != dst
+    np.add.at(M, (dst[off], src[off]), w[off])
+    return M
+
+def reconcile_matrix(ids: Sequence[str], edges: Sequence[Dict[str, Any]], matrix_in: Any,
+                     listed: Optional[int] = None) -> "np.ndarray":
+    """Use the model's matrix when it is a finite N×N array, filling cells for edges it left at zero;
+    otherwise rebuild it from the edges. `listed` is how many of `ids` the model's matrix covers
+    when the rest were added afterwards (edge endpoints it never listed as nodes): the matrix is
+    then expected at that size and zero-padded, so its weights survive."""
+    load_numpy()
+    from_edges = edge_matrix(ids, edges)
+    n = len(ids)
+    k = n if listed is None else listed
+    M = _as_square(matrix_in, k)
+    if M is None:
+        return from_edges
+    if k < n:
+        M = np.pad(M, ((0, n - k), (0, n - k)))
+    return np.where((M == 0) & (from_edges != 0), from_edges, M)
+
+def _eigenvector_centrality(M: "np.ndarray", iters: int = 100, tol: float = 1e-8) -> "np.ndarray":
+    n = M.shape[0]
+    if n == 0:
+        return np.zeros(0)
+    A = np.abs(M) + np.abs(M.T)
+    # shifted power iteration converges on bipartite/disconnected graphs too
+    A = A + np.eye(n)
+    x = np.full(n, 1.0 / np.sqrt(n))
+    for _ in range(iters):
+        y = A @ x
+        norm = np.linalg.norm(y)
+        if norm == 0:
+            return np.zeros(n)
+        y /= norm
+        if np.abs(y - x).sum() < tol * n:
+            x = y
+            break
+        x = y
+    return x / x.max() if x.max() > 0 else x
+
+def graph_metrics(nodes: Sequence[Dict[str, Any]], matrix: Any, top: int = 10) -> Dict[str, Any]:
+    load_numpy()
+    ids = [n["id"] for n in nodes]
+    n = len(ids)
+    M = _as_square(matrix, n)
+    if M is None:
+        M = np.zeros((n, n))
+    S = np.abs(M) + np.abs(M.T)
+    np.fill_diagonal(S, 0.0)
+    S /= 2.0
+    degree = (S > 0).sum(axis=1)
+    strength = S.sum(axis=1)
+    centrality = _eigenvector_centrality(S)
+
+    iu, ju = np.triu_indices(n, k=1)
+    w = S[iu, ju]
+    order = np.argsort(-w, kind="stable")[:top]
+    order = order[w[order] > 0]
+    return {
+        "nodes": [
+            {"id": ids[i], "label": nodes[i].get("label") or ids[i], "degree": int(degree[i]),
+             "strength": float(strength[i]), "centrality": round(float(centrality[i]), 6)}
+            for i in range(n)
+        ],
+        "top_pairs": [
+            {"source": ids[iu[k]], "target": ids[ju[k]], "weight": float(w[k])} for k in order
+        ],
+        "most_central": ids[int(np.argmax(centrality))] if n and centrality.max() > 0 else None,
+    }
+
+def matrix_to_lists(M: "np.ndarray") -> List[List[float]]:
+    return M.astype(float).tolist()
+
+def star_metrics(star: StarConnect) -> GraphMetrics:
+    return GraphMetrics(**graph_metrics([n.model_dump() for n in star.nodes], star.matrix))
@@ -0,0 +1,32 @@
+# app/services/http_pool.py
+import httpx
+from typing import Optional
+
+from app.core.config import settings
+
+# One app-scoped client so outbound calls reuse TCP/TLS connections.
+_client: Optional[httpx.AsyncClient] = None
+
+async def start_pool() -> httpx.AsyncClient:
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            timeout=settings.gemini_call_timeout,
+            limits=httpx.Limits(
+                max_connections=settings.http_pool_max_connections,
+                max_keepalive_connections=settings.http_pool_keepalive,
+            ),
+        )
+    return _client
+
+async def close_pool() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+    _client = None
+
+def get_client() -> Optional[httpx.AsyncClient]:
+    # None outside the app (scripts, benchmarks) -> callers fall back to a one-off client
+    if _client is None or _client.is_closed:
+        return None
+    return _client
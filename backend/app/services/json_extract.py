@@ -0,0 +1,130 @@
+# app/services/json_extract.py
+# Tolerant extraction of JSON objects from LLM output: prose and code fences around the JSON,
+# trailing commas, several objects in one reply, and replies cut off mid-object.
+import json, re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import orjson  # optional: faster decode when installed
+except ImportError:
+    orjson = None
+
+# structural tokens; everything between them (numbers, literals, colons, whitespace) is copied as-is
+_TOKEN = re.compile(r'"(?:[^"\\]|\\.)*(?:"|\\?\Z)|[{}\[\],]')
+_STRING_DONE = re.compile(r'"(?:[^"\\]|\\.)*"')
+_CLOSE = {"{": "}", "[": "]"}
+_MAX_CUTS = 12   # how far back a truncated reply is trimmed, in commas, before giving up
+
+def _loads(s: str) -> Any:
+    return orjson.loads(s) if orjson is not None else json.loads(s)
+
+@dataclass
+class Extraction:
+    value: Optional[Dict[str, Any]] = None
+    repairs: List[str] = field(default_factory=list)   # e.g. "trailing_comma", "truncated", "multiple_objects"
+    objects: int = 0
+
+    def fields(self, expected: Sequence[str]) -> Tuple[List[str], List[str]]:
+        """(recovered, missing) among the expected top-level keys."""
+        have = self.value or {}
+        return [k for k in expected if k in have], [k for k in expected if k not in have]
+
+def _close(stack: List[str]) -> str:
+    return "".join(_CLOSE[c] for c in reversed(stack))
+
+def _scan_object(text: str, start: int, repairs: set) -> Tuple[Optional[Any], int]:
+    """Parse the object opening at text[start]. Returns (value or None, index to resume scanning)."""
+    out: List[str] = []
+    stack: List[str] = []
+    cuts: List[Tuple[int, str]] = []   # (len(out) before a comma, open brackets at that point)
+    comma_at = -1                      # index in `out` of a comma nothing significant has followed yet
+    opened = True                      # just past '{' or '[': a comma here is stray
+    last = start
+    for m in _TOKEN.finditer(text, start):
+        gap = text[last:m.start()]
+        if gap:
+            out.append(gap)
+            if gap.strip():
+                comma_at = -1
+                opened = False
+        last = m.end()
+        tok = m.group()
+        c = tok[0]
+        if c == ",":
+            if comma_at >= 0 or opened:
+                repairs.add("stray_comma")
+                continue
+            cuts.append((len(out), "".join(stack)))
+            comma_at = len(out)
+            out.append(tok)
+            continue
+        if c in "}]":
+            if comma_at >= 0:
+                out[comma_at] = ""
+                repairs.add("trailing_comma")
+            if stack:
+                stack.pop()
+            out.append(tok)
+            comma_at = -1
+            opened = False
+            if not stack:
+                body = "".join(out)
+                try:
+                    return _loads(body), last
+                except ValueError:
+                    return None, last
+            continue
+        opened = c in "{["
+        if opened:
+            stack.append(c)
+        out.append(tok)
+        comma_at = -1
+
+    # ran off the end with brackets still open: the reply was cut short
+    repairs.add("truncated")
+    tail = text[last:]
+    body = "".join(out)
+    if not tail and out and out[-1].startswith('"') and not _STRING_DONE.fullmatch(out[-1]):
+        body = body.rstrip("\\") + '"'   # close a string cut off mid-way
+    candidates = [body + tail.rstrip() + _close(stack)]
+    for n, opened in reversed(cuts[-_MAX_CUTS:]):
+        candidates.append("".join(out[:n]) + _close(list(opened)))
+    for cand in candidates:
+        try:
+            return _loads(cand), len(text)
+        except ValueError:
+            continue
+    return None, len(text)
+
+def extract_json(text: Optional[str], expected: Sequence[str] = ()) -> Extraction:
+    """Find every top-level JSON object in `text` and pick one: the object holding the most
+    `expected` keys, else the largest. Values that can't be recovered leave `value` as None."""
+    ex = Extraction()
+    if not text:
+        return ex
+    # fast path: the whole reply (minus prose/fences around it) is one well-formed object
+    start, end = text.find("{"), text.rfind("}")
+    if start != -1 and end > start:
+        try:
+            value = _loads(text[start:end + 1])
+        except ValueError:
+            value = None
+        if isinstance(value, dict):
+            ex.value, ex.objects = value, 1
+            return ex
+    repairs: set = set()
+    found: List[Dict[str, Any]] = []
+    pos = text.find("{")
+    while pos != -1:
+        value, pos = _scan_object(text, pos, repairs)
+        if isinstance(value, dict):
+            found.append(value)
+        pos = text.find("{", pos)
+    ex.objects = len(found)
+    if len(found) > 1:
+        repairs.add("multiple_objects")
+    if found:
+        ex.value = max(found, key=lambda o: (sum(1 for k in expected if k in o), len(o)))
+    ex.repairs = sorted(repairs)
+    return ex
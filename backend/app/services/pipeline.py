@@ -0,0 +1,180 @@
+# app/services/pipeline.py
+# Transcript -> processors -> run folder. Shared by the HTTP routes and the background job workers.
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from app.core.storage import (
+    new_run_dir, run_lock, latest_run_dir, today, write_json, adopt_file, write_star, begin_run,
+    commit_run, rewrite_run, discard_run, read_json, read_star, list_run_dirs, META, META_DIR, MANIFEST,
+)
+from app.core.config import settings
+from app.core.metrics import stage
+from app.core.result_cache import ResultCache
+from app.core.run_store import run_store
+from app.core.trends import TrendStore
+from app.models.schemas import ProcessResponse, StarConnect, SummaryBlock, TaskList
+from app.services.chunking import iter_turns, turn_hash
+from app.services.gemini_client import (
+    run_file_processors, run_all_processors, processors_live, processor_fingerprint, ResultMerger,
+)
+from app.services.graph import star_metrics
+from app.services.retrieval import write_index
+
+log = logging.getLogger(__name__)
+
+SEGMENTS = "segments.json"   # per-turn hashes of transcript.txt, for incremental re-uploads
+
+result_cache = ResultCache(settings.result_cache_dir, settings.result_cache_max_entries,
+                           settings.result_cache_max_bytes, settings.result_cache_max_age)
+
+def _trend_sources():
+    # one-off backfill when the aggregate file doesn't exist yet
+    for d in list_run_dirs():
+        yield d.name, read_star(d), read_json(d / "tasks.json")
+
+trend_store = TrendStore(META_DIR / "trends.json", _trend_sources)
+
+async def run_processors(src: Path):
+    # mocks are free and must not outlive a missing key, so only live results are cached
+    if not settings.result_cache_enabled or not processors_live():
+        return await run_file_processors(src)
+    key = result_cache.key_for_file(src, processor_fingerprint())
+    return await result_cache.get_or_compute_key(key, lambda: run_file_processors(src))
+
+def _read_segments(src: Path, stored: List[str]) -> Tuple[List[str], Optional[List[str]]]:
+    """Hash every turn of `src`. Returns (hashes, new turns) when `src` starts with the stored
+    turns, or (hashes, None) when any stored turn was edited or dropped."""
+    hashes: List[str] = []
+    tail: List[str] = []
+    diverged = False
+    with open(src, encoding="utf-8", errors="ignore") as f:
+        for turn in iter_turns(f):
+            h = turn_hash(turn)
+            i = len(hashes)
+            hashes.append(h)
+            if i < len(stored):
+                diverged = diverged or h != stored[i]
+            else:
+                tail.append(turn)
+    if diverged or len(hashes) < len(stored):
+        return hashes, None
+    return hashes, tail
+
+def _stored_bundle(run_dir: Path) -> Tuple[StarConnect, SummaryBlock, TaskList]:
+    return (StarConnect(**read_star(run_dir)), SummaryBlock(**read_json(run_dir / "summary.json")),
+            TaskList(**read_json(run_dir / "tasks.json")))
+
+async def _run_delta(text: str):
+    # partial: a section of the delta that doesn't parse is None, so the merge below keeps the
+    # run's stored section instead of folding mock people and tasks into it for good
+    return await run_all_processors(text, partial=True)
+
+async def _run_appended(run_dir: Path, tail: List[str]):
+    text = "\n\n".join(tail)
+    if settings.result_cache_enabled:
+        # its own fingerprint: partial results must never answer a full run of the same text
+        new = await result_cache.get_or_compute(text, processor_fingerprint() + "|delta", _run_delta)
+    else:
+        new = await _run_delta(text)
+    merger = ResultMerger()
+    merger.add(0, *_stored_bundle(run_dir))
+    merger.add(1, *new)
+    return merger.result()
+
+def _write_run(dest: Path, src: Path, star: StarConnect, summary: SummaryBlock, tasks: TaskList,
+               hashes: List[str], fingerprint: str, meta: dict) -> None:
+    adopt_file(src, dest / "transcript.txt")
+    write_index(dest)
+    write_star(dest, star.dict())
+    write_json(dest / "summary.json", summary.dict())
+    write_json(dest / "tasks.json", tasks.dict())
+    write_json(dest / SEGMENTS, {"fingerprint": fingerprint, "hashes": hashes})
+    write_json(dest / META, meta)
+
+def _persist(run_dir: Path, src: Path, star: StarConnect, summary: SummaryBlock, tasks: TaskList,
+             hashes: List[str], fingerprint: str, source: Optional[str], append: bool = False) -> None:
+    with stage("persist"):
+        meta = read_json(run_dir / META) or {"run_id": run_dir.name,
+                                             "created_at": datetime.now().isoformat(timespec="seconds")}
+        if source:
+            # "source" stays the first upload; batch resume matches any of "sources"
+            meta.setdefault("source", source)
+            sources = meta.setdefault("sources", [meta["source"]])
+            if source not in sources:
+                sources.append(source)
+        if append:
+            # the run is already live: stage the new version so a failure leaves the old one intact
+            with rewrite_run(run_dir) as staging:
+                _write_run(staging, src, star, summary, tasks, hashes, fingerprint, meta)
+                _store_run(run_dir, star, summary, tasks, meta)
+        else:
+            begin_run(run_dir)
+            _write_run(run_dir, src, star, summary, tasks, hashes, fingerprint, meta)
+            _store_run(run_dir, star, summary, tasks, meta)
+            commit_run(run_dir)
+        trend_store.record_run(run_dir.name, star.model_dump(), tasks.model_dump())
+
+def _store_run(run_dir: Path, star: StarConnect, summary: SummaryBlock, tasks: TaskList, meta: dict) -> None:
+    # before commit_run: committing changes the bundle signature, and a reader that caches the
+    # store's copy under the new signature must get the new copy
+    try:
+        run_store.put_run(run_dir.name, star.model_dump(), summary.model_dump(), tasks.model_dump(), meta)
+    except Exception:
+        # the committed folder is authoritative; `python -m app.core.run_store migrate` catches the store up
+        log.exception("process %s: run store update failed", run_dir.name)
+
+def _response(run_dir: Path, star: StarConnect, summary: SummaryBlock, tasks: TaskList,
+              processing: str) -> ProcessResponse:
+    return ProcessResponse(date_dir=run_dir.name, star_connect=star, summary=summary, tasks=tasks,
+                           graph_metrics=star_metrics(star), processing=processing)
+
+async def _try_append(src: Path, run_dir: Path, fingerprint: str,
+                      source: Optional[str]) -> Tuple[Optional[ProcessResponse], List[str]]:
+    """Fold `src` into `run_dir` when it only adds turns to the stored transcript. Caller holds
+    the run lock. Returns (response, turn hashes); response is None when a full run is needed."""
+    seg = read_json(run_dir / SEGMENTS)
+    stored = (seg.get("hashes") or []) if seg.get("fingerprint") == fingerprint else []
+    hashes, tail = _read_segments(src, stored)
+    if not stored or tail is None:
+        return None, hashes
+    if not tail:
+        return _response(run_dir, *_stored_bundle(run_dir), "unchanged"), hashes
+    with stage("processors"):
+        star, summary, tasks = await _run_appended(run_dir, tail)
+    log.info("process %s: appended (%d turns, %d new)", run_dir.name, len(hashes), len(tail))
+    _persist(run_dir, src, star, summary, tasks, hashes, fingerprint, source, append=True)
+    return _response(run_dir, star, summary, tasks, "appended"), hashes
+
+async def process_file(src: Path, mode: str = "auto", day: Optional[str] = None,
+                       source: Optional[str] = None) -> ProcessResponse:
+    """Process a spooled transcript; on success the file becomes a run's transcript.txt.
+
+    Every upload gets its own run folder, except in "auto" mode when it only appends turns to
+    the newest run of the same day: then just the new turns go through the processors and are
+    merged into that run. Edited or removed turns, a changed processor fingerprint, or mock
+    processors mean a full run. `source` is recorded in meta.json (backfills resume on it)."""
+    fingerprint = processor_fingerprint()
+    hashes = None
+    prev = latest_run_dir(day or today()) if mode == "auto" and processors_live() else None
+    if prev is not None:
+        async with run_lock(prev):
+            res, hashes = await _try_append(src, prev, fingerprint, source)
+        if res is not None:
+            return res
+
+    run_dir = new_run_dir(day)
+    try:
+        async with run_lock(run_dir):
+            if hashes is None:
+                hashes, _ = _read_segments(src, [])
+            with stage("processors"):
+                star, summary, tasks = await run_processors(src)
+            log.info("process %s: full (%d turns)", run_dir.name, len(hashes))
+            _persist(run_dir, src, star, summary, tasks, hashes, fingerprint, source)
+    except BaseException:
+        if not (run_dir / MANIFEST).exists():
+            discard_run(run_dir)   # don't leave a half-made run behind
+        raise
+    return _response(run_dir, star, summary, tasks, "full")
@@ -0,0 +1,126 @@
+# app/services/retrieval.py
+# BM25 over transcript segments, persisted next to transcript.txt so each run is indexed once.
+import json, math, re
+from collections import Counter, OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from app.core.storage import write_bytes
+from app.services.chunking import iter_chunks
+
+INDEX_NAME = "transcript.index.json"
+INDEX_VERSION = 1
+SEGMENT_CHARS = 800
+K1, B = 1.5, 0.75
+
+_WORD = re.compile(r"[a-z0-9']+")
+_STOP = frozenset("""
+a an and are as at be but by for from has have i i'm im in is it it's its me my of on or so that the
+their them then there they this to uh um was we were what when which who will with yeah you your
+""".split())
+
+def tokenize(text: str) -> List[str]:
+    return [w for w in _WORD.findall((text or "").lower()) if w not in _STOP and len(w) > 1]
+
+def build_index(lines: Iterable[str]) -> dict:
+    segments = list(iter_chunks(lines, SEGMENT_CHARS))
+    tfs: List[Dict[str, int]] = []
+    df: Counter = Counter()
+    lens: List[int] = []
+    for seg in segments:
+        tf = Counter(tokenize(seg))
+        tfs.append(dict(tf))
+        df.update(tf.keys())
+        lens.append(sum(tf.values()))
+    return {
+        "version": INDEX_VERSION,
+        "segments": segments,
+        "tf": tfs,
+        "df": dict(df),
+        "lens": lens,
+        "avgdl": (sum(lens) / len(lens)) if lens else 0.0,
+    }
+
+def _stamp(p: Path) -> Optional[List[float]]:
+    try:
+        st = p.stat()
+    except OSError:
+        return None
+    return [st.st_mtime, st.st_size]
+
+def write_index(run_dir: Path) -> dict:
+    tfile = run_dir / "transcript.txt"
+    with open(tfile, encoding="utf-8", errors="ignore") as f:
+        idx = build_index(f)
+    idx["source"] = _stamp(tfile)
+    write_bytes(run_dir / INDEX_NAME, json.dumps(idx, ensure_ascii=False).encode("utf-8"))
+    _loaded.pop(str(run_dir), None)
+    return idx
+
+_loaded: "OrderedDict[str, Tuple[Optional[List[float]], dict]]" = OrderedDict()
+_LOADED_MAX = 32
+
+def load_index(run_dir: Path) -> Optional[dict]:
+    """Index for a run, rebuilt if missing or older than its transcript."""
+    tfile = run_dir / "transcript.txt"
+    stamp = _stamp(tfile)
+    if stamp is None:
+        return None
+    key = str(run_dir)
+    hit = _loaded.get(key)
+    if hit is not None and hit[0] == stamp:
+        _loaded.move_to_end(key)
+        return hit[1]
+    idx = None
+    try:
+        idx = json.loads((run_dir / INDEX_NAME).read_text(encoding="utf-8"))
+        if idx.get("version") != INDEX_VERSION or idx.get("source") != stamp:
+            idx = None
+    except Exception:
+        idx = None
+    if idx is None:
+        idx = write_index(run_dir)
+    _loaded[key] = (stamp, idx)
+    while len(_loaded) > _LOADED_MAX:
+        _loaded.popitem(last=False)
+    return idx
+
+def _bm25(idx: dict, terms: Sequence[str]) -> List[Tuple[float, int]]:
+    n = len(idx["segments"])
+    avgdl = idx["avgdl"] or 1.0
+    scored = []
+    for i, tf in enumerate(idx["tf"]):
+        dl = idx["lens"][i]
+        s = 0.0
+        for t in terms:
+            f = tf.get(t)
+            if not f:
+                continue
+            df = idx["df"].get(t, 0)
+            idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+            s += idf * f * (K1 + 1) / (f + K1 * (1 - B + B * dl / avgdl))
+        if s > 0:
+            scored.append((s, i))
+    return scored
+
+def select_segments(indexes: Sequence[Tuple[str, dict]], query: str, k: int, budget_chars: int) -> List[Tuple[str, str]]:
+    """Top-k segments across runs that fit in budget_chars, returned per run in transcript order."""
+    terms = list(dict.fromkeys(tokenize(query)))
+    hits: List[Tuple[float, str, int]] = []
+    for name, idx in indexes:
+        hits.extend((s, name, i) for s, i in _bm25(idx, terms))
+    hits.sort(key=lambda h: -h[0])
+    by_name = dict(indexes)
+    picked: List[Tuple[str, int]] = []
+    used = 0
+    for _, name, i in hits:
+        if len(picked) >= k:
+            break
+        seg = by_name[name]["segments"][i]
+        if used + len(seg) > budget_chars:
+            continue
+        picked.append((name, i))
+        used += len(seg)
+    order = {name: pos for pos, (name, _) in enumerate(indexes)}
+    picked.sort(key=lambda p: (order[p[0]], p[1]))
+    return [(name, by_name[name]["segments"][i]) for name, i in picked]
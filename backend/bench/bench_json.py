@@ -0,0 +1,114 @@
+# bench/bench_json.py
+# Fuzz + benchmark for app.services.json_extract over model replies saved in bench/fixtures/replies.
+# File names start with the section (star_, summary_, tasks_, combined_) that decides the expected keys.
+#   cd backend && python -m bench.bench_json --mutations 2000 --repeat 200
+import argparse, json, random, re, time
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+from app.services.json_extract import extract_json, orjson
+
+FIXTURES = Path(__file__).parent / "fixtures" / "replies"
+EXPECTED = {
+    "star": ("nodes", "edges", "matrix"),
+    "summary": ("bullets",),
+    "tasks": ("items",),
+    "combined": ("star_connect", "summary", "tasks"),
+}
+
+def _legacy(text: str):
+    # the extraction this module replaced: first '{' to last '}', json.loads, then once more without fences
+    if not text:
+        return None
+    start, end = text.find("{"), text.rfind("}")
+    if start == -1 or end == -1 or end <= start:
+        return None
+    s = text[start:end + 1]
+    try:
+        return json.loads(s)
+    except Exception:
+        try:
+            return json.loads(re.sub(r"^```json|```$", "", s.strip(), flags=re.MULTILINE))
+        except Exception:
+            return None
+
+def load_fixtures() -> List[Tuple[str, Tuple[str, ...], str]]:
+    out = []
+    for p in sorted(FIXTURES.glob("*.txt")):
+        out.append((p.name, EXPECTED[p.name.split("_", 1)[0]], p.read_text(encoding="utf-8")))
+    return out
+
+# ---- mutations: the ways model replies actually go wrong ----
+def _truncate(rng: random.Random, s: str) -> str:
+    return s[:rng.randrange(1, len(s))]
+
+def _fence(rng: random.Random, s: str) -> str:
+    return f"```json\n{s}\n```"
+
+def _prose(rng: random.Random, s: str) -> str:
+    return rng.choice(["Sure, here you go:\n", "Output {as requested}:\n", ""]) + s + rng.choice(["\nHope this helps!", "\n}", ""])
+
+def _trailing_comma(rng: random.Random, s: str) -> str:
+    spots = [m.start() for m in re.finditer(r"[}\]]", s)]
+    if not spots:
+        return s
+    i = rng.choice(spots)
+    return s[:i] + "," + s[i:]
+
+def _duplicate(rng: random.Random, s: str) -> str:
+    return s + "\n" + s
+
+def _noise(rng: random.Random, s: str) -> str:
+    i = rng.randrange(len(s))
+    return s[:i] + rng.choice(['"', "{", "]", "\\", ",", "\n"]) + s[i:]
+
+MUTATIONS: Dict[str, Callable[[random.Random, str], str]] = {
+    "truncate": _truncate, "fence": _fence, "prose": _prose,
+    "trailing_comma": _trailing_comma, "duplicate": _duplicate, "noise": _noise,
+}
+
+def fuzz(fixtures, mutations: int, seed: int) -> Dict[str, List[int]]:
+    """Every mutated reply must extract without raising; structure-preserving mutations must
+    recover the fixture's expected keys. Returns {mutation: [runs, recovered]}."""
+    rng = random.Random(seed)
+    tally = {k: [0, 0] for k in MUTATIONS}
+    for _ in range(mutations):
+        name, expected, text = rng.choice(fixtures)
+        kind = rng.choice(list(MUTATIONS))
+        mutated = MUTATIONS[kind](rng, text)
+        ex = extract_json(mutated, expected)
+        assert ex.value is None or isinstance(ex.value, dict), (name, kind)
+        got, _ = ex.fields(expected)
+        tally[kind][0] += 1
+        tally[kind][1] += bool(got)
+        if kind in ("fence", "prose", "trailing_comma", "duplicate"):
+            base, _ = extract_json(text, expected).fields(expected)
+            assert set(base) <= set(got), (name, kind, base, got)
+    return tally
+
+def bench(fixtures, repeat: int) -> None:
+    print(f"{'fixture':28s} {'legacy us':>10s} {'new us':>10s}  legacy  new  repairs")
+    for name, expected, text in fixtures:
+        t0 = time.perf_counter()
+        for _ in range(repeat):
+            old = _legacy(text)
+        t1 = time.perf_counter()
+        for _ in range(repeat):
+            ex = extract_json(text, expected)
+        t2 = time.perf_counter()
+        got, _ = ex.fields(expected)
+        old_ok = isinstance(old, dict) and any(k in old for k in expected)
+        print(f"{name:28s} {(t1 - t0) / repeat * 1e6:10.1f} {(t2 - t1) / repeat * 1e6:10.1f}"
+              f"  {'ok' if old_ok else '--':6s}  {len(got)}/{len(expected)}  {','.join(ex.repairs) or '-'}")
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--mutations", type=int, default=2000)
+    ap.add_argument("--repeat", type=int, default=200)
+    ap.add_argument("--seed", type=int, default=7)
+    a = ap.parse_args()
+    fixtures = load_fixtures()
+    print(f"json backend: {'orjson' if orjson is not None else 'json'}; {len(fixtures)} fixtures")
+    bench(fixtures, a.repeat)
+    for kind, (runs, ok) in fuzz(fixtures, a.mutations, a.seed).items():
+        print(f"fuzz {kind:15s} {runs:5d} runs, {ok / max(runs, 1):6.1%} recovered expected keys")
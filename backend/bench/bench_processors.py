@@ -0,0 +1,51 @@
+# bench/bench_processors.py
+# p50/p99 of run_all_processors against a local stub, sequential one-off clients vs pooled fan-out.
+#   cd backend && python -m bench.bench_processors --latency 0.2 --runs 30
+import argparse, asyncio, statistics, time
+from dataclasses import replace
+from typing import List
+
+from app.services import gemini_client
+from app.services.governor import gemini_governor
+from app.services.http_pool import start_pool, close_pool
+from bench.stub_server import start_stub
+
+def _pct(xs: List[float], p: float) -> float:
+    xs = sorted(xs)
+    k = min(len(xs) - 1, max(0, round(p / 100 * (len(xs) - 1))))
+    return xs[k]
+
+async def _measure(runs: int, transcript: str) -> List[float]:
+    out = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        await gemini_client.run_all_processors(transcript)
+        out.append((time.perf_counter() - t0) * 1000)
+    return out
+
+async def main(latency: float, runs: int) -> None:
+    server, base = start_stub(latency)
+    gemini_client.configure(api_key="bench", api_base=f"{base}/v1beta")
+    gemini_governor.bucket.rate = 0   # measuring the client fan-out, not the provider rate limit
+    transcript = "ashu here today I sync with dave about the logs\n" * 50
+
+    try:
+        gemini_client.settings = replace(gemini_client.settings, gemini_fanout="sequential")
+        before = await _measure(runs, transcript)
+        await start_pool()
+        gemini_client.settings = replace(gemini_client.settings, gemini_fanout="concurrent")
+        after = await _measure(runs, transcript)
+    finally:
+        await close_pool()
+        server.shutdown()
+
+    print(f"stub latency {latency*1000:.0f} ms, {runs} runs")
+    for name, xs in (("sequential/no pool", before), ("concurrent/pooled", after)):
+        print(f"  {name:<20} p50 {_pct(xs, 50):8.1f} ms   p99 {_pct(xs, 99):8.1f} ms   mean {statistics.mean(xs):8.1f} ms")
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--latency", type=float, default=0.2, help="stub response delay in seconds")
+    ap.add_argument("--runs", type=int, default=30)
+    args = ap.parse_args()
+    asyncio.run(main(args.latency, args.runs))
@@ -0,0 +1,87 @@
+# bench/bench_startup.py
+# Cold start: time to import app.main, process spawn until /health answers, and the first vs
+# second request to /api/latest and /api/process on a fresh server, with PRELOAD_ON_STARTUP off
+# and on. The data dir is seeded with runs first so the preload has something to load.
+#   cd backend && python -m bench.bench_startup
+#   cd backend && python -m bench.bench_startup --runs 50 --repeat 5
+import argparse, re, statistics, subprocess, sys, tempfile, time
+from typing import Dict, List
+
+import httpx
+
+from bench.load_test import BACKEND, ApiServer, _transcript
+from bench.stub_server import start_stub
+
+def import_seconds(env: Dict[str, str]) -> float:
+    code = "import time; t = time.perf_counter(); import app.main; print(time.perf_counter() - t)"
+    out = subprocess.run([sys.executable, "-c", code], cwd=BACKEND, env=env, capture_output=True, text=True, check=True)
+    return float(out.stdout.strip().splitlines()[-1])
+
+def _startup_steps(metrics_text: str) -> Dict[str, float]:
+    return {m.group(1): float(m.group(2)) * 1000
+            for m in re.finditer(r'^hrcopilot_startup_seconds\{step="([^"]+)"\} (\S+)$', metrics_text, re.M)}
+
+def one_start(env: Dict[str, str], turns: int, i: int) -> Dict[str, float]:
+    server = ApiServer(env)
+    t0 = time.perf_counter()
+    server.start()
+    row = {"ready_ms": (time.perf_counter() - t0) * 1000}
+    try:
+        with httpx.Client(base_url=server.url, timeout=60) as c:
+            for name, send in (("latest", lambda k: c.get("/api/latest")),
+                               ("process", lambda k: c.post("/api/process", params={"mode": "full"},   # new text: no cache hit
+                                                            data={"transcript": _transcript(10_000 + 2 * i + k, turns)}))):
+                for k, which in enumerate(("first", "second")):
+                    t = time.perf_counter()
+                    send(k).raise_for_status()
+                    row[f"{name}_{which}_ms"] = (time.perf_counter() - t) * 1000
+            row.update({f"step_{k}_ms": v for k, v in _startup_steps(c.get("/metrics").text).items()})
+    finally:
+        server.stop()
+    return row
+
+def main():
+    ap = argparse.ArgumentParser(description="Cold start and first-request latency, with and without preloading.")
+    ap.add_argument("--runs", type=int, default=20, help="runs seeded into the data dir before measuring")
+    ap.add_argument("--turns", type=int, default=20, help="speaker turns per transcript")
+    ap.add_argument("--repeat", type=int, default=3, help="fresh server starts per setting; medians reported")
+    ap.add_argument("--latency", type=float, default=0.05, help="stub provider latency, seconds")
+    a = ap.parse_args()
+
+    stub, stub_url = start_stub(a.latency, seed=7)
+    tmp = tempfile.TemporaryDirectory(prefix="hrcopilot-startup-")
+    env = {
+        "DATA_DIR": f"{tmp.name}/data", "JOBS_DB": f"{tmp.name}/jobs.sqlite3", "CHAT_DB": f"{tmp.name}/chat.sqlite3",
+        "RESULT_CACHE_DIR": f"{tmp.name}/cache", "STORE_DB": f"{tmp.name}/store.sqlite3",
+        "GEMINI_API_KEY": "bench", "FRIENDLI_API_KEY": "bench",
+        "GEMINI_API_BASE": f"{stub_url}/v1beta", "FRIENDLI_API_BASE": f"{stub_url}/v1",
+        "GEMINI_RATE": "0", "FRIENDLI_RATE": "0",
+    }
+    try:
+        seeder = ApiServer(env)
+        seeder.start()
+        try:
+            with httpx.Client(base_url=seeder.url, timeout=60) as c:
+                for i in range(a.runs):
+                    c.post("/api/process", params={"mode": "full"}, data={"transcript": _transcript(i, a.turns)}).raise_for_status()
+        finally:
+            seeder.stop()
+
+        imports = [import_seconds(seeder.env) * 1000 for _ in range(a.repeat)]
+        print(f"import app.main  {statistics.median(imports):8.1f} ms")
+        n = 0
+        for preload in ("0", "1"):
+            rows: List[Dict[str, float]] = []
+            for _ in range(a.repeat):
+                rows.append(one_start({**env, "PRELOAD_ON_STARTUP": preload}, a.turns, n))
+                n += 1
+            med = {k: statistics.median(r[k] for r in rows) for k in rows[0]}
+            print(f"PRELOAD_ON_STARTUP={preload}  ({a.runs} runs on disk, median of {a.repeat})")
+            for k, v in med.items():
+                print(f"  {k:28s} {v:8.1f}")
+    finally:
+        stub.shutdown()
+        tmp.cleanup()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+# bench/load_test.py
+# Load test: starts the API under uvicorn in a subprocess (fresh temp data dir) with Gemini and
+# Friendli pointed at bench.stub_server, then drives /api/process, /api/latest, /api/by_date and
+# /api/friendli_chat at rising concurrency. Reports throughput, p50/p95/p99 and server RSS, and
+# compares against a stored baseline.
+#   cd backend && python -m bench.load_test                      # run and print
+#   cd backend && python -m bench.load_test --repeat 3 --save-baseline   # record bench/baselines/load_test.json
+#   cd backend && python -m bench.load_test --repeat 3 --check           # exit 1 on a regression vs the baseline
+import argparse, asyncio, json, os, platform, socket, statistics, subprocess, sys, tempfile, time
+from datetime import datetime
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+from bench.bench_processors import _pct
+from bench.stub_server import start_stub
+
+BACKEND = Path(__file__).resolve().parents[1]
+BASELINE = Path(__file__).parent / "baselines" / "load_test.json"
+SCENARIOS = ("process", "latest", "by_date", "chat")
+
+Request = Callable[[httpx.AsyncClient, int], Awaitable[httpx.Response]]
+
+def _transcript(i: int, turns: int) -> str:
+    # unique per request so /process never hits the result cache
+    return "\n\n".join(f"{'Ashu' if k % 2 else 'Dave'}: load test {i} turn {k}, syncing on the log collector"
+                       for k in range(turns))
+
+def _rss_mb(pid: int) -> Tuple[Optional[float], Optional[float]]:
+    """(current, peak) resident set of `pid` in MB; Linux only."""
+    cur = peak = None
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    cur = int(line.split()[1]) / 1024
+                elif line.startswith("VmHWM:"):
+                    peak = int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return cur, peak
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+class ApiServer:
+    def __init__(self, env: Dict[str, str]):
+        self.port = _free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        self.env = {**os.environ, **env}
+        self.proc: Optional[subprocess.Popen] = None
+
+    def start(self, timeout: float = 30) -> None:
+        self.proc = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(self.port), "--log-level", "warning"],
+            cwd=BACKEND, env=self.env)
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if self.proc.poll() is not None:
+                raise RuntimeError(f"API server exited with {self.proc.returncode}")
+            try:
+                if httpx.get(f"{self.url}/health", timeout=1).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.1)
+        raise RuntimeError("API server did not come up")
+
+    def stop(self) -> None:
+        if self.proc is not None and self.proc.poll() is None:
+            self.proc.terminate()
+            try:
+                self.proc.wait(10)
+            except subprocess.TimeoutExpired:
+                self.proc.kill()
+
+async def drive(client: httpx.AsyncClient, send: Request, concurrency: int, total: int, pid: int,
+                first: int = 0) -> dict:
+    """Closed loop: `concurrency` clients issue `total` requests between them, back to back.
+    Requests are numbered from `first`; keep the numbers unique across calls so /process
+    transcripts never repeat (a repeat is a result-cache hit)."""
+    latencies: List[float] = []
+    errors = 0
+    peak = 0.0
+    todo = iter(range(first, first + total))
+    running = True
+
+    async def sample() -> None:
+        nonlocal peak
+        while running:
+            cur, _ = _rss_mb(pid)
+            peak = max(peak, cur or 0.0)
+            await asyncio.sleep(0.05)
+
+    async def worker() -> None:
+        nonlocal errors
+        for i in todo:   # shared iterator: each request goes to exactly one client
+            t0 = time.perf_counter()
+            try:
+                r = await send(client, i)
+                if r.status_code >= 400:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append((time.perf_counter() - t0) * 1000)
+
+    sampler = asyncio.create_task(sample())
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - t0
+    running = False
+    await sampler
+    return {
+        "concurrency": concurrency,
+        "requests": total,
+        "errors": errors,
+        "rps": round(total / elapsed, 2),
+        "p50_ms": round(_pct(latencies, 50), 2),
+        "p95_ms": round(_pct(latencies, 95), 2),
+        "p99_ms": round(_pct(latencies, 99), 2),
+        "max_ms": round(max(latencies), 2),
+        "rss_peak_mb": round(peak, 1),
+    }
+
+def _median(rows: List[dict]) -> dict:
+    # per-metric median over repeats; single runs on a shared box are noisy in the tail
+    out = dict(rows[0])
+    for k in out:
+        if k not in ("concurrency", "requests"):
+            out[k] = statistics.median(r[k] for r in rows)
+    return out
+
+def scenarios(day: str, turns: int) -> Dict[str, Request]:
+    chat = {"messages": [{"role": "user", "content": "What is Ashu waiting on?"}]}
+    return {
+        "process": lambda c, i: c.post("/api/process", params={"mode": "full"}, data={"transcript": _transcript(i, turns)}),
+        "latest": lambda c, i: c.get("/api/latest"),
+        "by_date": lambda c, i: c.get(f"/api/by_date/{day}"),
+        "chat": lambda c, i: c.post("/api/friendli_chat", json=chat),
+    }
+
+async def run(a: argparse.Namespace) -> dict:
+    stub, stub_url = start_stub(a.latency, jitter=a.jitter, error_rate=a.error_rate, size=a.size, seed=7)
+    tmp = tempfile.TemporaryDirectory(prefix="hrcopilot-load-")
+    env = {
+        "DATA_DIR": f"{tmp.name}/data", "JOBS_DB": f"{tmp.name}/jobs.sqlite3", "CHAT_DB": f"{tmp.name}/chat.sqlite3",
+        "RESULT_CACHE_DIR": f"{tmp.name}/cache", "STORE_DB": f"{tmp.name}/store.sqlite3",
+        "GEMINI_API_KEY": "bench", "FRIENDLI_API_KEY": "bench",
+        "GEMINI_API_BASE": f"{stub_url}/v1beta", "FRIENDLI_API_BASE": f"{stub_url}/v1",
+        # measure the API, not the provider rate limits (pass --provider-limits to keep them)
+        **({} if a.provider_limits else {"GEMINI_RATE": "0", "FRIENDLI_RATE": "0"}),
+        **({"STORAGE_BACKEND": a.storage} if a.storage else {}),
+    }
+    server = ApiServer(env)
+    server.start()
+    results: Dict[str, List[dict]] = {}
+    try:
+        limits = httpx.Limits(max_connections=max(a.levels) + 8, max_keepalive_connections=max(a.levels) + 8)
+        async with httpx.AsyncClient(base_url=server.url, timeout=120, limits=limits) as client:
+            for i in range(a.seed_runs):
+                r = await client.post("/api/process", params={"mode": "full"}, data={"transcript": _transcript(-1 - i, a.turns)})
+                r.raise_for_status()
+            day = r.json()["date_dir"][:10]
+            plan = scenarios(day, a.turns)
+            sent = 0
+            for name in a.scenarios:
+                results[name] = []
+                for level in a.levels:
+                    rows = []
+                    for _ in range(a.repeat):
+                        rows.append(await drive(client, plan[name], level, a.requests, server.proc.pid, sent))
+                        sent += a.requests
+                    row = _median(rows)
+                    results[name].append(row)
+                    print(f"{name:8s} c={level:<4d} {row['rps']:8.1f} req/s  p50 {row['p50_ms']:8.1f}  "
+                          f"p95 {row['p95_ms']:8.1f}  p99 {row['p99_ms']:8.1f} ms  errors {row['errors']:3d}  "
+                          f"rss {row['rss_peak_mb']:6.1f} MB", flush=True)
+        _, hwm = _rss_mb(server.proc.pid)
+    finally:
+        server.stop()
+        stub.shutdown()
+        tmp.cleanup()
+    return {
+        "params": params(a),
+        "machine": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()},
+        "recorded_at": datetime.now().isoformat(timespec="seconds"),
+        "server_rss_hwm_mb": round(hwm or 0.0, 1),
+        "results": results,
+    }
+
+def params(a: argparse.Namespace) -> dict:
+    # everything that changes the numbers; a baseline is only comparable when these match
+    return {k: getattr(a, k) for k in ("levels", "requests", "latency", "jitter", "error_rate", "size",
+                                       "turns", "seed_runs", "provider_limits", "storage")}
+
+def check(report: dict, baseline: dict, tolerance: float) -> List[str]:
+    """Regressions beyond `tolerance` (relative): throughput down, p99 or peak RSS up.
+    Latencies within 5 ms of the baseline never count; that's scheduler noise at these sizes."""
+    out = []
+    for name, rows in report["results"].items():
+        base = {b["concurrency"]: b for b in baseline["results"].get(name, [])}
+        for row in rows:
+            b = base.get(row["concurrency"])
+            if b is None:
+                continue
+            tag = f"{name} c={row['concurrency']}"
+            if row["rps"] < b["rps"] * (1 - tolerance):
+                out.append(f"{tag}: throughput {row['rps']:.1f} req/s vs baseline {b['rps']:.1f}")
+            if row["p99_ms"] > b["p99_ms"] * (1 + tolerance) and row["p99_ms"] - b["p99_ms"] > 5:
+                out.append(f"{tag}: p99 {row['p99_ms']:.1f} ms vs baseline {b['p99_ms']:.1f}")
+            if row["rss_peak_mb"] > b["rss_peak_mb"] * (1 + tolerance):
+                out.append(f"{tag}: peak RSS {row['rss_peak_mb']:.1f} MB vs baseline {b['rss_peak_mb']:.1f}")
+            if row["errors"] > b["errors"]:
+                out.append(f"{tag}: {row['errors']} errors vs baseline {b['errors']}")
+    return out
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Load-test the API against fake LLM providers.")
+    ap.add_argument("--levels", type=lambda s: [int(x) for x in s.split(",")], default=[1, 4, 16],
+                    help="comma-separated concurrency levels")
+    ap.add_argument("--requests", type=int, default=100, help="requests per scenario and level")
+    ap.add_argument("--repeat", type=int, default=1, help="runs per level; the median of each metric is reported")
+    ap.add_argument("--scenarios", type=lambda s: s.split(","), default=list(SCENARIOS))
+    ap.add_argument("--latency", type=float, default=0.05, help="fake provider latency, seconds")
+    ap.add_argument("--jitter", type=float, default=0.0)
+    ap.add_argument("--error-rate", type=float, default=0.0, help="share of provider calls that fail with 503")
+    ap.add_argument("--size", type=int, default=4, help="people in the fake graph; scales reply sizes")
+    ap.add_argument("--turns", type=int, default=20, help="speaker turns per uploaded transcript")
+    ap.add_argument("--seed-runs", type=int, default=3)
+    ap.add_argument("--provider-limits", action="store_true", help="keep the GEMINI_/FRIENDLI_RATE limits")
+    ap.add_argument("--storage", choices=("files", "sqlite"), default=None)
+    ap.add_argument("--out", type=Path, help="also write the report as JSON here")
+    ap.add_argument("--save-baseline", action="store_true")
+    ap.add_argument("--check", action="store_true", help="compare with the baseline; exit 1 on a regression")
+    ap.add_argument("--baseline", type=Path, default=BASELINE)
+    ap.add_argument("--tolerance", type=float, default=0.25)
+    a = ap.parse_args()
+    for s in a.scenarios:
+        if s not in SCENARIOS:
+            ap.error(f"unknown scenario {s!r}; pick from {', '.join(SCENARIOS)}")
+
+    report = asyncio.run(run(a))
+    print(f"server peak RSS {report['server_rss_hwm_mb']:.1f} MB")
+    if a.out:
+        a.out.write_text(json.dumps(report, indent=2))
+    if a.save_baseline:
+        a.baseline.parent.mkdir(parents=True, exist_ok=True)
+        a.baseline.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"baseline saved to {a.baseline}")
+    if a.check:
+        baseline = json.loads(a.baseline.read_text())
+        if baseline["params"] != report["params"]:
+            print(f"baseline was recorded with {baseline['params']}; rerun with the same options to compare")
+            raise SystemExit(2)
+        problems = check(report, baseline, a.tolerance)
+        for p in problems:
+            print("REGRESSION", p)
+        print(f"{len(problems)} regression(s) vs baseline from {baseline['recorded_at']} (tolerance {a.tolerance:.0%})")
+        raise SystemExit(1 if problems else 0)
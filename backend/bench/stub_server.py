@@ -0,0 +1,117 @@
+# bench/stub_server.py
+# Local stand-ins for the Gemini generateContent and Friendli /chat/completions endpoints,
+# used by the benchmarks. Friendli replies stream as SSE when the request asks for it.
+# Latency, jitter, error rate and reply size are configurable; run it on its own with
+#   cd backend && python -m bench.stub_server --port 9100 --latency 0.3 --error-rate 0.05 --size 8
+import argparse, json, random, threading, time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, Tuple
+
+NAMES = ["Ashu", "Dave", "Charlie", "George", "Priya", "Mina", "Tomas", "Lena"]
+
+def gemini_text(size: int = 2) -> str:
+    """One reply that satisfies every processor: star graph, summary bullets and task items at the
+    top level for the split prompts, and nested under their section names for the combined prompt.
+    `size` is the number of people; bullets, tasks and edges grow with it."""
+    size = max(2, size)
+    labels = [NAMES[i] if i < len(NAMES) else f"Person {i}" for i in range(size)]
+    ids = [lab.lower().replace(" ", "_") for lab in labels]
+    matrix = [[0] * size for _ in range(size)]
+    edges = []
+    for i in range(size):
+        j = (i + 1) % size
+        matrix[i][j] = matrix[j][i] = 2
+        edges.append({"source": ids[i], "target": ids[j], "weight": 2,
+                      "tasks": [{"title": f"integrate logs {i}", "snippets": [f"{labels[i]} syncs with {labels[j]}"]}]})
+    star = {"nodes": [{"id": i, "label": lab} for i, lab in zip(ids, labels)], "edges": edges, "matrix": matrix}
+    summary = {"bullets": [f"{lab} reported progress on the log pipeline" for lab in labels] * 2}
+    tasks = {"items": [{"owner": lab, "description": f"Follow up on item {k} with {labels[(k + 1) % size]}",
+                        "priority": "medium"} for k, lab in enumerate(labels * 2)]}
+    return json.dumps({**star, **summary, **tasks, "star_connect": star, "summary": summary, "tasks": tasks})
+
+CHAT_TOKENS = "Ashu is waiting on the log collector from Dave ; Charlie needs a staging slot .".split()
+
+class _Handler(BaseHTTPRequestHandler):
+    latency = 0.2
+    jitter = 0.0          # extra uniform delay, 0..jitter seconds
+    error_rate = 0.0      # share of requests answered with `error_status`
+    error_status = 503
+    size = 2
+    token_delay = 0.01
+    rng = random.Random()
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True   # headers and body go out as separate writes; don't add 40 ms between them
+
+    def _send_json(self, status: int, obj: dict) -> None:
+        body = json.dumps(obj).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length)
+        time.sleep(self.latency + (self.rng.uniform(0, self.jitter) if self.jitter else 0))
+        if self.error_rate and self.rng.random() < self.error_rate:
+            return self._send_json(self.error_status, {"error": {"code": self.error_status, "message": "stub overloaded"}})
+        if self.path.endswith("/chat/completions"):
+            return self._chat(json.loads(raw or b"{}"))
+        self._send_json(200, {"candidates": [{"content": {"parts": [{"text": self.gemini_reply}]}}]})
+
+    def _chat(self, req: dict):
+        tokens = CHAT_TOKENS * max(1, self.size // 2)
+        if not req.get("stream"):
+            text = " ".join(tokens)
+            return self._send_json(200, {"choices": [{"message": {"role": "assistant", "content": text}}]})
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        try:
+            for tok in tokens:
+                chunk = {"choices": [{"delta": {"content": tok + " "}}]}
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+                time.sleep(self.token_delay)
+            self.wfile.write(b"data: [DONE]\n\n")
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, *args):
+        pass
+
+class _StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128   # the default backlog of 5 drops connects under load; retried SYNs add a second
+
+def start_stub(latency: float = 0.2, port: int = 0, jitter: float = 0.0, error_rate: float = 0.0,
+               error_status: int = 503, size: int = 2, seed: Optional[int] = None) -> Tuple[ThreadingHTTPServer, str]:
+    handler = type("StubHandler", (_Handler,), {
+        "latency": latency, "jitter": jitter, "error_rate": error_rate, "error_status": error_status,
+        "size": size, "gemini_reply": gemini_text(size), "rng": random.Random(seed),
+    })
+    server = _StubServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address[:2]
+    return server, f"http://{host}:{port}"
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Fake Gemini + Friendli endpoints. Point GEMINI_API_BASE at "
+                                             "<url>/v1beta and FRIENDLI_API_BASE at <url>/v1.")
+    ap.add_argument("--port", type=int, default=9100)
+    ap.add_argument("--latency", type=float, default=0.2, help="seconds before each reply")
+    ap.add_argument("--jitter", type=float, default=0.0, help="extra random delay, up to this many seconds")
+    ap.add_argument("--error-rate", type=float, default=0.0, help="share of requests that fail (0..1)")
+    ap.add_argument("--error-status", type=int, default=503)
+    ap.add_argument("--size", type=int, default=2, help="people in the fake graph; also scales chat replies")
+    ap.add_argument("--seed", type=int, default=None)
+    a = ap.parse_args()
+    srv, url = start_stub(a.latency, a.port, a.jitter, a.error_rate, a.error_status, a.size, a.seed)
+    print(f"stub listening on {url}  (GEMINI_API_BASE={url}/v1beta FRIENDLI_API_BASE={url}/v1)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        srv.shutdown()
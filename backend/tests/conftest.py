@@ -0,0 +1,46 @@
+# cd backend && python -m pytest tests
+import json, os, re, tempfile
+from typing import List, Tuple
+
+import pytest
+
+# settings are read once at import, so point every store at a scratch dir before the app loads
+_scratch = tempfile.mkdtemp(prefix="hrcopilot-tests-")
+for _name, _rel in (("DATA_DIR", "data"), ("JOBS_DB", "jobs.sqlite3"), ("CHAT_DB", "chat.sqlite3"),
+                    ("STORE_DB", "store.sqlite3"), ("RESULT_CACHE_DIR", "cache"), ("BATCH_ROOT", "backfill")):
+    os.environ[_name] = os.path.join(_scratch, _rel)
+
+from app.services import gemini_client  # noqa: E402
+
+class FakeLLM:
+    """Answers split-mode prompts from the transcript itself: every "Name: text" line makes a
+    node, a bullet and a task, and consecutive speakers get an edge. A transcript containing
+    "GARBLE:<section>" gets an unparsable reply for that section."""
+
+    def __init__(self):
+        self.calls: List[Tuple[str, str]] = []   # (section, transcript)
+
+    async def __call__(self, prompt: str) -> str:
+        section, transcript = prompt.split("\n", 1)
+        self.calls.append((section, transcript))
+        if f"GARBLE:{section}" in transcript:
+            return "sorry, I can't help with that"
+        turns = re.findall(r"^(\w+): (.+)$", transcript, re.M)
+        if section == "star":
+            people = list(dict.fromkeys(name for name, _ in turns))
+            edges = [{"source": a, "target": b, "weight": 1}
+                     for (a, _), (b, _) in zip(turns, turns[1:]) if a != b]
+            return json.dumps({"nodes": [{"id": p.lower(), "label": p} for p in people], "edges": edges})
+        if section == "summary":
+            return json.dumps({"bullets": [text for _, text in turns]})
+        return json.dumps({"items": [{"owner": name, "description": text} for name, text in turns]})
+
+@pytest.fixture
+def fake_llm(monkeypatch) -> FakeLLM:
+    fake = FakeLLM()
+    monkeypatch.setattr(gemini_client, "_provider",
+                        gemini_client.GeminiProvider(api_key="test", model="fake", url="http://llm.invalid"))
+    for section in ("star", "summary", "tasks"):
+        monkeypatch.setattr(gemini_client, f"_prompt_{section}", lambda t, s=section: f"{s}\n{t}")
+    monkeypatch.setattr(gemini_client, "_gemini_call", fake)
+    return fake
@@ -0,0 +1,40 @@
+# cd backend && python -m pytest tests
+from dataclasses import replace
+from pathlib import Path
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api import routes_batch
+
+@pytest.fixture
+def client(tmp_path: Path, monkeypatch) -> TestClient:
+    root = tmp_path / "backfill"
+    (root / "sub").mkdir(parents=True)
+    (tmp_path / "secret").mkdir()
+    (tmp_path / "secret" / "notes.txt").write_text("Ashu: not for the batch runner\n")
+    monkeypatch.setattr(routes_batch, "settings", replace(routes_batch.settings, batch_root=root))
+    app = FastAPI()
+    app.include_router(routes_batch.router, prefix="/api")
+    return TestClient(app)
+
+@pytest.mark.parametrize("pattern", ["../../secret/*.txt", "../*/*.txt", "**/../../secret/*.txt"])
+def test_pattern_cannot_climb_out_of_batch_root(client: TestClient, pattern: str):
+    r = client.post("/api/batch", json={"directory": "sub", "pattern": pattern})
+    assert r.status_code == 400
+    assert routes_batch._batches == {}
+
+def test_absolute_pattern_is_rejected(client: TestClient, tmp_path: Path):
+    r = client.post("/api/batch", json={"directory": "sub", "pattern": str(tmp_path / "secret" / "*.txt")})
+    assert r.status_code == 400
+
+def test_symlinked_files_outside_batch_root_are_skipped(client: TestClient, tmp_path: Path):
+    (tmp_path / "backfill" / "sub" / "link.txt").symlink_to(tmp_path / "secret" / "notes.txt")
+    r = client.post("/api/batch", json={"directory": "sub", "pattern": "*.txt"})
+    assert r.status_code == 400
+    assert "No files matching" in r.json()["detail"]
+
+def test_directory_cannot_climb_out_of_batch_root(client: TestClient):
+    r = client.post("/api/batch", json={"directory": "../secret", "pattern": "*.txt"})
+    assert r.status_code == 400
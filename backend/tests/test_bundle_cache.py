@@ -0,0 +1,33 @@
+# cd backend && python -m pytest tests
+import pytest
+
+from app.core.bundle_cache import etag_matches
+
+ETAG = '"abc123"'
+
+@pytest.mark.parametrize("header", [
+    '"abc123"',
+    'W/"abc123"',
+    '"zzz", "abc123"',
+    '"zzz",W/"abc123" ,"yyy"',
+    "*",
+    " * ",
+])
+def test_matching_tags(header):
+    assert etag_matches(header, ETAG)
+
+@pytest.mark.parametrize("header", [
+    None,
+    "",
+    '"abc1234"',            # our tag is a prefix of theirs
+    '"xabc123"',
+    '"abc12"',
+    'abc123',               # unquoted
+    '"zzz", "abc123-old"',
+    '"abc123""',
+])
+def test_non_matching_tags(header):
+    assert not etag_matches(header, ETAG)
+
+def test_weak_server_tag():
+    assert etag_matches('"abc123"', 'W/"abc123"')
@@ -0,0 +1,75 @@
+# cd backend && python -m pytest tests
+import threading, time
+from pathlib import Path
+
+from app.core import catalog
+from app.core.catalog import COMMIT_STAMP, RunCatalog
+from app.core.storage import new_run_dir, runs_catalog
+
+def _commit(cat: RunCatalog, name: str) -> None:
+    # what storage.commit_run does, minus the artifacts it doesn't need
+    with cat.writing():
+        run = cat.root / name
+        run.mkdir()
+        (run / "star_connect.json").write_text("{}")
+        stamp = cat.root / COMMIT_STAMP
+        stamp.parent.mkdir(exist_ok=True)
+        stamp.write_text(name)
+        cat.update(run)
+
+def test_commit_by_another_process_during_writing_is_seen(tmp_path: Path):
+    a, b = RunCatalog(tmp_path), RunCatalog(tmp_path)
+    _commit(a, "2032-01-01_09-00-00-000001-aaaa")
+    b.rebuild()
+    other = threading.Thread(target=_commit, args=(b, "2032-01-01_09-00-00-000002-bbbb"))
+    with a.writing():
+        other.start()
+        time.sleep(0.2)   # b would commit right here if writing() didn't hold it off
+        run = tmp_path / "2032-01-01_09-00-00-000003-cccc"
+        run.mkdir()
+        (run / "star_connect.json").write_text("{}")
+        a.update(run)
+    other.join()
+    assert a.names(processed=True) == ["2032-01-01_09-00-00-000001-aaaa", "2032-01-01_09-00-00-000002-bbbb",
+                                       "2032-01-01_09-00-00-000003-cccc"]
+
+def test_run_names_sort_in_creation_order():
+    made = [new_run_dir("2032-02-01").name for _ in range(5)] + [new_run_dir().name for _ in range(5)]
+    assert made[:5] == sorted(made[:5])
+    assert made[5:] == sorted(made[5:])
+    assert runs_catalog().names("2032-02-01") == made[:5]
+
+def test_lookup_during_a_rebuild_waits_for_it(tmp_path: Path, monkeypatch):
+    names = [f"2032-03-01_09-00-00-{i:06d}-abcd" for i in range(3)]
+    for name in names:
+        (tmp_path / name).mkdir()
+        (tmp_path / name / "star_connect.json").write_text("{}")
+    cat = RunCatalog(tmp_path)
+    cat.rebuild()
+    got, calls, readers = [], [], []
+
+    def run_day(name):
+        # rebuild() files runs by day one at a time; look up from another thread halfway through
+        calls.append(name)
+        if len(calls) == 2:
+            reader = threading.Thread(target=lambda: got.append(cat.names(processed=True)))
+            readers.append(reader)
+            reader.start()
+            reader.join(0.2)   # with the lock it can't finish until the rebuild has
+        return real_run_day(name)
+
+    real_run_day = catalog.run_day
+    monkeypatch.setattr(catalog, "run_day", run_day)
+    cat.rebuild()
+    readers[0].join(5)
+    assert got == [names]
+
+def test_last_processed(tmp_path: Path):
+    cat = RunCatalog(tmp_path)
+    for name in ("2032-04-01_09-00-00-000001-aaaa", "2032-04-01_09-00-00-000002-bbbb", "2032-04-02_09-00-00-000001-cccc"):
+        _commit(cat, name)
+    (tmp_path / "2032-04-03_09-00-00-000001-dddd").mkdir()   # not processed
+    assert cat.last_processed().name == "2032-04-02_09-00-00-000001-cccc"
+    assert cat.last_processed("2032-04-01").name == "2032-04-01_09-00-00-000002-bbbb"
+    assert cat.last_processed("2032-04-03") is None
+    assert cat.last_processed("2032-03") is None
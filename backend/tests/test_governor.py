@@ -0,0 +1,59 @@
+# cd backend && python -m pytest tests
+import asyncio
+
+import httpx
+import pytest
+
+from app.services.governor import Governor
+
+def _governor(**kw) -> Governor:
+    opts = dict(rate=0, burst=1, max_concurrency=8, retries=3, backoff_base=0.01, backoff_max=0.05,
+                breaker_threshold=2, breaker_cooldown=30)
+    return Governor("test", **{**opts, **kw})
+
+async def _hung() -> httpx.Response:
+    await asyncio.sleep(2)
+    return httpx.Response(200)
+
+def test_deadline_counts_as_overload():
+    g = _governor()
+
+    async def go():
+        for _ in range(2):
+            with pytest.raises(asyncio.TimeoutError):
+                await g.call(_hung, timeout=0.05)
+
+    asyncio.run(go())
+    stats = g.stats()
+    assert stats["circuit"] == "open"
+    assert stats["consecutive_failures"] == 2
+    assert stats["limit"] < 8
+    assert stats["inflight"] == 0
+
+def test_transport_timeouts_are_retried_within_the_deadline():
+    g = _governor(breaker_threshold=10)
+    calls = []
+
+    async def send() -> httpx.Response:
+        calls.append(1)
+        if len(calls) < 3:
+            raise httpx.ReadTimeout("slow")
+        return httpx.Response(200)
+
+    r = asyncio.run(g.call(send, timeout=5))
+    assert r.status_code == 200
+    assert len(calls) == 3
+
+def test_cancellation_is_not_a_failure():
+    g = _governor()
+
+    async def go():
+        t = asyncio.create_task(g.call(_hung))
+        await asyncio.sleep(0.01)
+        t.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await t
+
+    asyncio.run(go())
+    assert g.stats()["circuit"] == "closed"
+    assert g.stats()["consecutive_failures"] == 0
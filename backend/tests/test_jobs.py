@@ -0,0 +1,40 @@
+# cd backend && python -m pytest tests
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api import routes_jobs
+from app.core.ingest import spool_text
+
+TEXT = "Ann: file the jobs report\nBob: check the jobs queue\n"
+
+@pytest.fixture
+def client() -> TestClient:
+    app = FastAPI()
+    app.include_router(routes_jobs.router, prefix="/api")
+    return TestClient(app)
+
+def test_unchanged_job_discards_its_spool(fake_llm):
+    first, again = spool_text(TEXT), spool_text(TEXT)
+    asyncio.run(routes_jobs._handle(str(first)))
+    assert asyncio.run(routes_jobs._handle(str(again)))["processing"] == "unchanged"
+    assert not again.exists()
+
+def test_failed_job_discards_its_spool_and_reports_failure(client: TestClient, monkeypatch):
+    async def boom(src, **kw):
+        raise RuntimeError("provider said no")
+    monkeypatch.setattr(routes_jobs, "process_file", boom)
+    src = spool_text(TEXT)
+    with pytest.raises(RuntimeError):
+        asyncio.run(routes_jobs._handle(str(src)))
+    assert not src.exists()
+
+    job_id = routes_jobs.job_queue.submit(str(src))
+    assert routes_jobs.job_queue.claim() == (job_id, str(src))
+    routes_jobs.job_queue.fail(job_id, "RuntimeError('provider said no')")
+    r = client.get(f"/api/jobs/{job_id}/result")
+    assert r.status_code == 200
+    assert r.json()["status"] == "failed"
+    assert "provider said no" in r.json()["error"]
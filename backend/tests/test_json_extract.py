@@ -0,0 +1,64 @@
+# cd backend && python -m pytest tests
+import pytest
+
+from app.services.json_extract import extract_json
+
+def test_plain_object_needs_no_repair():
+    ex = extract_json('{"bullets": ["a", "b"]}')
+    assert ex.value == {"bullets": ["a", "b"]}
+    assert ex.repairs == []
+    assert ex.objects == 1
+
+def test_code_fence_and_prose_around_the_object():
+    text = 'Sure! Here is the JSON:\n```json\n{"items": [{"description": "ship it"}]}\n```\nAnything else?'
+    ex = extract_json(text, ("items",))
+    assert ex.value == {"items": [{"description": "ship it"}]}
+    assert ex.repairs == []
+
+def test_trailing_commas():
+    ex = extract_json('{"bullets": ["a", "b",], "n": 1,}')
+    assert ex.value == {"bullets": ["a", "b"], "n": 1}
+    assert ex.repairs == ["trailing_comma"]
+
+def test_stray_commas():
+    ex = extract_json('{"bullets": [, "a",, "b"]}')
+    assert ex.value == {"bullets": ["a", "b"]}
+    assert "stray_comma" in ex.repairs
+
+def test_truncated_reply_is_closed():
+    ex = extract_json('{"nodes": [{"id": "a"}, {"id": "b"}], "edges": [{"source": "a", "target": "b"')
+    assert ex.value == {"nodes": [{"id": "a"}, {"id": "b"}], "edges": [{"source": "a", "target": "b"}]}
+    assert ex.repairs == ["truncated"]
+
+def test_truncated_mid_string():
+    ex = extract_json('{"bullets": ["first", "second half')
+    assert ex.value == {"bullets": ["first", "second half"]}
+    assert "truncated" in ex.repairs
+
+def test_truncated_mid_key_falls_back_to_the_last_complete_value():
+    ex = extract_json('{"bullets": ["a"], "items": [{"description": "x"}], "tas')
+    assert ex.value == {"bullets": ["a"], "items": [{"description": "x"}]}
+    assert ex.fields(("bullets", "items", "tasks")) == (["bullets", "items"], ["tasks"])
+
+def test_several_objects_picks_the_one_with_expected_keys():
+    text = 'Draft: {"note": "ignore me", "extra": 1, "more": 2}\nFinal: {"bullets": ["a"]}'
+    ex = extract_json(text, ("bullets",))
+    assert ex.value == {"bullets": ["a"]}
+    assert ex.objects == 2
+    assert "multiple_objects" in ex.repairs
+
+def test_several_objects_without_expected_keys_picks_the_largest():
+    ex = extract_json('{"a": 1} and {"b": 1, "c": 2}')
+    assert ex.value == {"b": 1, "c": 2}
+
+def test_bare_open_brace_closes_to_an_empty_object():
+    ex = extract_json("Here you go: {")
+    assert ex.value == {}
+    assert ex.repairs == ["truncated"]
+    assert ex.fields(("bullets",)) == ([], ["bullets"])
+
+@pytest.mark.parametrize("text", [None, "", "no json here", "[1, 2, 3]", '{"a": }'])
+def test_nothing_recoverable(text):
+    ex = extract_json(text)
+    assert ex.value is None
+    assert ex.fields(("a",)) == ([], ["a"])
@@ -0,0 +1,57 @@
+# cd backend && python -m pytest tests
+import asyncio
+
+from app.core.ingest import spool_text
+from app.services.pipeline import process_file
+
+BASE = "Ann: ship the {tag} release\nBob: review the {tag} notes\n"
+
+def _process(text: str, day: str):
+    return asyncio.run(process_file(spool_text(text), day=day))
+
+def _sent(fake_llm) -> str:
+    return "\n".join(t for _, t in fake_llm.calls)
+
+def test_first_upload_is_a_full_run(fake_llm):
+    res = _process(BASE.format(tag="full"), "2031-01-01")
+    assert res.processing == "full"
+    assert {n.id for n in res.star_connect.nodes} == {"ann", "bob"}
+    assert len(fake_llm.calls) == 3
+
+def test_added_turns_are_appended_to_the_days_run(fake_llm):
+    base = BASE.format(tag="append")
+    first = _process(base, "2031-01-02")
+    fake_llm.calls.clear()
+    res = _process(base + "Carl: book the append room\n", "2031-01-02")
+    assert res.processing == "appended"
+    assert res.date_dir == first.date_dir
+    # only the new turn went to the model
+    assert "Carl: book the append room" in _sent(fake_llm)
+    assert "Ann:" not in _sent(fake_llm)
+    assert {n.id for n in res.star_connect.nodes} == {"ann", "bob", "carl"}
+    assert res.summary.bullets == ["ship the append release", "review the append notes", "book the append room"]
+    assert [t.owner for t in res.tasks.items] == ["Ann", "Bob", "Carl"]
+
+def test_same_transcript_again_is_unchanged(fake_llm):
+    text = BASE.format(tag="same")
+    first = _process(text, "2031-01-03")
+    fake_llm.calls.clear()
+    res = _process(text, "2031-01-03")
+    assert res.processing == "unchanged"
+    assert res.date_dir == first.date_dir
+    assert fake_llm.calls == []
+    assert res.tasks == first.tasks
+
+def test_edited_turn_starts_a_new_run(fake_llm):
+    first = _process(BASE.format(tag="edit"), "2031-01-04")
+    res = _process(BASE.format(tag="edit").replace("ship", "cancel"), "2031-01-04")
+    assert res.processing == "full"
+    assert res.date_dir != first.date_dir
+
+def test_unparsable_delta_section_keeps_the_stored_one(fake_llm):
+    base = BASE.format(tag="garble")
+    first = _process(base, "2031-01-05")
+    res = _process(base + "Dan: GARBLE:star pick the garble venue\n", "2031-01-05")
+    assert res.processing == "appended"
+    assert res.star_connect == first.star_connect
+    assert [t.owner for t in res.tasks.items] == ["Ann", "Bob", "Dan"]
@@ -0,0 +1,29 @@
+# cd backend && python -m pytest tests
+import asyncio
+
+from app.services.gemini_client import normalize_star_json, run_chunked_processors
+
+MOCK_PEOPLE = {"ashu", "dave", "priya"}
+
+def test_unparsable_chunk_section_contributes_nothing(fake_llm):
+    chunks = ["Ann: ship the release\nBob: review the notes", "GARBLE:star\nGARBLE:tasks\nCarl: book the room"]
+    star, summary, tasks = asyncio.run(run_chunked_processors(chunks))
+    assert {n.id for n in star.nodes} == {"ann", "bob"}
+    assert summary.bullets == ["ship the release", "review the notes", "book the room"]
+    assert [t.owner for t in tasks.items] == ["Ann", "Bob"]
+
+def test_section_failing_in_every_chunk_falls_back_to_the_mock(fake_llm):
+    chunks = ["GARBLE:star\nAnn: ship it", "GARBLE:star\nBob: review it"]
+    star, summary, tasks = asyncio.run(run_chunked_processors(chunks))
+    assert {n.id for n in star.nodes} == MOCK_PEOPLE
+    assert summary.bullets == ["ship it", "review it"]
+    assert [t.owner for t in tasks.items] == ["Ann", "Bob"]
+
+def test_unknown_edge_endpoint_keeps_the_models_matrix():
+    star = normalize_star_json({
+        "nodes": [{"id": "a", "label": "A"}, {"id": "b", "label": "B"}],
+        "edges": [{"source": "a", "target": "carol"}],
+        "matrix": [[0, 5], [5, 0]],
+    })
+    assert [n["id"] for n in star["nodes"]] == ["a", "b", "carol"]
+    assert star["matrix"] == [[0, 5, 1], [5, 0, 0], [1, 0, 0]]
@@ -0,0 +1,85 @@
+# cd backend && python -m pytest tests
+import asyncio
+from dataclasses import replace
+from pathlib import Path
+
+from app.core.result_cache import ResultCache
+from app.models.schemas import StarConnect, SummaryBlock, TaskList
+from app.services import gemini_client
+
+def _bundle(note: str):
+    return StarConnect(nodes=[], edges=[], matrix=[]), SummaryBlock(bullets=[note]), TaskList(items=[])
+
+def _cache(root: Path) -> ResultCache:
+    return ResultCache(root, max_entries=10, max_bytes=1 << 20, max_age=3600)
+
+def test_miss_then_hit_from_disk(tmp_path: Path):
+    cache = _cache(tmp_path)
+    calls = []
+
+    async def compute(text: str):
+        calls.append(text)
+        return _bundle(text)
+
+    first = asyncio.run(cache.get_or_compute("Ann: hi\n", "fp", compute))
+    # whitespace and blank lines don't change the key
+    second = asyncio.run(cache.get_or_compute("Ann:   hi\r\n\n", "fp", compute))
+    assert calls == ["Ann: hi\n"]
+    assert first[1].bullets == second[1].bullets == ["Ann: hi\n"]
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    # a fresh instance (another worker, a restart) reads the same entry back
+    other = _cache(tmp_path)
+    _, summary, _ = asyncio.run(other.get_or_compute("Ann: hi", "fp", compute))
+    assert summary.bullets == ["Ann: hi\n"]
+    assert (other.hits, other.misses) == (1, 0)
+
+    asyncio.run(cache.get_or_compute("Ann: hi", "other-fp", compute))
+    assert len(calls) == 2
+    assert cache.stats()["entries"] == 2
+
+def test_identical_inflight_requests_share_one_computation(tmp_path: Path):
+    cache = _cache(tmp_path)
+    calls = []
+
+    async def compute(text: str):
+        calls.append(text)
+        await asyncio.sleep(0.05)
+        return _bundle(text)
+
+    async def go():
+        return await asyncio.gather(*(cache.get_or_compute("Bob: same", "fp", compute) for _ in range(5)))
+
+    results = asyncio.run(go())
+    assert calls == ["Bob: same"]
+    assert all(r[1].bullets == ["Bob: same"] for r in results)
+    assert (cache.misses, cache.coalesced, cache.hits) == (1, 4, 0)
+
+def test_cancelled_leader_hands_over_to_a_waiter(tmp_path: Path):
+    cache = _cache(tmp_path)
+    calls = []
+
+    async def compute(text: str):
+        calls.append(text)
+        await asyncio.sleep(0.05)
+        return _bundle(text)
+
+    async def go():
+        leader = asyncio.create_task(cache.get_or_compute("Carl: x", "fp", compute))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(cache.get_or_compute("Carl: x", "fp", compute))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        return await waiter
+
+    _, summary, _ = asyncio.run(go())
+    assert summary.bullets == ["Carl: x"]
+    assert len(calls) == 2
+
+def test_chunk_size_is_part_of_the_key(tmp_path: Path, monkeypatch):
+    cache = _cache(tmp_path)
+    before = cache.key_for("Ann: hi", gemini_client.processor_fingerprint())
+    settings = gemini_client.settings
+    monkeypatch.setattr(gemini_client, "settings", replace(settings, chunk_max_chars=settings.chunk_max_chars // 2))
+    after = cache.key_for("Ann: hi", gemini_client.processor_fingerprint())
+    assert before != after